@@ -1,17 +1,7 @@
-from flask import render_template
+from cantor_application import create_app
 
-from cantor_application import app
-
-
-@app.route('/')
-def index():
-    """
-    This route renders the index.html template.
-
-    Returns:
-    str: Rendered HTML content of the index page.
-    """
-    return render_template('index.html')
+# The application of `flask run` and of WSGI servers, e.g. `gunicorn --preload app:app`.
+app = create_app()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,117 @@
+"""Benchmark of the portfolio and history lookups with and without indexes.
+
+Builds a synthetic SQLite database with the schema of the initial
+migration, fills it with a million portfolio and history rows and times
+the portfolio queries issued by `User.sell` and `User.purchase` and the
+history query of the history view, first as full table scans and then
+with the indexes added by migration 63e92ec922d1.
+
+Usage:
+    python -m benchmarks.index_benchmark --rows 1000000 --queries 200
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+SCHEMA = '''
+CREATE TABLE portfolio (
+    id INTEGER NOT NULL PRIMARY KEY,
+    currency_symbol VARCHAR(3),
+    currency_amount INTEGER,
+    user_id INTEGER
+);
+CREATE TABLE history (
+    id INTEGER NOT NULL PRIMARY KEY,
+    currency_symbol VARCHAR(3),
+    currency_name VARCHAR(30),
+    currency_amount INTEGER,
+    currency_price INTEGER,
+    date_of_action DATETIME,
+    user_id INTEGER
+);
+'''
+
+INDEXES = '''
+CREATE UNIQUE INDEX ix_portfolio_user_id_currency_symbol ON portfolio (user_id, currency_symbol);
+CREATE INDEX ix_history_user_id_date_of_action ON history (user_id, date_of_action);
+'''
+
+PORTFOLIO_QUERY = (
+    'SELECT id, currency_symbol, currency_amount, user_id FROM portfolio'
+    ' WHERE user_id = ? AND currency_symbol = ? LIMIT 1'
+)
+HISTORY_QUERY = (
+    'SELECT id, currency_symbol, currency_name, currency_amount, currency_price,'
+    ' date_of_action, user_id FROM history WHERE user_id = ?'
+)
+
+SYMBOLS = ['usd', 'eur', 'chf', 'gbp', 'jpy', 'czk', 'nok', 'sek', 'dkk', 'huf']
+
+
+def populate(connection, rows: int):
+    """Inserts `rows` portfolio rows and `rows` history rows."""
+    users = rows // len(SYMBOLS)
+    connection.executemany(
+        'INSERT INTO portfolio (currency_symbol, currency_amount, user_id) VALUES (?, ?, ?)',
+        ((symbol, 100, user_id) for user_id in range(1, users + 1) for symbol in SYMBOLS))
+    start = datetime.datetime(2024, 1, 1)
+    connection.executemany(
+        'INSERT INTO history (currency_symbol, currency_name, currency_amount, currency_price,'
+        ' date_of_action, user_id) VALUES (?, ?, ?, ?, ?, ?)',
+        ((SYMBOLS[number % len(SYMBOLS)], 'currency', 10, 4,
+          (start + datetime.timedelta(minutes=number)).isoformat(' '),
+          random.randint(1, users))
+         for number in range(rows)))
+    connection.commit()
+    return users
+
+
+def time_queries(connection, users: int, queries: int) -> dict:
+    """Runs random portfolio and history lookups and returns the mean time in ms."""
+    sample = [random.randint(1, users) for _ in range(queries)]
+    started = time.perf_counter()
+    for user_id in sample:
+        connection.execute(PORTFOLIO_QUERY, (user_id, random.choice(SYMBOLS))).fetchall()
+    portfolio = (time.perf_counter() - started) / queries * 1000
+    started = time.perf_counter()
+    for user_id in sample:
+        connection.execute(HISTORY_QUERY, (user_id,)).fetchall()
+    history = (time.perf_counter() - started) / queries * 1000
+    return {'portfolio': portfolio, 'history': history}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows per table')
+    parser.add_argument('--queries', type=int, default=200, help='queries per measurement')
+    args = parser.parse_args()
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'benchmark.db'))
+        connection.executescript(SCHEMA)
+        started = time.perf_counter()
+        users = populate(connection, args.rows)
+        print(f'{args.rows} portfolio and history rows for {users} users'
+              f' inserted in {time.perf_counter() - started:.1f} s')
+
+        before = time_queries(connection, users, args.queries)
+        started = time.perf_counter()
+        connection.executescript(INDEXES)
+        print(f'indexes created in {time.perf_counter() - started:.1f} s')
+        after = time_queries(connection, users, args.queries)
+        connection.close()
+
+    print(f'{"query":<34}{"scan ms":>10}{"index ms":>10}{"speed-up":>10}')
+    for name, label in [('portfolio', 'portfolio by user and symbol'),
+                        ('history', 'history by user')]:
+        print(f'{label:<34}{before[name]:>10.3f}{after[name]:>10.3f}'
+              f'{before[name] / after[name]:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark of password logins.
+
+Reports, for several hash methods:
+
+- the verifications per second of a single thread, that is the logins per
+  second one core can serve;
+- the logins per second of concurrent clients of `/api/v1/token`, in total
+  and per core used, with the password verified on the request threads and
+  in a pool of `--pool` threads, together with the refused logins and the
+  median and 95th percentile latency of the `/login` page requested during
+  the burst.
+
+Usage:
+    python -m benchmarks.login_benchmark --clients 8 --pool 1 --seconds 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from cantor_application import create_app, db
+from cantor_application.config import TestingConfig
+from cantor_application.hashing import PasswordHasher
+from cantor_application.models.user import User
+from cantor_application.services import get_services
+
+PASSWORD = 'Secret1!x'
+METHODS = ('scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000')
+
+
+def verifications_per_second(method: str, seconds: float) -> float:
+    """Verifies one hash of the method on this thread for `seconds`."""
+    hasher = PasswordHasher(method)
+    stored = hasher.hash(PASSWORD)
+    count, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        hasher.verify(stored, PASSWORD)
+        count += 1
+    return count / seconds
+
+
+def make_app(path: str, method: str, workers: int, users: int):
+    """Returns an application on a new SQLite file with `users` users."""
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        PASSWORD_HASH_METHOD = method
+        PASSWORD_VERIFY_WORKERS = workers
+
+    app = create_app(BenchmarkConfig)
+    stored = get_services(app).password_hasher.hash(PASSWORD)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            User(name=f'client{number}', password=stored, email=f'client{number}@cantor.pl', amount_of_pln=0)
+            for number in range(users))
+        db.session.commit()
+    return app
+
+
+def run(app, clients: int, seconds: float) -> dict:
+    """Logs in from concurrent clients for `seconds` while another one loads `/login`.
+
+    Returns:
+        dict: Numbers of logins and refused logins, and the page latencies in seconds.
+    """
+    counts = {'logins': 0, 'busy': 0}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(number):
+        http = app.test_client()
+        while time.monotonic() < deadline:
+            status = http.post('/api/v1/token', json={'name': f'client{number}', 'password': PASSWORD}).status_code
+            with lock:
+                counts['logins' if status == 200 else 'busy'] += 1
+            if status == 503:
+                time.sleep(0.01)
+
+    def browser():
+        http = app.test_client()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            http.get('/login')
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    threads.append(threading.Thread(target=browser))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts['latencies'] = latencies
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8, help='threads logging in')
+    parser.add_argument('--pool', type=int, default=1, help='verification threads of the pooled runs')
+    parser.add_argument('--seconds', type=float, default=5, help='duration of each run')
+    parser.add_argument('--method', action='append', help='hash methods to compare, repeatable')
+    args = parser.parse_args()
+    methods = args.method or METHODS
+    cores = os.cpu_count() or 1
+
+    print(f'single thread ({cores} cores available)')
+    for method in methods:
+        print(f'  {method:<24}{verifications_per_second(method, args.seconds):>8.1f} logins/s per core')
+
+    print(f'{args.clients} clients of /api/v1/token')
+    print(f'  {"method":<24}{"verify":<10}{"logins/s":>9}{"per core":>9}{"refused":>8}'
+          f'{"page p50":>10}{"page p95":>10}')
+    with tempfile.TemporaryDirectory() as directory:
+        for method in methods:
+            for label, workers in (('inline', 0), (f'pool {args.pool}', args.pool)):
+                app = make_app(os.path.join(directory, f'{len(os.listdir(directory))}.db'),
+                               method, workers, args.clients)
+                counts = run(app, args.clients, args.seconds)
+                with app.app_context():
+                    db.engine.dispose()
+                used = min(cores, workers or args.clients)
+                logins = counts['logins'] / args.seconds
+                latencies = sorted(counts['latencies'])
+                p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+                print(f'  {method:<24}{label:<10}{logins:>9.1f}{logins / used:>9.1f}{counts["busy"]:>8}'
+                      f'{statistics.median(latencies or [0]) * 1000:>8.0f}ms{p95 * 1000:>8.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
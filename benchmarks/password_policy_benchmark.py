@@ -0,0 +1,53 @@
+"""Benchmark of the password policy.
+
+Reports the time to validate a set of passwords with the separate
+validators of the registration form, with the single-pass PasswordPolicy
+and with the PasswordPolicy memoizing its results. The breached password
+check is disabled, so only the local rules are measured.
+
+Usage:
+    python -m benchmarks.password_policy_benchmark --number 500 --repeat 3
+"""
+import argparse
+import timeit
+
+from cantor_application.forms.password_validators.password_validators import (
+    DigitValidator,
+    LengthValidator,
+    LowerCharValidator,
+    SpecialCharValidator,
+    UpperCharValidator,
+)
+from cantor_application.forms.password_validators.policy import PasswordPolicy
+
+PASSWORDS = ['Secret1!x', 'secret', 'SECRET-PASSWORD', 'żółw123ŻÓŁW!', 'a' * 60 + 'B1!', 'A' * 64]
+SEPARATE = [LengthValidator, SpecialCharValidator, UpperCharValidator, LowerCharValidator, DigitValidator]
+
+
+def separate_violations(password: str) -> str:
+    """Runs every validator of the registration form on its own."""
+    return ''.join(message for message in (validator(password).is_valid() for validator in SEPARATE) if message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=500, help='validations of the password set per run')
+    parser.add_argument('--repeat', type=int, default=3, help='runs, the fastest one is reported')
+    args = parser.parse_args()
+
+    compiled = PasswordPolicy(memo_size=0)
+    memoized = PasswordPolicy()
+    variants = (
+        ('separate validators', separate_violations),
+        ('single pass', compiled.is_valid),
+        ('memoized', memoized.is_valid),
+    )
+    print(f'{len(PASSWORDS)} passwords x {args.number}')
+    for label, validate in variants:
+        best = min(timeit.repeat(lambda: [validate(password) for password in PASSWORDS],
+                                 number=args.number, repeat=args.repeat))
+        print(f'  {label:<20}{best * 1000:>8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark of outbound NBP requests under concurrent load.
+
+Simulates many users asking for the same exchange rate at the same moment
+against a local stand-in of the NBP Web API and reports how many requests
+reach the API and how long the callers wait, for:
+
+- one `requests.get` per call (the previous `lookup` behaviour),
+- the pooled, coalescing NbpClient,
+- `lookup` backed by the rate cache and the table loader.
+
+Usage:
+    python -m benchmarks.rate_client_benchmark --users 200 --delay 0.05
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite://')
+
+import requests  # pylint: disable=wrong-import-position
+
+from cantor_application.cache import TTLCache  # pylint: disable=wrong-import-position
+from cantor_application.rates.client import NbpClient  # pylint: disable=wrong-import-position
+from cantor_application.rates.nbp_stub import StubNbpServer  # pylint: disable=wrong-import-position
+from cantor_application.rates.table import RateTableLoader  # pylint: disable=wrong-import-position
+
+
+def run_concurrently(function, users):
+    """Calls the function from `users` threads released at once.
+
+    Returns:
+        tuple: wall time in seconds, the list of per-call latencies
+        and the number of failed calls.
+    """
+    latencies = [0.0] * users
+    errors = []
+    barrier = threading.Barrier(users + 1)
+
+    def worker(index):
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            function()
+        except (requests.exceptions.RequestException, ValueError) as error:
+            errors.append(error)
+        latencies[index] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, len(errors)
+
+
+def per_call_get(server):
+    url = f'{server.base_url}/exchangerates/rates/A/usd/'
+
+    def call():
+        with requests.get(url, timeout=10) as content:
+            content.raise_for_status()
+            return content.json()
+
+    return call
+
+
+def pooled_client(server):
+    client = NbpClient(server.base_url, pool_size=20)
+    return lambda: client.get_json('exchangerates/rates/A/usd/')
+
+
+def cached_lookup(server):
+    loader = RateTableLoader(NbpClient(server.base_url, pool_size=20))
+
+    def load(symbol):
+        table = loader.fresh_table(86400) or loader.load()
+        entry = table.get(symbol)
+        return entry.mid, entry.name
+
+    cache = TTLCache(load)
+    return lambda: cache.get('USD')
+
+
+SCENARIOS = [
+    ('requests.get per call', per_call_get),
+    ('pooled + coalesced client', pooled_client),
+    ('lookup with rate cache', cached_lookup),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help='concurrent lookups')
+    parser.add_argument('--delay', type=float, default=0.05, help='API latency in seconds')
+    args = parser.parse_args()
+
+    print(f'{args.users} concurrent lookups of USD, API latency {args.delay * 1000:.0f} ms')
+    print(f'{"scenario":<28}{"requests":>10}{"errors":>8}{"wall ms":>10}'
+          f'{"p50 ms":>10}{"p99 ms":>10}')
+    for name, scenario in SCENARIOS:
+        with StubNbpServer(delay=args.delay) as server:
+            wall, latencies, errors = run_concurrently(scenario(server), args.users)
+            latencies.sort()
+            p50 = statistics.median(latencies)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f'{name:<28}{server.request_count:>10}{errors:>8}{wall * 1000:>10.1f}'
+                  f'{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark of the start of a worker process.
+
+Reports, as the median of several runs:
+
+- cold start: a new interpreter importing the package, creating the
+  application with create_app and serving its first request, like a worker
+  of a server without preloading;
+- preloaded start: a process forked from a parent which already created
+  the application, serving its first request, like a worker of
+  `gunicorn --preload`.
+
+Besides the wall time, the maximal resident memory of a cold worker, the
+number of imported modules and the memory a forked worker does not share
+with its parent (Linux only) are printed.
+
+Usage:
+    python -m benchmarks.startup_benchmark --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+COLD_START = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import cantor_application
+imported = time.perf_counter()
+app = cantor_application.create_app('testing')
+created = time.perf_counter()
+app.test_client().get('/login')
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'total': served - started,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'requests_imported': 'requests' in sys.modules,
+}))
+'''
+
+
+def private_memory_mb(pid: int):
+    """Returns the private memory of the process in MB, None if it cannot be read."""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', encoding='ascii') as smaps:
+            fields = dict(line.split(':', 1) for line in smaps if ':' in line)
+    except OSError:
+        return None
+    return sum(int(fields.get(key, '0 kB').split()[0]) for key in ('Private_Clean', 'Private_Dirty')) / 1024
+
+
+def cold_start() -> dict:
+    """Runs a new interpreter through the start of a worker."""
+    output = subprocess.run([sys.executable, '-c', COLD_START], check=True, capture_output=True,
+                            text=True, env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def preloaded_start(app, runs: int) -> list:
+    """Forks `runs` workers from this process, each serving one request."""
+    results = []
+    for _ in range(runs):
+        reader, writer = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(reader)
+            app.test_client().get('/login')
+            served = time.perf_counter() - started
+            os.write(writer, json.dumps({'total': served, 'private_mb': private_memory_mb(os.getpid())}).encode())
+            os._exit(0)  # pylint: disable=protected-access
+        os.close(writer)
+        with os.fdopen(reader) as answer:
+            results.append(json.loads(answer.read()))
+        os.waitpid(pid, 0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='workers started in each mode')
+    args = parser.parse_args()
+
+    cold = [cold_start() for _ in range(args.runs)]
+    print('cold start (new interpreter)')
+    for key in ('import', 'create_app', 'first_request', 'total'):
+        print(f'  {key:<20}{statistics.median(run[key] for run in cold) * 1000:>8.0f} ms')
+    print(f'  {"max rss":<20}{statistics.median(run["max_rss_mb"] for run in cold):>8.1f} MB')
+    print(f'  {"modules":<20}{cold[0]["modules"]:>8}')
+    print(f'  requests imported at start: {cold[0]["requests_imported"]}')
+
+    from cantor_application import create_app  # pylint: disable=import-outside-toplevel
+    app = create_app('testing')
+    preloaded = preloaded_start(app, args.runs)
+    print('preloaded start (forked worker)')
+    print(f'  {"total":<20}{statistics.median(run["total"] for run in preloaded) * 1000:>8.0f} ms')
+    private = [run['private_mb'] for run in preloaded if run['private_mb'] is not None]
+    if private:
+        print(f'  {"private memory":<20}{statistics.median(private):>8.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
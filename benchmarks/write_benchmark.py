@@ -0,0 +1,125 @@
+"""Load test of concurrent trades on a SQLite database.
+
+Runs buy and sell orders of several users from concurrent threads, while
+other threads read the transaction history like the `/history` page, and
+reports the trades per second and the trades that failed with "database
+is locked", for:
+
+- the SQLite defaults (rollback journal, `synchronous=FULL`, no pragmas),
+- the engine settings of the application (WAL, `synchronous=NORMAL`,
+  busy timeout and mmap size, see `cantor_application.database`).
+
+Usage:
+    python -m benchmarks.write_benchmark --writers 8 --readers 4 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from cantor_application import create_app, db
+from cantor_application.config import TestingConfig
+from cantor_application.models.history import History
+from cantor_application.models.user import User
+from cantor_application.rates.quote import Quote
+
+QUOTE = Quote('usd', 'dolar amerykański', 4.0)
+
+
+def make_app(path: str, tuned: bool, users: int):
+    """Returns an application on a new SQLite file with `users` funded users."""
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    if not tuned:
+        # The SQLite defaults, with the 5 s lock wait of the driver.
+        BenchmarkConfig.SQLITE_JOURNAL_MODE = 'DELETE'
+        BenchmarkConfig.SQLITE_SYNCHRONOUS = 'FULL'
+        BenchmarkConfig.SQLITE_BUSY_TIMEOUT = 5000
+        BenchmarkConfig.SQLITE_MMAP_SIZE = 0
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            User(name=f'trader{number}', password='-', email=f'trader{number}@cantor.pl', amount_of_pln=10**6)
+            for number in range(users))
+        db.session.commit()
+    return app
+
+
+def run(app, writers: int, readers: int, seconds: float) -> dict:
+    """Trades and reads from concurrent threads for `seconds`.
+
+    Returns:
+        dict: Numbers of committed trades, failed trades and history reads.
+    """
+    counts = {'trades': 0, 'locked': 0, 'reads': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(user_id):
+        with app.app_context():
+            user = db.session.get(User, user_id)
+            buying = True
+            while time.monotonic() < deadline:
+                try:
+                    if buying:
+                        done = user.purchase(QUOTE.value_of(1), user, 'usd', 1, QUOTE)
+                    else:
+                        done = user.sell('usd', 1, QUOTE.value_of(1), user, QUOTE)
+                    if done:
+                        count('trades')
+                    buying = not buying
+                except OperationalError:
+                    db.session.rollback()
+                    count('locked')
+
+    def reader(user_id):
+        with app.app_context():
+            while time.monotonic() < deadline:
+                try:
+                    History.query.filter_by(user_id=user_id).order_by(History.date_of_action.desc()).limit(50).all()
+                    db.session.rollback()
+                    count('reads')
+                    # Leaves the interpreter to the writers between page views.
+                    time.sleep(0.001)
+                except OperationalError:
+                    db.session.rollback()
+
+    threads = [threading.Thread(target=writer, args=(number + 1,)) for number in range(writers)]
+    threads += [threading.Thread(target=reader, args=(number % writers + 1,)) for number in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8, help='threads buying and selling')
+    parser.add_argument('--readers', type=int, default=4, help='threads reading the history')
+    parser.add_argument('--seconds', type=float, default=5, help='duration of each run')
+    args = parser.parse_args()
+
+    print(f'{"settings":<12}{"trades/s":>10}{"locked":>8}{"reads/s":>10}')
+    with tempfile.TemporaryDirectory() as directory:
+        for label, tuned in (('default', False), ('tuned', True)):
+            app = make_app(os.path.join(directory, f'{label}.db'), tuned, args.writers)
+            counts = run(app, args.writers, args.readers, args.seconds)
+            with app.app_context():
+                db.engine.dispose()
+            print(f'{label:<12}{counts["trades"] / args.seconds:>10.0f}{counts["locked"]:>8}'
+                  f'{counts["reads"] / args.seconds:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
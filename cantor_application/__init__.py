@@ -1,33 +1,116 @@
+"""Package of the Flask Cantor application.
+
+Importing the package only creates the unbound extensions; create_app
+builds an application from a config profile, importing the blueprints
+and their dependencies at that point. Every application gets its own
+clients, caches and background threads, see the services module. No
+connection is opened and no thread is started while the application is
+created, so pre-fork servers can preload it: the rate refresher and the
+history writer are started by the first request every worker process
+serves.
+
+"""
 import os
-from os import getenv
-from dotenv import load_dotenv
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+import threading
+
+from flask import Flask, render_template
 from flask_migrate import Migrate
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+migrate = Migrate()
+
+
+def index():
+    """
+    This route renders the index.html template.
+
+    Returns:
+    str: Rendered HTML content of the index page.
+    """
+    return render_template('index.html')
+
+
+def create_app(config=None) -> Flask:
+    """Creates and configures an instance of the application.
+
+    Args:
+        config (str or type): A profile name ('development', 'testing' or
+            'production') or a config class, None for the profile named by
+            the CANTOR_CONFIG environment variable.
+
+    Returns:
+        Flask: The configured application.
+    """
+    # pylint: disable=import-outside-toplevel
+    from cantor_application.config import resolve_config
+    from cantor_application.database import engine_options, init_database
+    from cantor_application.money import MoneyJSONProvider
+
+    app = Flask(__name__)
+    app.json = MoneyJSONProvider(app)
+    app.config.from_object(resolve_config(config))
+    if not app.config['HISTORY_JOURNAL_DIR']:
+        app.config['HISTORY_JOURNAL_DIR'] = os.path.join(app.instance_path, 'journal')
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+    init_database(app, db)
+    _configure_services(app)
+    _register_blueprints(app)
+    return app
 
-load_dotenv()
 
-app = Flask(__name__)
+def _configure_services(app):
+    """Builds the clients, caches and background threads of the application."""
+    # pylint: disable=import-outside-toplevel
+    from cantor_application.profiling import init_profiling
+    from cantor_application.services import init_services
 
+    services = init_services(app)
+    init_profiling(app)
+    starting = threading.Lock()
 
-app.config['SECRET_KEY'] = getenv('SECRET_KEY')
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = getenv('SQLALCHEMY_DATABASE_URI')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = getenv('SQLALCHEMY_TRACK_MODIFICATIONS')
+    @app.before_request
+    def start_background_threads():
+        # Threads do not survive a fork, so every worker starts its own. The
+        # lock is only taken until they run, not by every request.
+        if services.started:
+            return
+        with starting:
+            services.start()
 
-db = SQLAlchemy(app)
-Migrate(app,db)
 
-from cantor_application.login.views import login_blueprint 
-from cantor_application.logout.views import logout_blueprint 
-from cantor_application.register.views import registration_blueprint
-from cantor_application.buy.views import buy_blueprint
-from cantor_application.sell.views import sell_blueprint
-from cantor_application.history.views import history_blueprint
+def _register_blueprints(app):
+    """Registers the index page, the blueprints and the CLI commands."""
+    # pylint: disable=import-outside-toplevel
+    from cantor_application.login.views import login_blueprint, login_manager
+    from cantor_application.logout.views import logout_blueprint
+    from cantor_application.register.views import registration_blueprint
+    from cantor_application.buy.views import buy_blueprint
+    from cantor_application.sell.views import sell_blueprint
+    from cantor_application.history.views import history_blueprint
+    from cantor_application.portfolio.views import portfolio_blueprint
+    from cantor_application.metrics.views import metrics_blueprint
+    from cantor_application.orders.views import orders_blueprint
+    from cantor_application.api.views import api_blueprint
+    from cantor_application.pnl.commands import pnl_cli
+    from cantor_application.forms.password_validators.commands import passwords_cli
+    from cantor_application.users.commands import users_cli
 
-app.register_blueprint(login_blueprint)
-app.register_blueprint(logout_blueprint)
-app.register_blueprint(registration_blueprint) 
-app.register_blueprint(buy_blueprint) 
-app.register_blueprint(sell_blueprint)
-app.register_blueprint(history_blueprint)
+    login_manager.init_app(app)
+    app.add_url_rule('/', 'index', index)
+    app.register_blueprint(login_blueprint)
+    app.register_blueprint(logout_blueprint)
+    app.register_blueprint(registration_blueprint)
+    app.register_blueprint(buy_blueprint)
+    app.register_blueprint(sell_blueprint)
+    app.register_blueprint(history_blueprint)
+    app.register_blueprint(portfolio_blueprint)
+    app.register_blueprint(metrics_blueprint)
+    app.register_blueprint(orders_blueprint)
+    app.register_blueprint(api_blueprint)
+    app.cli.add_command(pnl_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(users_cli)
@@ -0,0 +1,61 @@
+"""Module providing token authentication of the JSON API.
+
+This module issues signed, time-limited bearer tokens carrying the ID of
+a user and verifies them on every API request. The tokens are signed with
+the SECRET_KEY of the application, so no token table is needed, and the
+user is loaded through the user cache like a session login, so an
+authenticated API request costs at most one user query.
+
+"""
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from cantor_application.models.user import User, load_cached_user
+
+SALT = 'cantor-api-token'
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=SALT)
+
+
+def issue_token(user: User) -> str:
+    """Returns a signed bearer token of the user."""
+    return _serializer().dumps({'id': user.id})
+
+
+def verify_token(token: str):
+    """Returns the user of a valid token.
+
+    Args:
+        token (str): The bearer token sent by the client.
+
+    Returns:
+        User or None: The user, None if the token is forged, expired or the user is gone.
+    """
+    try:
+        data = _serializer().loads(token, max_age=current_app.config['API_TOKEN_MAX_AGE'])
+        return load_cached_user(int(data['id']))
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def token_required(view):
+    """Decorator letting only requests with a valid bearer token into the view.
+
+    The authenticated user is available as `g.api_user` inside the view.
+    """
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        user = verify_token(token) if scheme.lower() == 'bearer' and token else None
+        if user is None:
+            response = jsonify(error='A valid bearer token is required')
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        g.api_user = user
+        return view(*args, **kwargs)
+    return decorated
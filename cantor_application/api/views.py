@@ -0,0 +1,219 @@
+from flask import Blueprint, request, jsonify, current_app, g
+from cantor_application import db
+from cantor_application.api.auth import issue_token, token_required
+from cantor_application.hashing import HasherBusy
+from cantor_application.history.export import record_values
+from cantor_application.history.pagination import HistoryFilter, InvalidCursor, history_page
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.helpers import rate_snapshot
+from cantor_application.models.user import User, authenticate
+from cantor_application.pnl.positions import pnl_report
+from cantor_application.portfolio.valuation import portfolio_valuation
+from cantor_application.rates.quote import get_quote
+
+api_blueprint = Blueprint('api',__name__, url_prefix='/api/v1')
+
+
+def _error(message: str, status: int):
+    return jsonify(error=message), status
+
+
+def _trade_order():
+    """Returns the quote and amount of a JSON trade order, or an error response."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, None, _error('The body must be a JSON object', 400)
+    symbol, amount = data.get('symbol'), data.get('amount')
+    if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+        return None, None, _error('amount must be a positive integer', 400)
+    quote = get_quote(symbol) if isinstance(symbol, str) and symbol else None
+    if quote is None:
+        return None, None, _error(f'Unknown currency or rate not available: {symbol}', 400)
+    return quote, amount, None
+
+
+def _trade(quote, amount: int) -> dict:
+    return {
+        'symbol': quote.symbol,
+        'name': quote.name,
+        'amount': amount,
+        'price': quote.price,
+        'value': quote.value_of(amount),
+    }
+
+
+@api_blueprint.route('/token', methods = ['POST'])
+def token():
+    """
+    This route exchanges the name and password of a user for a bearer token
+    used by the other routes of the API.
+
+    JSON Body:
+    - name: The name of the user.
+    - password: The password of the user.
+
+    Returns:
+    200: The token and the number of seconds it is valid for.
+    401: The name or password is wrong.
+    503: Too many passwords are being verified, retry after a second.
+    """
+    data = request.get_json(silent=True) or {}
+    name, password = data.get('name'), data.get('password')
+    if not isinstance(name, str) or not isinstance(password, str):
+        return _error('name and password are required', 401)
+    try:
+        user = authenticate(name, password)
+    except HasherBusy:
+        response, status = _error('Too many logins, try again later', 503)
+        response.headers['Retry-After'] = '1'
+        return response, status
+    if user is None:
+        return _error('Wrong name or password', 401)
+    return jsonify(token=issue_token(user), expires_in=current_app.config['API_TOKEN_MAX_AGE'])
+
+
+@api_blueprint.route('/quote/<symbol>', methods = ['GET'])
+@token_required
+def quote(symbol):
+    """
+    This route returns the current exchange rate of a currency.
+
+    Returns:
+    200: The symbol, name and price of the currency in PLN.
+    404: The currency does not exist or its rate is not available.
+    """
+    currency_quote = get_quote(symbol)
+    if currency_quote is None:
+        return _error(f'Unknown currency or rate not available: {symbol}', 404)
+    return jsonify(symbol=currency_quote.symbol, name=currency_quote.name, price=currency_quote.price)
+
+
+@api_blueprint.route('/buy', methods = ['POST'])
+@token_required
+def buy():
+    """
+    This route buys currency for the authenticated user.
+
+    JSON Body:
+    - symbol: The currency code to buy.
+    - amount: The amount of currency to buy.
+
+    Returns:
+    200: The executed purchase.
+    400: The order is malformed or names an unknown currency.
+    409: The user cannot afford the purchase.
+    """
+    quote, amount, error = _trade_order()
+    if error:
+        return error
+    user = g.api_user
+    if not user.purchase(quote.value_of(amount), user, quote.symbol, amount, quote):
+        return _error('Insufficient funds in the account', 409)
+    return jsonify(_trade(quote, amount))
+
+
+@api_blueprint.route('/sell', methods = ['POST'])
+@token_required
+def sell():
+    """
+    This route sells currency from the portfolio of the authenticated user.
+
+    JSON Body:
+    - symbol: The currency code to sell.
+    - amount: The amount of currency to sell.
+
+    Returns:
+    200: The executed sale.
+    400: The order is malformed or names an unknown currency.
+    409: The user does not hold enough of the currency.
+    """
+    quote, amount, error = _trade_order()
+    if error:
+        return error
+    user = g.api_user
+    if not user.sell(quote.symbol, amount, quote.value_of(amount), user, quote):
+        return _error('No sufficient amount of currency on your account', 409)
+    return jsonify(_trade(quote, amount))
+
+
+@api_blueprint.route('/portfolio', methods = ['GET'])
+@token_required
+def portfolio():
+    """
+    This route returns the currencies held by the authenticated user.
+
+    Returns:
+    200: The balance in PLN and the amount of every currency held.
+    """
+    # The balance is read with the holdings, not from the user cache, so the two always agree.
+    rows = db.session.execute(
+        db.select(User.amount_of_pln, Portfolio.currency_symbol, Portfolio.currency_amount)
+        .outerjoin(Portfolio, Portfolio.user_id == User.id)
+        .where(User.id == g.api_user.id)
+        .order_by(Portfolio.currency_symbol)
+        ).all()
+    return jsonify(
+        amount_of_pln=rows[0].amount_of_pln,
+        currencies=[
+            {'symbol': row.currency_symbol, 'amount': row.currency_amount}
+            for row in rows if row.currency_symbol is not None
+        ])
+
+
+@api_blueprint.route('/portfolio/valuation', methods = ['GET'])
+@token_required
+def valuation():
+    """
+    This route values every currency held by the authenticated user in PLN at the
+    current exchange rates. The valuation is cached until the user trades or new
+    exchange rates are published.
+
+    Returns:
+    200: The price and value of every holding and their total value in PLN.
+    503: The exchange rates are not available.
+    """
+    portfolio_value = portfolio_valuation(g.api_user.id)
+    if portfolio_value is None:
+        return _error('Exchange rates are not available', 503)
+    return jsonify(portfolio_value.as_dict())
+
+
+@api_blueprint.route('/pnl', methods = ['GET'])
+@token_required
+def pnl():
+    """
+    This route returns the realized and unrealized profit of the authenticated user
+    per currency, read from the running positions instead of the transaction history.
+
+    Returns:
+    200: The positions with their average cost and profit, and the totals in PLN.
+    503: The exchange rates are not available.
+    """
+    table = rate_snapshot()
+    if table is None:
+        return _error('Exchange rates are not available', 503)
+    return jsonify(pnl_report(g.api_user.id, table))
+
+
+@api_blueprint.route('/history', methods = ['GET'])
+@token_required
+def history():
+    """
+    This route returns one page of the transaction history of the authenticated user,
+    newest first. It takes the same query parameters as the '/history' page.
+
+    Returns:
+    200: The records of the page and the cursor of the next one, null on the last page.
+    400: The cursor or a filter is malformed.
+    """
+    page_size = request.args.get('page_size', current_app.config['HISTORY_PAGE_SIZE'], type=int)
+    page_size = max(1, min(page_size, current_app.config['HISTORY_MAX_PAGE_SIZE']))
+    try:
+        history_filter = HistoryFilter.from_args(request.args)
+        page = history_page(g.api_user.id, page_size, request.args.get('after'), history_filter)
+    except InvalidCursor as error:
+        return _error(str(error), 400)
+
+    return jsonify(
+        records=[record_values(record) for record in page.records],
+        next_cursor=page.next_cursor)
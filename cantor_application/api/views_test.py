@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from cantor_application import db
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.models.user import User
+from cantor_application.rates.table import RateEntry, RateTable
+from cantor_application.services import get_services
+
+DAY = datetime.date(2024, 3, 5)
+
+
+@pytest.fixture
+def trader_balance():
+    return 100
+
+
+@pytest.fixture
+def trading_app(trading_app, monkeypatch):
+    monkeypatch.setattr(get_services(trading_app).rate_refresher, 'snapshot', RateTable('045/A/NBP/2024', DAY, [
+        RateEntry('USD', 'dolar amerykański', 4.0, DAY),
+    ]))
+    with trading_app.app_context():
+        db.session.get(User, 1).password = generate_password_hash('Secret1!x')
+        db.session.commit()
+    return trading_app
+
+
+def bearer(client):
+    response = client.post('/api/v1/token', json={'name': 'trader1', 'password': 'Secret1!x'})
+    assert response.status_code == 200
+    return {'Authorization': f'Bearer {response.get_json()["token"]}'}
+
+
+def test_requests_without_valid_token_are_refused(client):
+    assert client.post('/api/v1/token', json={'name': 'trader1', 'password': 'wrong'}).status_code == 401
+    assert client.get('/api/v1/portfolio').status_code == 401
+    response = client.get('/api/v1/portfolio', headers={'Authorization': 'Bearer forged'})
+    assert response.status_code == 401
+    assert response.headers['WWW-Authenticate'] == 'Bearer'
+
+def test_trading_through_the_api(client):
+    headers = bearer(client)
+    assert client.get('/api/v1/quote/USD', headers=headers).get_json() == {
+        'symbol': 'usd', 'name': 'dolar amerykański', 'price': 4.0}
+
+    response = client.post('/api/v1/buy', json={'symbol': 'usd', 'amount': 10}, headers=headers)
+    assert response.get_json()['value'] == 40.0
+    response = client.post('/api/v1/sell', json={'symbol': 'usd', 'amount': 4}, headers=headers)
+    assert response.status_code == 200
+    response = client.post('/api/v1/buy', json={'symbol': 'usd', 'amount': 100}, headers=headers)
+    assert response.status_code == 409
+    response = client.post('/api/v1/sell', json={'symbol': 'usd', 'amount': '1'}, headers=headers)
+    assert response.status_code == 400
+
+    assert client.get('/api/v1/portfolio', headers=headers).get_json() == {
+        'amount_of_pln': 76.0, 'currencies': [{'symbol': 'usd', 'amount': 6}]}
+    page = client.get('/api/v1/history?page_size=1', headers=headers).get_json()
+    assert [record['currency_amount'] for record in page['records']] == [-4]
+    assert page['next_cursor']
+
+def test_portfolio_balance_agrees_with_the_holdings(client, trading_app):
+    headers = bearer(client)
+    assert client.get('/api/v1/portfolio', headers=headers).get_json() == {
+        'amount_of_pln': 100.0, 'currencies': []}
+    with trading_app.app_context():
+        # A trade handled by another worker process, which leaves the user cache of this one as it is.
+        user = db.session.get(User, 1)
+        user.amount_of_pln = 60
+        db.session.add(Portfolio(user_id=1, currency_symbol='usd', currency_amount=10))
+        db.session.commit()
+
+    assert client.get('/api/v1/portfolio', headers=headers).get_json() == {
+        'amount_of_pln': 60.0, 'currencies': [{'symbol': 'usd', 'amount': 10}]}
@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from cantor_application import db
+from cantor_application.models.history import History
+from cantor_application.models.user import User
+from cantor_application.rates import quote
+from cantor_application.services import get_services
+
+
+def test_purchase_is_priced_and_recorded_with_one_lookup(client, trading_app, monkeypatch):
+    lookups = []
+
+    def lookup(symbol):
+        lookups.append(symbol)
+        return 4.12345678, 'dolar amerykański'
+
+    monkeypatch.setattr(quote, 'lookup', lookup)
+    client.get('/buy')
+    user_cache = get_services(trading_app).user_cache
+    response = client.post('/buy', data={'currency': 'USD', 'amount': 7})
+    assert b'You have successfully bought amount: 7' in response.data
+    assert lookups == ['usd']
+
+    with trading_app.app_context():
+        record = History.query.one()
+        assert record.currency_price == Decimal('4.12345678')
+        # 7 * 4.12345678 = 28.86419746, charged in grosze.
+        assert db.session.get(User, 1).amount_of_pln == Decimal('1000') - Decimal('28.86')
+    # The cached user is refilled from the UPDATE of the purchase, not loaded again.
+    assert user_cache.get(1)['amount_of_pln'] == Decimal('971.14')
+    assert user_cache.stats()['misses'] == 1
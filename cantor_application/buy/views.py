@@ -1,8 +1,6 @@
-from flask import Blueprint, render_template,  flash, session
-from flask_login import login_required
+from flask import Blueprint, render_template,  flash
+from flask_login import login_required, current_user
 from cantor_application.forms.buyform import BuyForm
-from cantor_application.helpers import lookup
-from cantor_application.login.views import load_user
 
 buy_blueprint = Blueprint('buy',__name__, template_folder='templates')
 
@@ -29,22 +27,22 @@ def buy():
 
     form = BuyForm()
 
-    user = load_user(session.get('user_id'))
+    user = current_user
 
     if form.validate_on_submit():
-        #NBP API
-        currency_value, currency_name = lookup(form.currency.data)
-        purchase_value = form.amount.data * currency_value
+        # Quote resolved once by the form validator.
+        quote = form.quote
+        purchase_value = quote.value_of(form.amount.data)
 
-        # Chacking if user can aford for the purcahse.
-        if user.checking_if_can_purchase(purchase_value, user):
-            user.purchase(
+        # The purchase is refused atomically when the user cannot afford it.
+        if user.purchase(
                 purchase_value,
                 user,
-                form.currency.data.lower(),
-                form.amount.data
-                )
-            flash(f"You have successfully bought amount: {form.amount.data} of: {currency_name}")
+                quote.symbol,
+                form.amount.data,
+                quote
+                ):
+            flash(f"You have successfully bought amount: {form.amount.data} of: {quote.name}")
             return render_template('index.html', form=form)
 
         flash("Insufficient funds in the account - transaction canceled")
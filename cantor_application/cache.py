@@ -0,0 +1,190 @@
+"""Module providing an in-process TTL cache with LRU eviction.
+
+This module defines the TTLCache class, a small thread-safe cache which
+sits in front of slow loaders (for example the NBP Web API). Entries live
+for a configurable time to live, the least recently used entry is evicted
+when the cache is full and expired entries are served stale while
+a single background thread refreshes them.
+
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Class representing a bounded, thread-safe cache with time based expiry.
+
+    Attributes:
+        loader (callable): Function called with a key to load a missing value.
+        ttl (float): Number of seconds an entry is considered fresh.
+        max_stale (float): Number of seconds after expiry an entry may still
+        be served while it is refreshed in the background.
+        maxsize (int): Maximal number of entries kept in the cache.
+        hits (int): Number of lookups answered with a fresh entry.
+        stale_hits (int): Number of lookups answered with a stale entry.
+        misses (int): Number of lookups which had to wait for the loader.
+        evictions (int): Number of entries dropped because the cache was full.
+
+    Methods:
+        configure: Changes ttl, max_stale and maxsize of the cache.
+        get: Returns the cached value for a key, loading it when needed.
+        peek: Returns the fresh cached value for a key without loading it.
+        put: Stores a value for a key.
+        invalidate: Drops one key or the whole cache.
+        stats: Returns the counters of the cache.
+    """
+
+    def __init__(self, loader, ttl: float = 86400, max_stale: float = 86400,
+                 maxsize: int = 256, is_cacheable=None) -> None:
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.maxsize = maxsize
+        self.is_cacheable = is_cacheable or (lambda value: value is not None)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def configure(self, ttl: float = None, max_stale: float = None, maxsize: int = None):
+        """Changes the settings of the cache.
+
+        Args:
+            ttl (float): Number of seconds an entry is considered fresh.
+            max_stale (float): Number of seconds a stale entry may be served.
+            maxsize (int): Maximal number of entries kept in the cache.
+        """
+        with self._lock:
+            if ttl is not None:
+                self.ttl = ttl
+            if max_stale is not None:
+                self.max_stale = max_stale
+            if maxsize is not None:
+                self.maxsize = maxsize
+                self._evict()
+
+    def get(self, key):
+        """Returns the value stored for the key.
+
+        Fresh entries are returned straight away. Expired entries younger than
+        max_stale are returned as well, and a background refresh is started for
+        them. Missing entries are loaded on the calling thread.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                age = now - loaded_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.max_stale:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    self._start_refresh(key)
+                    return value
+            self.misses += 1
+
+        value = self.loader(key)
+        if self.is_cacheable(value):
+            self.put(key, value)
+        return value
+
+    def peek(self, key):
+        """Returns the fresh value stored for the key without loading it.
+
+        Lets a caller which loads the value itself, with what it has read already,
+        use the cache like get does.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            The cached value, None if the key is missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Stores a value for the key and marks it as fresh.
+
+        Args:
+            key: The key of the entry.
+            value: The value of the entry.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def invalidate(self, key=None):
+        """Drops the entry for the key, or every entry when key is None.
+
+        Args:
+            key: The key to drop.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Returns the counters of the cache.
+
+        Returns:
+            dict: hits, stale_hits, misses, evictions and current size.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self):
+        """Drops least recently used entries above maxsize. Requires the lock."""
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _start_refresh(self, key):
+        """Starts one background refresh per key. Requires the lock."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+
+    def _refresh(self, key):
+        """Loads the key again and stores the value if it can be cached."""
+        try:
+            value = self.loader(key)
+            if self.is_cacheable(value):
+                self.put(key, value)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from cantor_application.cache import TTLCache
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+        self.loaded = threading.Event()
+
+    def __call__(self, key):
+        self.calls += 1
+        self.loaded.set()
+        return f'{key}-{self.calls}'
+
+
+def test_fresh_entry_is_served_from_cache():
+    loader = CountingLoader()
+    cache = TTLCache(loader, ttl=60)
+    assert cache.get('USD') == 'USD-1'
+    assert cache.get('USD') == 'USD-1'
+    assert loader.calls == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    loader = CountingLoader()
+    cache = TTLCache(loader, ttl=60, maxsize=2)
+    cache.get('USD')
+    cache.get('EUR')
+    cache.get('USD')
+    cache.get('GBP')
+    assert len(cache) == 2
+    assert cache.stats()['evictions'] == 1
+    cache.get('EUR')
+    assert loader.calls == 4
+
+def test_stale_entry_is_served_while_refreshing():
+    loader = CountingLoader()
+    cache = TTLCache(loader, ttl=0.01, max_stale=60)
+    cache.get('USD')
+    time.sleep(0.02)
+    loader.loaded.clear()
+    assert cache.get('USD') == 'USD-1'
+    assert loader.loaded.wait(1)
+    time.sleep(0.01)
+    cache.configure(ttl=60)
+    assert cache.get('USD') == 'USD-2'
+    assert cache.stats()['stale_hits'] == 1
+
+def test_entry_older_than_max_stale_is_loaded_again():
+    loader = CountingLoader()
+    cache = TTLCache(loader, ttl=0.01, max_stale=0)
+    cache.get('USD')
+    time.sleep(0.02)
+    assert cache.get('USD') == 'USD-2'
+    assert cache.stats()['misses'] == 2
+
+def test_not_cacheable_value_is_not_stored():
+    cache = TTLCache(lambda key: (None, None), is_cacheable=lambda rate: rate[0] is not None)
+    assert cache.get('XXX') == (None, None)
+    assert len(cache) == 0
@@ -0,0 +1,113 @@
+"""Module providing the configuration profiles of the application.
+
+This module defines the Config class, read from the environment and the
+`.env` file, and the DevelopmentConfig, TestingConfig and
+ProductionConfig profiles derived from it. create_app takes one of them,
+by name or as a class; by default the profile named by the CANTOR_CONFIG
+environment variable.
+
+"""
+from os import getenv
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _flag(name: str, default: str = '') -> bool:
+    return getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+class Config:
+    """Class holding the settings shared by every profile."""
+    SECRET_KEY = getenv('SECRET_KEY')
+    SQLALCHEMY_DATABASE_URI = getenv('SQLALCHEMY_DATABASE_URI')
+    SQLALCHEMY_TRACK_MODIFICATIONS = getenv('SQLALCHEMY_TRACK_MODIFICATIONS')
+    SQLALCHEMY_POOL_SIZE = int(getenv('SQLALCHEMY_POOL_SIZE', '10'))
+    SQLALCHEMY_MAX_OVERFLOW = int(getenv('SQLALCHEMY_MAX_OVERFLOW', '20'))
+    SQLALCHEMY_POOL_TIMEOUT = int(getenv('SQLALCHEMY_POOL_TIMEOUT', '30'))
+    SQLALCHEMY_POOL_RECYCLE = int(getenv('SQLALCHEMY_POOL_RECYCLE', '1800'))
+    SQLALCHEMY_POOL_PRE_PING = _flag('SQLALCHEMY_POOL_PRE_PING', 'true')
+    SQLITE_JOURNAL_MODE = getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+    SQLITE_MMAP_SIZE = int(getenv('SQLITE_MMAP_SIZE', '268435456'))
+    NBP_API_URL = getenv('NBP_API_URL', 'http://api.nbp.pl/api')
+    NBP_POOL_SIZE = int(getenv('NBP_POOL_SIZE', '10'))
+    RATE_CACHE_TTL = int(getenv('RATE_CACHE_TTL', '86400'))
+    RATE_CACHE_MAX_STALE = int(getenv('RATE_CACHE_MAX_STALE', '86400'))
+    RATE_CACHE_MAXSIZE = int(getenv('RATE_CACHE_MAXSIZE', '256'))
+    USER_CACHE_TTL = int(getenv('USER_CACHE_TTL', '30'))
+    PORTFOLIO_CACHE_TTL = int(getenv('PORTFOLIO_CACHE_TTL', '3600'))
+    HISTORY_PAGE_SIZE = int(getenv('HISTORY_PAGE_SIZE', '50'))
+    HISTORY_MAX_PAGE_SIZE = int(getenv('HISTORY_MAX_PAGE_SIZE', '500'))
+    HISTORY_EXPORT_BATCH_SIZE = int(getenv('HISTORY_EXPORT_BATCH_SIZE', '1000'))
+    ORDERS_MAX_LEGS = int(getenv('ORDERS_MAX_LEGS', '50'))
+    API_TOKEN_MAX_AGE = int(getenv('API_TOKEN_MAX_AGE', '86400'))
+    RATE_REFRESHER_ENABLED = _flag('RATE_REFRESHER_ENABLED')
+    RATE_REFRESH_INTERVAL = int(getenv('RATE_REFRESH_INTERVAL', '3600'))
+    HISTORY_WRITE_BEHIND = _flag('HISTORY_WRITE_BEHIND')
+    # Defaults to the 'journal' directory of the instance folder.
+    HISTORY_JOURNAL_DIR = getenv('HISTORY_JOURNAL_DIR') or None
+    HISTORY_WRITE_BATCH_SIZE = int(getenv('HISTORY_WRITE_BATCH_SIZE', '500'))
+    HISTORY_WRITE_INTERVAL = float(getenv('HISTORY_WRITE_INTERVAL', '0.5'))
+    HISTORY_WRITE_QUEUE_SIZE = int(getenv('HISTORY_WRITE_QUEUE_SIZE', '10000'))
+    PWNED_MODE = getenv('PWNED_MODE', 'api')
+    PWNED_API_URL = getenv('PWNED_API_URL', 'https://api.pwnedpasswords.com/range')
+    PWNED_TIMEOUT = float(getenv('PWNED_TIMEOUT', '10'))
+    PWNED_DATASET = getenv('PWNED_DATASET') or None
+    PWNED_CACHE_TTL = int(getenv('PWNED_CACHE_TTL', '86400'))
+    PWNED_CACHE_MAXSIZE = int(getenv('PWNED_CACHE_MAXSIZE', '1024'))
+    PASSWORD_HASH_METHOD = getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(getenv('PASSWORD_SALT_LENGTH', '16'))
+    PASSWORD_VERIFY_WORKERS = int(getenv('PASSWORD_VERIFY_WORKERS', '0'))
+    PASSWORD_VERIFY_QUEUE_SIZE = int(getenv('PASSWORD_VERIFY_QUEUE_SIZE', '64'))
+
+
+class DevelopmentConfig(Config):
+    """Profile of `flask run` on a developer's machine."""
+    DEBUG = True
+
+
+class TestingConfig(Config):
+    """Profile of the test suite: an in-memory database, no background threads and no network calls."""
+    TESTING = True
+    SECRET_KEY = 'testing'
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+    RATE_REFRESHER_ENABLED = False
+    HISTORY_WRITE_BEHIND = False
+    PWNED_MODE = 'off'
+    # A cheap hash: the suite is not a measure of password strength.
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+
+class ProductionConfig(Config):
+    """Profile of the deployed application, taken entirely from the environment."""
+
+
+config_profiles = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
+
+
+def resolve_config(config=None):
+    """Returns the config profile class for create_app.
+
+    Args:
+        config (str or type): A profile name or class, None for the profile
+            named by CANTOR_CONFIG, production by default.
+
+    Raises:
+        KeyError: The profile name is unknown.
+
+    Returns:
+        type: The profile class.
+    """
+    if config is None:
+        config = getenv('CANTOR_CONFIG', 'production')
+    if isinstance(config, str):
+        return config_profiles[config]
+    return config
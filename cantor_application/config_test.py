@@ -0,0 +1,42 @@
+import pytest
+
+from cantor_application import create_app
+from cantor_application.config import DevelopmentConfig, TestingConfig, resolve_config
+from cantor_application.services import get_services
+
+
+def test_profile_is_taken_from_the_environment(monkeypatch):
+    monkeypatch.setenv('CANTOR_CONFIG', 'development')
+    assert resolve_config() is DevelopmentConfig
+    assert resolve_config('testing') is TestingConfig
+    with pytest.raises(KeyError):
+        resolve_config('staging')
+
+def test_every_call_creates_an_independent_application():
+    first, second = create_app('testing'), create_app('testing')
+    first.config['ORDERS_MAX_LEGS'] = 1
+    assert second.config['ORDERS_MAX_LEGS'] == TestingConfig.ORDERS_MAX_LEGS
+    assert {'index', 'login.login', 'api.token'} <= set(second.view_functions)
+
+    services = get_services(first)
+    assert services is not get_services(second)
+    assert services.rate_store.app is first and get_services(second).rate_store.app is second
+    with first.app_context():
+        assert get_services() is services
+
+def test_background_threads_start_with_the_first_request(monkeypatch):
+    started = []
+
+    class RefreshingConfig(TestingConfig):
+        RATE_REFRESHER_ENABLED = True
+
+    app = create_app(RefreshingConfig)
+    services = get_services(app)
+    monkeypatch.setattr(services.rate_refresher, 'start', lambda: started.append(True))
+    assert not started
+    app.test_client().get('/login')
+    assert started == [True]
+
+    monkeypatch.setattr(type(services.rate_refresher), 'running', True)
+    monkeypatch.setattr(services, 'start', lambda: pytest.fail('started again'))
+    app.test_client().get('/login')
@@ -0,0 +1,37 @@
+import pytest
+
+from cantor_application import create_app, db
+from cantor_application.config import TestingConfig
+from cantor_application.models.user import User
+
+
+@pytest.fixture
+def trader_balance():
+    """PLN of the trader of trading_app, overridden by the modules which need another amount."""
+    return 1000
+
+
+@pytest.fixture
+def trading_app(tmp_path, trader_balance):
+    """Application on a temporary SQLite database with the user 'trader1' of id 1."""
+    class TradingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "trading.db"}'
+        SQLITE_BUSY_TIMEOUT = 30000
+        HISTORY_JOURNAL_DIR = str(tmp_path / 'journal')
+
+    app = create_app(TradingConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(name='trader1', password='-', email='trader@cantor.pl', amount_of_pln=trader_balance))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(trading_app):
+    """Test client of trading_app logged in as 'trader1'."""
+    client = trading_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,94 @@
+"""Module providing the engine settings of the application database.
+
+Server databases get a bounded connection pool whose connections are
+checked before use and recycled before the server drops them. SQLite
+has no pool to tune: every new connection is switched to the write-ahead
+log, so readers no longer block the trade that is writing, with
+`synchronous=NORMAL`, a busy timeout and a memory-mapped read path.
+
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def is_sqlite(uri: str) -> bool:
+    """Returns True if the database URI points to SQLite."""
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config) -> dict:
+    """Returns the SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Args:
+        config (Config): The application config.
+
+    Returns:
+        dict: Keyword arguments of `create_engine`.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if uri is None:
+        return {}
+    if is_sqlite(uri):
+        # Seconds the driver waits for a lock before raising "database is locked".
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000}}
+    return {
+        'pool_size': config['SQLALCHEMY_POOL_SIZE'],
+        'max_overflow': config['SQLALCHEMY_MAX_OVERFLOW'],
+        'pool_timeout': config['SQLALCHEMY_POOL_TIMEOUT'],
+        'pool_recycle': config['SQLALCHEMY_POOL_RECYCLE'],
+        'pool_pre_ping': config['SQLALCHEMY_POOL_PRE_PING'],
+    }
+
+
+class SqlitePragmas:
+    """Connect event listener applying the PRAGMA settings to new SQLite connections.
+
+    Attributes:
+        journal_mode (str): The journal mode, WAL by default.
+        synchronous (str): When SQLite waits for the disk, NORMAL by default.
+        busy_timeout (int): Milliseconds to wait for a lock held by another connection.
+        mmap_size (int): Bytes of the database file read through memory mapping.
+    """
+
+    def __init__(self, journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+                 busy_timeout: int = 5000, mmap_size: int = 268435456) -> None:
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+
+    def statements(self) -> list:
+        """Returns the PRAGMA statements run on every new connection."""
+        return [
+            f'PRAGMA journal_mode={self.journal_mode}',
+            f'PRAGMA synchronous={self.synchronous}',
+            f'PRAGMA busy_timeout={int(self.busy_timeout)}',
+            f'PRAGMA mmap_size={int(self.mmap_size)}',
+        ]
+
+    def __call__(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in self.statements():
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def init_database(app, db):
+    """Applies the SQLite PRAGMA settings to the engines of the application.
+
+    Args:
+        app (Flask): The application.
+        db (SQLAlchemy): The extension whose engines are configured.
+    """
+    pragmas = SqlitePragmas(
+        journal_mode=app.config['SQLITE_JOURNAL_MODE'],
+        synchronous=app.config['SQLITE_SYNCHRONOUS'],
+        busy_timeout=app.config['SQLITE_BUSY_TIMEOUT'],
+        mmap_size=app.config['SQLITE_MMAP_SIZE'],
+        )
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', pragmas)
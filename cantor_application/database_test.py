@@ -0,0 +1,37 @@
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from cantor_application.database import engine_options, init_database
+
+CONFIG = {
+    'SQLALCHEMY_POOL_SIZE': 5,
+    'SQLALCHEMY_MAX_OVERFLOW': 2,
+    'SQLALCHEMY_POOL_TIMEOUT': 10,
+    'SQLALCHEMY_POOL_RECYCLE': 600,
+    'SQLALCHEMY_POOL_PRE_PING': True,
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT': 2500,
+    'SQLITE_MMAP_SIZE': 1048576,
+}
+
+
+def test_server_databases_get_a_tuned_pool():
+    options = engine_options(dict(CONFIG, SQLALCHEMY_DATABASE_URI='postgresql://cantor@db/cantor'))
+    assert options == {
+        'pool_size': 5, 'max_overflow': 2, 'pool_timeout': 10, 'pool_recycle': 600, 'pool_pre_ping': True,
+    }
+
+def test_sqlite_connections_use_the_write_ahead_log(tmp_path):
+    app = Flask(__name__)
+    app.config.update(CONFIG, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "wal.db"}')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db = SQLAlchemy(app)
+    init_database(app, db)
+    with app.app_context():
+        pragmas = [
+            db.session.execute(text(f'PRAGMA {name}')).scalar()
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')
+        ]
+    assert pragmas == ['wal', 1, 2500, 1048576]
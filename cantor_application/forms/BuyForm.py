@@ -4,14 +4,16 @@ This module defines the BuyForm class, which is a FlaskForm used
 for handling the purchase form on the online cantor website. 
 It includes fields for the currency symbol and the amount of currency 
 to purchase. Additionally, it provides a custom validator to check the 
-validity of the currency symbol using the `lookup` function from the `helpers` module.
+validity of the currency symbol using the `get_quote` function from the `rates.quote` module.
+The resolved quote is kept on the form, so the view can price the order without
+asking for the exchange rate again.
 
 """
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField
 from wtforms.validators import DataRequired, NumberRange, ValidationError
 
-from cantor_application.helpers import lookup
+from cantor_application.rates.quote import get_quote
 
 class BuyForm(FlaskForm):
     """Class representing the purchase form on the online cantor website.
@@ -19,6 +21,7 @@ class BuyForm(FlaskForm):
     Attributes:
         currency (StringField): Field for entering the currency symbol.
         amount (IntegerField): Field for entering the amount of currency to purchase.
+        quote (Quote): The quote resolved while validating the currency symbol.
 
     Methods:
         symbol_validator: Custom validator to check the validity of the currency symbol.
@@ -35,11 +38,13 @@ class BuyForm(FlaskForm):
             ValidationError: If the currency symbol is invalid.
         """
         symbol = field.data
-        validator1, _ = lookup(symbol)
-        if validator1 is None:
+        quote = get_quote(symbol)
+        if quote is None:
             raise ValidationError(
                 'Wrong currency index - transaction canceled.\
                 Please check Standard ISO 4217 currency list')
+        form.quote = quote
 
+    quote = None
     currency = StringField('Currency: ', validators=[DataRequired(), symbol_validator])
     amount = IntegerField('Amount: ', validators=[DataRequired(), NumberRange(min=0, max=None)])
@@ -2,12 +2,19 @@
 
 This module defines the SellForm class, which is a FlaskForm used for handling
  the sell form on the online cantor website. It includes fields for entering 
- the currency and the amount of currency to sell.
+ the currency and the amount of currency to sell. Additionally, it provides a 
+ custom validator to check the validity of the currency symbol using the 
+ `get_quote` function from the `rates.quote` module. The resolved quote is kept 
+ on the form, so the view can price the order without asking for the exchange 
+ rate again.
 
 """
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField
-from wtforms.validators import DataRequired, NumberRange
+from wtforms.validators import DataRequired, NumberRange, ValidationError
+
+from cantor_application.helpers import current_table
+from cantor_application.rates.quote import get_quote
 
 
 class SellForm(FlaskForm):
@@ -16,7 +23,33 @@ class SellForm(FlaskForm):
     Attributes:
         currency (StringField): Field for entering the currency symbol.
         amount (IntegerField): Field for entering the amount of currency to sell.
+        quote (Quote): The quote resolved while validating the currency symbol,
+        None if the exchange rates are not available.
 
+    Methods:
+        symbol_validator: Custom validator to check the validity of the currency symbol.
     """
-    currency = StringField('Currency: ', validators=[DataRequired()])
+
+    def symbol_validator(form, field):
+        """Custom validator to check the validity of the currency symbol.
+
+        A symbol without a quote is only rejected when an exchange rate table
+        is held, so the view can tell the user that the rates are not available.
+
+        Args:
+            form: The form being validated.
+            field: The field containing the currency symbol.
+
+        Raises:
+            ValidationError: If the currency symbol is invalid.
+        """
+        quote = get_quote(field.data)
+        if quote is None and current_table() is not None:
+            raise ValidationError(
+                'Wrong currency index - transaction canceled.\
+                Please check Standard ISO 4217 currency list')
+        form.quote = quote
+
+    quote = None
+    currency = StringField('Currency: ', validators=[DataRequired(), symbol_validator])
     amount = IntegerField('Amount: ', validators=[DataRequired(), NumberRange(min=0, max=None)])
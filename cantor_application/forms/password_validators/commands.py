@@ -0,0 +1,26 @@
+"""Module providing the `flask passwords` commands.
+
+This module defines the command line group managing the local copy of
+the Pwned Passwords list used by the 'local' PWNED_MODE.
+
+"""
+import click
+from flask.cli import AppGroup
+
+from cantor_application.forms.password_validators.pwned import build_dataset
+
+passwords_cli = AppGroup('passwords', help='Manage the breached password check.')
+
+
+@passwords_cli.command('build-pwned-dataset')
+@click.argument('source', type=click.File('r', encoding='ascii'))
+@click.argument('target', type=click.Path(dir_okay=False, writable=True))
+def build_pwned_dataset(source, target):
+    """Converts the downloaded SHA-1 hash list SOURCE into the binary file TARGET.
+
+    SOURCE holds one 'HASH:COUNT' line per leaked password, sorted by hash, as
+    written by the Pwned Passwords downloader. Point PWNED_DATASET to TARGET
+    and set PWNED_MODE=local to check passwords without the range API.
+    """
+    count = build_dataset(source, target)
+    click.echo(f'Wrote {count} hashes to {target}.')
@@ -7,14 +7,18 @@ digits, special characters, and verification against the Have I Been Pwned datab
 Note:
     Before using IfPownedValidator, make sure to review and comply with 
     the Have I Been Pwned API terms of use: https://haveibeenpwned.com/API/Consuming
-    IfPownedValidator connects to the Have I Been Pwned API
-    to check if the password has been compromised.
+    IfPownedValidator checks if the password has been compromised,
+    either with the Have I Been Pwned range API or with a local copy
+    of its hash list, see the pwned module.
     Remember not to publicly share your real password, and always keep it safe.
 """
 
 from abc import ABC, abstractmethod
-from hashlib import sha1
-from requests import get
+
+from cantor_application.forms.password_validators.policy import (
+    DIGIT, LENGTH_MESSAGE, LOWER_CHAR, PWNED_MESSAGE, SPECIAL_CHAR, UPPER_CHAR
+)
+from cantor_application.services import get_services
 
 
 class Validator(ABC):
@@ -46,7 +50,7 @@ class LengthValidator(Validator):
         """
         if len(self.text) >= 8:
             return False
-        message = 'Password must contain at least 8 characters. '
+        message = LENGTH_MESSAGE.format(8)
         return message
 
 class DigitValidator(Validator):
@@ -64,12 +68,7 @@ class DigitValidator(Validator):
         Returns:
             bool: text contain digit .
         """
-        digit = sum(1 for char in self.text if char.isdigit())
-        if  digit > 0:
-            return False
-
-        message = 'Password must contain at least on digit. '
-        return message
+        return DIGIT.check(self.text)
         
 
 class SpecialCharValidator(Validator):
@@ -87,12 +86,7 @@ class SpecialCharValidator(Validator):
         Returns:
             bool: passowrd contain special character.
         """
-        special = sum(1 for char in self.text if char.isascii() and not char.isalnum())
-        if special > 0:
-            return False
-
-        message = 'Password must contain at least on special character. '
-        return message
+        return SPECIAL_CHAR.check(self.text)
 
 
 class UpperCharValidator(Validator):
@@ -110,12 +104,7 @@ class UpperCharValidator(Validator):
         Returns:
             bool: text contain uppercase character.
         """
-        capital = sum(1 for char in self.text if char.isupper())
-        if capital > 0:
-            return False
-        
-        message = 'Password must contain at least one capital letter. '
-        return message
+        return UPPER_CHAR.check(self.text)
 
 class LowerCharValidator(Validator):
     """Checking presence of at least one lowercase character in a given text."""
@@ -132,15 +121,10 @@ class LowerCharValidator(Validator):
         Returns:
             bool: text contain lwoercase character.
         """
-        lower = sum(1 for char in self.text if char.islower())
-        if lower > 0:
-            return False
-
-        message = 'Password must contain at least one lowercase letter. '
-        return message
+        return LOWER_CHAR.check(self.text)
 
 class IfPownedValidator(Validator):
-    """Connecting with pwnedpassowrds api and checking if password has leaked"""
+    """Checking if password has leaked, with cached pwnedpasswords ranges or a local list"""
     def __init__(self, password) -> None:
         self.password = password
 
@@ -154,40 +138,26 @@ class IfPownedValidator(Validator):
         Returns:
             bool: password is safe and it has not leaked.
         """
-        my_hash = sha1(self.password.encode('utf-8')).hexdigest().upper()
-        url = f'https://api.pwnedpasswords.com/range/{my_hash[:5]}'
-        response_from_api = get(url, timeout=10)
-        text = my_hash[5:]
-        for line in response_from_api.text.splitlines():
-            if text in line:
-                message = 'Password has been leaked'
-                return message
+        if get_services().pwned_passwords.is_pwned(self.password):
+            message = PWNED_MESSAGE
+            return message
 
         return False
 
 
 class PasswordValidator(Validator):
-    """ Organizing all validators in one list and giving them the password. 
-    Checking one by one if password is valid"""
-    def __init__(self, password) -> None:
+    """ Checking the password against every rule of the password policy at once.
+    The length and character rules are checked in a single pass, before the
+    leaked password check, and every violation is reported."""
+    def __init__(self, password, policy=None) -> None:
         self.password = password
-        self.validators = [
-            LengthValidator,
-            SpecialCharValidator,
-            UpperCharValidator,
-            LowerCharValidator,
-            DigitValidator,
-            IfPownedValidator
-        ]
+        self.policy = policy or get_services().password_policy
 
     def is_valid(self):
-        """Check all validator one by one.
+        """Check all rules of the policy.
 
         Returns:
-            bool: if passowrd passed all validators. 
+            str or bool: the messages of all violated rules,
+            False if passowrd passed all of them.
         """
-        for class_name in self.validators:
-            validator = class_name(self.password)
-            if validator.is_valid():
-                return(validator.is_valid())
-        return False
+        return self.policy.is_valid(self.password)
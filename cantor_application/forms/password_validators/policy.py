@@ -0,0 +1,145 @@
+"""Module providing the compiled password policy.
+
+This module defines the CharacterRule class, the rules of the
+registration form, and the PasswordPolicy class which checks all of them
+at once. A policy compiles its character rules into a table of bit masks
+for the ASCII characters, so a password is classified in a single pass
+which stops as soon as every rule is satisfied. Every violated rule is
+reported, the length and character rules run before the breached
+password check, which is skipped when they already failed, and results
+are memoized per password digest for bulk validations. A password let
+through because the breached password lookup failed is not memoized, so
+it is checked again by the next validation.
+
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+LENGTH_MESSAGE = 'Password must contain at least {} characters. '
+PWNED_MESSAGE = 'Password has been leaked'
+
+
+@dataclass(frozen=True)
+class CharacterRule:
+    """Class representing a rule requiring at least one character of a class.
+
+    Attributes:
+        message (str): The violation reported when no character matches.
+        matches (callable): Predicate telling if a character belongs to the class.
+    """
+    message: str
+    matches: object
+
+    def check(self, text: str):
+        """Checks the rule on its own.
+
+        Returns:
+            str or bool: The message if the rule is violated, otherwise False.
+        """
+        if any(self.matches(char) for char in text):
+            return False
+        return self.message
+
+
+SPECIAL_CHAR = CharacterRule(
+    'Password must contain at least on special character. ', lambda char: char.isascii() and not char.isalnum())
+UPPER_CHAR = CharacterRule('Password must contain at least one capital letter. ', str.isupper)
+LOWER_CHAR = CharacterRule('Password must contain at least one lowercase letter. ', str.islower)
+DIGIT = CharacterRule('Password must contain at least on digit. ', str.isdigit)
+
+
+class PasswordPolicy:
+    """Class checking every rule of the password policy in one call.
+
+    Attributes:
+        min_length (int): Minimal number of characters.
+        rules (tuple): The CharacterRule objects, in the order of their messages.
+        pwned (PwnedPasswords): The check against the Pwned Passwords list, None to skip it.
+        memo_size (int): Maximal number of memoized results, 0 to disable memoization.
+        memo_ttl (float): Number of seconds a result is memoized.
+
+    Methods:
+        violations: Returns the messages of every violated rule.
+        is_valid: Returns the violations as one message, like the validators.
+    """
+
+    def __init__(self, min_length: int = 8, rules=(SPECIAL_CHAR, UPPER_CHAR, LOWER_CHAR, DIGIT),
+                 pwned=None, memo_size: int = 4096, memo_ttl: float = 3600) -> None:
+        self.min_length = min_length
+        self.rules = tuple(rules)
+        self.pwned = pwned
+        self.memo_size = memo_size
+        self.memo_ttl = memo_ttl
+        self._satisfied = (1 << len(self.rules)) - 1
+        self._ascii = [self._classify(chr(code)) for code in range(128)]
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def violations(self, password: str) -> tuple:
+        """Returns the messages of every rule the password violates.
+
+        Args:
+            password (str): The password to check.
+
+        Returns:
+            tuple: The messages, empty if the password is valid.
+        """
+        if not self.memo_size:
+            return self._evaluate(password)[0]
+        key = hashlib.sha256(password.encode('utf-8')).digest()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None and now - entry[1] < self.memo_ttl:
+                self._memo.move_to_end(key)
+                return entry[0]
+        result, conclusive = self._evaluate(password)
+        if not conclusive:
+            return result
+        with self._lock:
+            self._memo[key] = (result, now)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def is_valid(self, password: str):
+        """Checks the password like the validators of the registration form.
+
+        Returns:
+            str or bool: All violations joined into one message, False if the password is valid.
+        """
+        return ''.join(self.violations(password)) or False
+
+    def _classify(self, char: str) -> int:
+        """Returns the bit mask of the rules the character satisfies."""
+        mask = 0
+        for bit, rule in enumerate(self.rules):
+            if rule.matches(char):
+                mask |= 1 << bit
+        return mask
+
+    def _evaluate(self, password: str) -> tuple:
+        """Returns the violations and False if the breached password lookup failed."""
+        messages = []
+        if len(password) < self.min_length:
+            messages.append(LENGTH_MESSAGE.format(self.min_length))
+
+        mask, satisfied, table = 0, self._satisfied, self._ascii
+        for char in password:
+            code = ord(char)
+            mask |= table[code] if code < 128 else self._classify(char)
+            if mask == satisfied:
+                break
+        messages.extend(rule.message for bit, rule in enumerate(self.rules) if not mask & 1 << bit)
+
+        # The network check only runs for passwords which pass every local rule.
+        if messages or self.pwned is None:
+            return tuple(messages), True
+        pwned = self.pwned.check(password)
+        if pwned:
+            messages.append(PWNED_MESSAGE)
+        return tuple(messages), pwned is not None
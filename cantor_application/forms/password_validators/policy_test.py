@@ -0,0 +1,67 @@
+from cantor_application.forms.password_validators.policy import (
+    DIGIT,
+    LOWER_CHAR,
+    SPECIAL_CHAR,
+    PasswordPolicy,
+)
+from cantor_application.forms.password_validators.pwned import PwnedPasswords
+
+
+def test_every_violation_is_reported_together():
+    policy = PasswordPolicy()
+    assert policy.is_valid('Secret1!x') is False
+    assert policy.violations('secret') == (
+        'Password must contain at least 8 characters. ',
+        'Password must contain at least on special character. ',
+        'Password must contain at least one capital letter. ',
+        'Password must contain at least on digit. ',
+    )
+    assert policy.is_valid('SECRET-PASSWORD') == LOWER_CHAR.message + DIGIT.message
+    assert policy.is_valid('A' * 64) == SPECIAL_CHAR.message + LOWER_CHAR.message + DIGIT.message
+    assert policy.is_valid('a' * 60 + 'B1!') is False
+
+def test_leaked_check_only_runs_for_otherwise_valid_passwords(monkeypatch):
+    checked = []
+    pwned = PwnedPasswords()
+    monkeypatch.setattr(pwned, 'check', lambda password: checked.append(password) or False)
+    policy = PasswordPolicy(pwned=pwned)
+    assert policy.is_valid('secret')
+    assert policy.is_valid('Secret1!x') is False
+    assert policy.is_valid('Secret1!x') is False
+    assert checked == ['Secret1!x']
+
+def test_password_let_through_by_a_failed_lookup_is_not_memoized(monkeypatch):
+    answers = iter([None, True])
+    pwned = PwnedPasswords()
+    monkeypatch.setattr(pwned, 'check', lambda password: next(answers))
+    policy = PasswordPolicy(pwned=pwned)
+    assert policy.is_valid('Secret1!x') is False
+    assert policy.is_valid('Secret1!x') == 'Password has been leaked'
+    assert policy.is_valid('Secret1!x') == 'Password has been leaked'
+
+def test_single_pass_classifies_characters_beyond_ascii():
+    policy = PasswordPolicy(memo_size=0)
+    assert policy.violations('żółwżółw') == (
+        'Password must contain at least on special character. ',
+        'Password must contain at least one capital letter. ',
+        'Password must contain at least on digit. ',
+    )
+    assert policy.is_valid('ŻÓŁW1!ąę') is False
+
+def test_results_are_memoized_within_size_and_ttl(monkeypatch):
+    policy = PasswordPolicy(memo_size=2, memo_ttl=60)
+    evaluated = []
+    evaluate = policy._evaluate  # pylint: disable=protected-access
+    monkeypatch.setattr(policy, '_evaluate', lambda password: evaluated.append(password) or evaluate(password))
+    for password in ['secret', 'Secret1!x', 'secret', 'SECRET', 'Secret1!x']:
+        policy.violations(password)
+    assert evaluated == ['secret', 'Secret1!x', 'SECRET', 'Secret1!x']
+
+    clock = iter([0, 30, 120])
+    monkeypatch.setattr('cantor_application.forms.password_validators.policy.time.monotonic', lambda: next(clock))
+    policy = PasswordPolicy(memo_ttl=60)
+    monkeypatch.setattr(policy, '_evaluate', lambda password: evaluated.append(password) or evaluate(password))
+    evaluated.clear()
+    for _ in range(3):
+        policy.violations('secret')
+    assert evaluated == ['secret', 'secret']
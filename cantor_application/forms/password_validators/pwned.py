@@ -0,0 +1,238 @@
+"""Module providing the breached password check of IfPownedValidator.
+
+Passwords are checked against the Pwned Passwords list by their SHA-1
+hash. In 'api' mode only the first five hex characters of the hash leave
+the process (k-anonymity): the range API answers every known hash with
+that prefix. Ranges are kept in a TTL cache with LRU eviction as sorted,
+fixed-width binary records, so repeated prefixes cost no request and a
+cached range is searched by bisection. In 'local' mode the hash is looked
+up by binary search in a memory-mapped file of sorted 20-byte digests,
+built once from the downloaded hash list with
+`flask passwords build-pwned-dataset`, and no request is sent at all.
+
+"""
+import logging
+import mmap
+import threading
+from hashlib import sha1
+
+from cantor_application.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PWNED_API_URL = 'https://api.pwnedpasswords.com/range'
+PREFIX_LENGTH = 5
+DIGEST_SIZE = 20
+# The 35 hex characters after the prefix, padded to 36 to form whole bytes.
+SUFFIX_SIZE = 18
+
+
+def _contains(records, record_size: int, key: bytes) -> bool:
+    """Returns True if the key is one of the sorted fixed-width records."""
+    low, high = 0, len(records) // record_size
+    while low < high:
+        middle = (low + high) // 2
+        if records[middle * record_size:(middle + 1) * record_size] < key:
+            low = middle + 1
+        else:
+            high = middle
+    return records[low * record_size:(low + 1) * record_size] == key
+
+
+def _suffix_key(suffix: str) -> bytes:
+    return bytes.fromhex('0' + suffix)
+
+
+class PwnedDataset:
+    """Class representing the local copy of the Pwned Passwords list.
+
+    The file holds the SHA-1 digests of the list, sorted, 20 bytes each. It is
+    mapped into memory on first use and shared by every thread.
+
+    Attributes:
+        path (str): The path of the dataset file.
+
+    Methods:
+        contains: Checks if a digest is in the list.
+        close: Unmaps the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._map = None
+        self._lock = threading.Lock()
+
+    def contains(self, digest: bytes) -> bool:
+        """Checks if the SHA-1 digest is in the list.
+
+        Args:
+            digest (bytes): The 20-byte SHA-1 digest of a password.
+
+        Returns:
+            bool: True if the password has been leaked.
+        """
+        with self._lock:
+            if self._map is None:
+                with open(self.path, 'rb') as dataset:
+                    self._map = mmap.mmap(dataset.fileno(), 0, access=mmap.ACCESS_READ)
+        return _contains(self._map, DIGEST_SIZE, digest)
+
+    def close(self):
+        """Unmaps the file."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+def build_dataset(lines, path: str) -> int:
+    """Writes a dataset file from the lines of the downloaded Pwned Passwords list.
+
+    Args:
+        lines (iterable): Lines of 'HASH:COUNT', sorted by hash, as written by the
+            official downloader in SHA-1 mode.
+        path (str): The path of the dataset file.
+
+    Raises:
+        ValueError: A line is malformed or the lines are not sorted.
+
+    Returns:
+        int: The number of written digests.
+    """
+    written, previous = 0, b''
+    with open(path, 'wb') as dataset:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            digest = bytes.fromhex(line.split(':', 1)[0])
+            if len(digest) != DIGEST_SIZE:
+                raise ValueError(f'Not a SHA-1 hash: {line}')
+            if digest <= previous:
+                raise ValueError(f'The hash list is not sorted at {line}')
+            dataset.write(digest)
+            previous = digest
+            written += 1
+    return written
+
+
+class PwnedPasswords:
+    """Class checking passwords against the Pwned Passwords list.
+
+    Attributes:
+        mode (str): 'api', 'local' or 'off'.
+        api_url (str): The address of the range API.
+        timeout (float): Timeout of a range request in seconds.
+        dataset (PwnedDataset): The local list used in 'local' mode.
+        ranges (TTLCache): Hash suffixes of the recently requested prefixes.
+        failures (int): Number of range requests which failed.
+
+    Methods:
+        configure: Changes the mode and the settings of the check.
+        is_pwned: Checks if a password has been leaked.
+        check: Checks if a password has been leaked, None if the lookup failed.
+    """
+
+    def __init__(self, mode: str = 'api', api_url: str = PWNED_API_URL, timeout: float = 10) -> None:
+        self.mode = mode
+        self.api_url = api_url
+        self.timeout = timeout
+        self.dataset = None
+        self.failures = 0
+        self.ranges = TTLCache(self._load_range, ttl=86400, max_stale=0, maxsize=1024)
+        self._session = None
+        self._lock = threading.Lock()
+
+    def configure(self, mode: str = None, api_url: str = None, timeout: float = None,
+                  dataset_path: str = None, ttl: float = None, maxsize: int = None):
+        """Changes the mode and the settings of the check.
+
+        Args:
+            mode (str): 'api', 'local' or 'off'.
+            api_url (str): The address of the range API.
+            timeout (float): Timeout of a range request in seconds.
+            dataset_path (str): The dataset file of 'local' mode.
+            ttl (float): Number of seconds a range is cached.
+            maxsize (int): Maximal number of cached ranges.
+
+        Raises:
+            ValueError: The mode is unknown or 'local' mode has no dataset.
+        """
+        mode = mode or self.mode
+        if mode not in ('api', 'local', 'off'):
+            raise ValueError(f'Unknown Pwned Passwords mode: {mode}')
+        if dataset_path:
+            if self.dataset is not None:
+                self.dataset.close()
+            self.dataset = PwnedDataset(dataset_path)
+        if mode == 'local' and self.dataset is None:
+            raise ValueError("The 'local' Pwned Passwords mode needs a dataset file")
+        self.mode = mode
+        self.api_url = api_url or self.api_url
+        self.timeout = timeout or self.timeout
+        self.ranges.configure(ttl=ttl, maxsize=maxsize)
+
+    def is_pwned(self, password: str) -> bool:
+        """Checks if the password is on the Pwned Passwords list.
+
+        When the range API does not answer, the password is let through and
+        the failure is logged.
+
+        Args:
+            password (str): The password to check.
+
+        Returns:
+            bool: True if the password has been leaked.
+        """
+        return bool(self.check(password))
+
+    def check(self, password: str):
+        """Checks if the password is on the Pwned Passwords list, telling a failed lookup apart.
+
+        Args:
+            password (str): The password to check.
+
+        Returns:
+            bool or None: True if the password has been leaked, None if the range API did not answer.
+        """
+        if self.mode == 'off':
+            return False
+        digest = sha1(password.encode('utf-8')).digest()
+        if self.mode == 'local':
+            return self.dataset.contains(digest)
+
+        hexdigest = digest.hex().upper()
+        suffixes = self.ranges.get(hexdigest[:PREFIX_LENGTH])
+        if suffixes is None:
+            return None
+        return _contains(suffixes, SUFFIX_SIZE, _suffix_key(hexdigest[PREFIX_LENGTH:]))
+
+    def _load_range(self, prefix: str):
+        """Returns the sorted suffix records of the prefix, None if the request failed."""
+        try:
+            text = self._fetch_range(prefix)
+        except OSError:
+            # requests.exceptions.RequestException is an OSError.
+            with self._lock:
+                self.failures += 1
+            logger.warning('Pwned Passwords range %s could not be loaded', prefix, exc_info=True)
+            return None
+        keys = []
+        for line in text.splitlines():
+            suffix, _, count = line.strip().partition(':')
+            # Padding entries of the Add-Padding header have a count of 0.
+            if len(suffix) == DIGEST_SIZE * 2 - PREFIX_LENGTH and count.strip() not in ('', '0'):
+                keys.append(_suffix_key(suffix))
+        return b''.join(sorted(keys))
+
+    def _fetch_range(self, prefix: str) -> str:
+        with self._lock:
+            if self._session is None:
+                # requests is imported by the first check, not by the application start.
+                from requests import Session  # pylint: disable=import-outside-toplevel
+                self._session = Session()
+                self._session.headers['Add-Padding'] = 'true'
+            session = self._session
+        with session.get(f'{self.api_url.rstrip("/")}/{prefix}', timeout=self.timeout) as response:
+            response.raise_for_status()
+            return response.text
@@ -0,0 +1,68 @@
+from hashlib import sha1
+
+import pytest
+
+from cantor_application.forms.password_validators.password_validators import PasswordValidator
+from cantor_application.forms.password_validators.policy import PasswordPolicy
+from cantor_application.forms.password_validators.pwned import PwnedPasswords, build_dataset
+
+LEAKED = ['password1', 'Qwerty123!', 'letmein']
+
+
+def hexdigest(password):
+    return sha1(password.encode('utf-8')).hexdigest().upper()
+
+
+@pytest.fixture
+def pwned(monkeypatch):
+    checker = PwnedPasswords()
+    fetched = []
+
+    def fetch_range(prefix):
+        fetched.append(prefix)
+        lines = [f'{hexdigest(password)[5:]}:{len(password)}' for password in LEAKED
+                 if hexdigest(password).startswith(prefix)]
+        # A padding entry, which is not a leaked password.
+        lines.append(f'{hexdigest("Unique-Pa55!")[5:]}:0')
+        return '\r\n'.join(lines)
+
+    monkeypatch.setattr(checker, '_fetch_range', fetch_range)
+    checker.fetched = fetched
+    return checker
+
+
+def test_ranges_are_requested_once_per_prefix(pwned):
+    assert pwned.is_pwned('password1')
+    assert pwned.is_pwned('password1')
+    assert not pwned.is_pwned('Unique-Pa55!')
+    assert pwned.fetched == [hexdigest('password1')[:5], hexdigest('Unique-Pa55!')[:5]]
+
+def test_failed_ranges_let_the_password_through_and_are_not_cached(pwned, monkeypatch):
+    def unavailable(prefix):
+        raise ConnectionError(prefix)
+
+    monkeypatch.setattr(pwned, '_fetch_range', unavailable)
+    assert not pwned.is_pwned('password1')
+    assert pwned.check('password1') is None
+    assert pwned.failures == 2
+    assert len(pwned.ranges) == 0
+
+def test_local_dataset_is_searched_without_requests(tmp_path, pwned):
+    lines = sorted(f'{hexdigest(password)}:1\n' for password in LEAKED)
+    path = str(tmp_path / 'pwned.bin')
+    assert build_dataset(lines, path) == len(LEAKED)
+    with pytest.raises(ValueError):
+        build_dataset(reversed(lines), str(tmp_path / 'unsorted.bin'))
+
+    pwned.configure(mode='local', dataset_path=path)
+    assert all(pwned.is_pwned(password) for password in LEAKED)
+    assert not pwned.is_pwned('Unique-Pa55!')
+    assert pwned.fetched == []
+    pwned.dataset.close()
+
+def test_each_validator_runs_once(monkeypatch):
+    calls = []
+    pwned = PwnedPasswords()
+    monkeypatch.setattr(pwned, 'check', lambda password: calls.append(password) or True)
+    assert PasswordValidator('Secret1!x', PasswordPolicy(pwned=pwned)).is_valid() == 'Password has been leaked'
+    assert calls == ['Secret1!x']
@@ -11,6 +11,23 @@ from wtforms import StringField, PasswordField, EmailField
 from wtforms.validators import DataRequired, ValidationError, Email
 from .password_validators.password_validators import PasswordValidator
 
+
+def username_error(username: str):
+    """Checks the rules of a username.
+
+    Args:
+        username (str): The username to check.
+
+    Returns:
+        str or None: The violated rule, None if the username is valid.
+    """
+    if len(username) < 6:
+        return 'Username must be at least 6 characters long'
+    if not username.isalnum():
+        return 'Username may only contain letters and numbers'
+    return None
+
+
 class RegistrationForm(FlaskForm):
     """Class representing the user registration form on the online cantor website.
 
@@ -34,11 +51,9 @@ class RegistrationForm(FlaskForm):
         Raises:
             ValidationError: If the username is not valid.
         """
-        username = field.data
-        if len(username) < 6:
-            raise ValidationError(('Username must be at least 6 characters long'))
-        if not username.isalnum():
-            raise ValidationError(('Username may only contain letters and numbers'))
+        message = username_error(field.data)
+        if message:
+            raise ValidationError(message)
 
     def my_password_validator(form, field):
         """Custom validator for the password field.
@@ -51,9 +66,9 @@ class RegistrationForm(FlaskForm):
             ValidationError: If the password is not valid.
         """
         password_to_check = field.data
-        password = PasswordValidator(password_to_check)
-        if password.is_valid():
-            raise ValidationError((password.is_valid()))
+        message = PasswordValidator(password_to_check).is_valid()
+        if message:
+            raise ValidationError(message)
         
 
     name = StringField('Enter you name: ', validators=[DataRequired(), my_username_validator])
@@ -0,0 +1,159 @@
+"""Module providing the password hashing policy.
+
+This module defines the PasswordHasher class, which hashes passwords with
+a configurable werkzeug method, that is the algorithm and its cost, and
+verifies them. A stored hash made with other parameters than the
+configured ones is reported by needs_rehash, so it can be replaced on the
+next successful login. Verification may run in a bounded pool of threads:
+hashlib releases the GIL while it hashes, so the pool caps the cores a
+burst of logins can take, and logins beyond its queue are refused at once
+instead of delaying every other request.
+
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt'
+# The parameters werkzeug fills in, in the order of the method string.
+METHOD_DEFAULTS = {
+    'scrypt': (str(2 ** 15), '8', '1'),
+    'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+
+
+class HasherBusy(RuntimeError):
+    """Raised when every thread and queue slot of the verification pool is taken."""
+
+
+def normalize_method(method: str) -> str:
+    """Returns the method with every parameter, as werkzeug writes it in a hash.
+
+    Args:
+        method (str): A werkzeug method, e.g. 'scrypt' or 'pbkdf2:sha256:600000'.
+
+    Raises:
+        ValueError: The algorithm is not supported or has too many parameters.
+
+    Returns:
+        str: The method, e.g. 'scrypt:32768:8:1'.
+    """
+    algorithm, *parameters = method.split(':')
+    defaults = METHOD_DEFAULTS.get(algorithm)
+    if defaults is None or len(parameters) > len(defaults):
+        raise ValueError(f'Unsupported password hash method: {method}')
+    return ':'.join([algorithm, *parameters, *defaults[len(parameters):]])
+
+
+class PasswordHasher:
+    """Class hashing and verifying passwords with the configured method.
+
+    Attributes:
+        method (str): The werkzeug method of new hashes, with every parameter.
+        salt_length (int): Number of characters of the salt of new hashes.
+        workers (int): Threads verifying passwords, 0 to verify on the calling thread.
+        queue_size (int): Verifications which may wait for a thread before new ones are refused.
+
+    Methods:
+        configure: Changes the method and the verification pool.
+        hash: Hashes a password with the configured method.
+        verify: Checks a password against a stored hash.
+        needs_rehash: Checks if a stored hash was made with other parameters.
+    """
+
+    def __init__(self, method: str = DEFAULT_METHOD, salt_length: int = 16,
+                 workers: int = 0, queue_size: int = 64) -> None:
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.workers = workers
+        self.queue_size = queue_size
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def configure(self, method: str = None, salt_length: int = None, workers: int = None,
+                  queue_size: int = None):
+        """Changes the method of new hashes and the verification pool.
+
+        Args:
+            method (str): A werkzeug method, e.g. 'scrypt:32768:8:1'.
+            salt_length (int): Number of characters of the salt.
+            workers (int): Threads verifying passwords, 0 to verify on the calling thread.
+            queue_size (int): Verifications which may wait for a thread.
+
+        Raises:
+            ValueError: The method is not supported.
+        """
+        with self._lock:
+            if method:
+                self.method = normalize_method(method)
+            self.salt_length = salt_length or self.salt_length
+            if workers is not None:
+                self.workers = workers
+            if queue_size is not None:
+                self.queue_size = queue_size
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+    def hash(self, password: str) -> str:
+        """Hashes the password with the configured method.
+
+        Args:
+            password (str): The password to hash.
+
+        Returns:
+            str: The hash, prefixed with its method and salt.
+        """
+        return generate_password_hash(password, self.method, self.salt_length)
+
+    def verify(self, stored: str, password: str) -> bool:
+        """Checks the password against a stored hash of any supported method.
+
+        Args:
+            stored (str): The stored hash.
+            password (str): The password to check.
+
+        Raises:
+            HasherBusy: The verification pool and its queue are full.
+
+        Returns:
+            bool: True if the password matches.
+        """
+        if not self.workers:
+            return check_password_hash(stored, password)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy('Too many passwords are being verified')
+        try:
+            return self._pool().submit(check_password_hash, stored, password).result()
+        finally:
+            slots.release()
+
+    def needs_rehash(self, stored: str) -> bool:
+        """Checks if a stored hash was made with other parameters than the configured ones.
+
+        Args:
+            stored (str): The stored hash.
+
+        Returns:
+            bool: True if the hash should be replaced by a new one.
+        """
+        method, _, rest = stored.partition('$')
+        salt = rest.partition('$')[0]
+        try:
+            return normalize_method(method) != self.method or len(salt) != self.salt_length
+        except ValueError:
+            return True
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            # Threads do not survive a fork, so every worker process starts its own pool.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+                self._pid = os.getpid()
+            return self._executor
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from cantor_application import create_app, db, hashing
+from cantor_application.hashing import HasherBusy, PasswordHasher, normalize_method
+from cantor_application.models.user import User, authenticate
+from cantor_application.services import get_services
+
+app = create_app('testing')
+
+
+def test_methods_are_compared_with_werkzeug_defaults():
+    assert normalize_method('scrypt') == 'scrypt:32768:8:1'
+    assert normalize_method('pbkdf2:sha512') == f'pbkdf2:sha512:{hashing.DEFAULT_PBKDF2_ITERATIONS}'
+    with pytest.raises(ValueError):
+        normalize_method('md5')
+
+    hasher = PasswordHasher('pbkdf2:sha256:1000')
+    assert hasher.verify(hasher.hash('Secret1!x'), 'Secret1!x')
+    assert not hasher.needs_rehash(hasher.hash('Secret1!x'))
+    assert hasher.needs_rehash(generate_password_hash('Secret1!x', 'pbkdf2:sha256:500'))
+    assert hasher.needs_rehash(generate_password_hash('Secret1!x', 'pbkdf2:sha256:1000', salt_length=8))
+    assert hasher.needs_rehash('plain text')
+
+
+def test_outdated_hashes_are_replaced_on_login():
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(name='client1', password=generate_password_hash('Secret1!x', 'pbkdf2:sha256:500'),
+                            email='client@cantor.pl', amount_of_pln=100))
+        db.session.commit()
+
+        assert authenticate('client1', 'wrong') is None
+        assert db.session.get(User, 1).password.startswith('pbkdf2:sha256:500$')
+        assert authenticate('client1', 'Secret1!x').name == 'client1'
+        db.session.expire_all()
+        stored = db.session.get(User, 1).password
+        assert stored.startswith(f'{get_services().password_hasher.method}$')
+        assert authenticate('client1', 'Secret1!x') is not None
+        assert db.session.get(User, 1).password == stored
+        db.drop_all()
+
+
+def test_verifications_beyond_the_queue_are_refused(monkeypatch):
+    release, started = threading.Event(), threading.Event()
+
+    def slow_check(stored, password):
+        started.set()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(hashing, 'check_password_hash', slow_check)
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, queue_size=0)
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(hasher.verify('stored', 'password')))
+    waiting.start()
+    started.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.verify('stored', 'password')
+    release.set()
+    waiting.join()
+    assert results == [True]
+    assert hasher.verify('stored', 'password')
@@ -1,9 +1,13 @@
-from requests import get
-import requests
+from cantor_application.services import get_services
 
-def lookup(symbol: str):
-    """ This function queries the NBP (National Bank of Poland) Web API to retrieve the
-        exchange rate for the specified currency symbol.
+
+def load_rate(services, symbol: str):
+    """ This function answers the exchange rate for the specified currency symbol
+        from NBP (National Bank of Poland) table A, for the rate cache of the
+        services. The whole table is taken from the database when it was fetched
+        recently, otherwise it is downloaded in one request, and every rate of it
+        is put into the rate cache, so the other currencies do not need a request
+        of their own.
 
         Returns:
             tuple: when symbol does not exist in API.
@@ -11,22 +15,66 @@ def lookup(symbol: str):
                 - If the request is successful, returns a tuple
                   with the currency exchange rate (float) and the name of the currency (str)
         """
+    loader, rate_cache = services.rate_table_loader, services.rate_cache
+    table = loader.fresh_table(rate_cache.ttl) or loader.load()
+    if table is None:
+        return None, None
+    for entry in table:
+        rate_cache.put(entry.symbol, (entry.mid, entry.name))
 
-    # NBP Web API
-    url = f'http://api.nbp.pl/api/exchangerates/rates/A/{symbol}/'
+    entry = table.get(symbol)
+    if entry is None:
+        return None, None
+    return entry.mid, entry.name
 
-    try:
-        with get(url, timeout=10) as content:
-            content.raise_for_status()
 
-            data = content.json()
+def current_table():
+    """ This function returns the exchange rate table the current application
+        holds in memory, the snapshot of the background refresher or the table
+        loaded last, however old it is, without any I/O.
 
-            currency = data['rates'][0]['mid']
-            currency_name = data['currency']
+        Returns:
+            RateTable or None: The table, None if no table was loaded yet.
+        """
+    services = get_services()
+    return services.rate_refresher.snapshot or services.rate_table_loader.table
 
-            return currency, currency_name
-    except (
-        ValueError, KeyError, IndexError,
-        requests.exceptions.RequestException, requests.exceptions.HTTPError
-        ):
-        return None, None
+
+def lookup(symbol: str):
+    """ This function returns the exchange rate for the specified currency symbol.
+        When the background refresher runs, the rate is read from its snapshot
+        without locks or I/O. Otherwise it is answered from the rate cache of the
+        application, querying the NBP Web API only when the symbol is not cached yet.
+
+        Returns:
+            tuple: when symbol does not exist in API.
+                - If the symbol does not exist in the API, returns (None, None).
+                - If the request is successful, returns a tuple
+                  with the currency exchange rate (float) and the name of the currency (str)
+        """
+    services = get_services()
+    snapshot = services.rate_refresher.snapshot
+    if snapshot is not None:
+        entry = snapshot.get(symbol)
+        if entry is None:
+            return None, None
+        return entry.mid, entry.name
+
+    return services.rate_cache.get(symbol.upper())
+
+
+def rate_snapshot():
+    """ This function returns one consistent exchange rate table, used to price
+        several currencies at the same rates. The snapshot of the background
+        refresher is used when it runs, otherwise the table loaded recently
+        enough, or a freshly downloaded one.
+
+        Returns:
+            RateTable or None: The table, None if the NBP Web API did not answer.
+        """
+    services = get_services()
+    return (
+        services.rate_refresher.snapshot
+        or services.rate_table_loader.fresh_table(services.rate_cache.ttl)
+        or services.rate_table_loader.load()
+    )
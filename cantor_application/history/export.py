@@ -0,0 +1,70 @@
+"""Module providing streaming exports of the transaction history.
+
+This module defines generators turning a History query into CSV or
+NDJSON text. Rows are fetched from a server-side cursor in batches of
+`yield_per` and written out one at a time, so memory stays constant no
+matter how many transactions the user has.
+
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+from cantor_application.models.history import History
+
+COLUMNS = (
+    'currency_symbol',
+    'currency_name',
+    'currency_amount',
+    'currency_price',
+    'date_of_action',
+)
+
+
+def _records(query, batch_size: int):
+    """Yields History rows of the query, fetched in batches from a server-side cursor."""
+    yield from query.order_by(History.date_of_action, History.id).yield_per(batch_size)
+
+
+def record_values(record: History) -> dict:
+    values = {column: getattr(record, column) for column in COLUMNS}
+    if isinstance(values['currency_price'], Decimal):
+        values['currency_price'] = float(values['currency_price'])
+    values['date_of_action'] = record.date_of_action.isoformat() if record.date_of_action else None
+    return values
+
+
+def export_csv(query, batch_size: int = 1000):
+    """Yields the history as CSV lines, starting with a header.
+
+    Args:
+        query: The History query to export.
+        batch_size (int): Number of rows fetched from the database at once.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for record in _records(query, batch_size):
+        writer.writerow(record_values(record))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_ndjson(query, batch_size: int = 1000):
+    """Yields the history as newline delimited JSON, one object per line.
+
+    Args:
+        query: The History query to export.
+        batch_size (int): Number of rows fetched from the database at once.
+    """
+    for record in _records(query, batch_size):
+        yield json.dumps(record_values(record), ensure_ascii=False) + '\n'
+
+
+EXPORTS = {
+    'csv': (export_csv, 'text/csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
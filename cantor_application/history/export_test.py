@@ -0,0 +1,47 @@
+import datetime
+import json
+
+from cantor_application.history.export import export_csv, export_ndjson
+from cantor_application.models.history import History
+
+
+class FakeQuery:
+    def __init__(self, records):
+        self.records = records
+        self.batch_size = None
+
+    def order_by(self, *columns):
+        return self
+
+    def yield_per(self, batch_size):
+        self.batch_size = batch_size
+        return iter(self.records)
+
+
+def records():
+    return [
+        History(currency_symbol='usd', currency_name='dolar amerykański', currency_amount=10,
+                currency_price=3.9821, date_of_action=datetime.datetime(2024, 3, 5, 12, 0)),
+        History(currency_symbol='eur', currency_name='euro, "wspólna"', currency_amount=-2,
+                currency_price=4.3215, date_of_action=datetime.datetime(2024, 3, 6, 9, 30)),
+    ]
+
+
+def test_csv_export_is_streamed_row_by_row():
+    query = FakeQuery(records())
+    chunks = list(export_csv(query, batch_size=500))
+    assert query.batch_size == 500
+    assert chunks[0].startswith('currency_symbol,currency_name,currency_amount')
+    assert len(chunks) == 3
+    assert ''.join(chunks).splitlines()[2] == 'eur,"euro, ""wspólna""",-2,4.3215,2024-03-06T09:30:00'
+
+def test_ndjson_export_has_one_object_per_line():
+    lines = list(export_ndjson(FakeQuery(records())))
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {
+        'currency_symbol': 'usd',
+        'currency_name': 'dolar amerykański',
+        'currency_amount': 10,
+        'currency_price': 3.9821,
+        'date_of_action': '2024-03-05T12:00:00',
+    }
@@ -0,0 +1,147 @@
+"""Module providing keyset pagination of the transaction history.
+
+This module defines the HistoryFilter and HistoryPage classes and the
+history_page function, which reads one page of a user's History rows,
+newest first. Pages are addressed with a (date_of_action, id) cursor
+instead of an offset, so with the (user_id, date_of_action) index every
+page costs the same no matter how deep in the history it is.
+
+"""
+import datetime
+from dataclasses import dataclass
+
+from sqlalchemy import and_, or_
+
+from cantor_application.models.history import History
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor or filter cannot be parsed."""
+
+
+def encode_cursor(record: History) -> str:
+    """Returns the cursor pointing right after the given record."""
+    return f'{record.date_of_action.isoformat()}_{record.id}'
+
+
+def decode_cursor(cursor: str):
+    """Returns the (date_of_action, id) pair of the cursor.
+
+    Raises:
+        InvalidCursor: The cursor is malformed.
+    """
+    try:
+        date_of_action, record_id = cursor.rsplit('_', 1)
+        return datetime.datetime.fromisoformat(date_of_action), int(record_id)
+    except ValueError as error:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from error
+
+
+def parse_date(value: str):
+    """Returns the date of an ISO formatted string, None for an empty value.
+
+    Raises:
+        InvalidCursor: The date is malformed.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError as error:
+        raise InvalidCursor(f'Invalid date: {value}') from error
+
+
+@dataclass(frozen=True)
+class HistoryFilter:
+    """Class representing the optional filters of the transaction history.
+
+    Attributes:
+        symbol (str): Only transactions of this currency, in any case.
+        date_from (date): Only transactions made on this day or later.
+        date_to (date): Only transactions made on this day or earlier.
+    """
+    symbol: str = None
+    date_from: datetime.date = None
+    date_to: datetime.date = None
+
+    @classmethod
+    def from_args(cls, args) -> 'HistoryFilter':
+        """Builds the filter from request arguments.
+
+        Raises:
+            InvalidCursor: A date is malformed.
+        """
+        return cls(
+            symbol=args.get('symbol') or None,
+            date_from=parse_date(args.get('date_from')),
+            date_to=parse_date(args.get('date_to')))
+
+    def apply(self, query):
+        """Returns the query restricted to the filtered transactions."""
+        if self.symbol:
+            query = query.filter(History.currency_symbol == self.symbol.lower())
+        if self.date_from:
+            query = query.filter(
+                History.date_of_action >= datetime.datetime.combine(self.date_from, datetime.time.min))
+        if self.date_to:
+            # Not the start of the next day, which does not exist after 9999-12-31.
+            query = query.filter(
+                History.date_of_action <= datetime.datetime.combine(self.date_to, datetime.time.max))
+        return query
+
+    def as_args(self) -> dict:
+        """Returns the filter as request arguments, skipping empty ones."""
+        args = {
+            'symbol': self.symbol,
+            'date_from': self.date_from.isoformat() if self.date_from else None,
+            'date_to': self.date_to.isoformat() if self.date_to else None,
+        }
+        return {name: value for name, value in args.items() if value}
+
+
+@dataclass(frozen=True)
+class HistoryPage:
+    """Class representing one page of the transaction history.
+
+    Attributes:
+        records (list): The History rows of the page, newest first.
+        next_cursor (str): The cursor of the following page, None on the last page.
+    """
+    records: list
+    next_cursor: str = None
+
+
+def history_query(user_id: int, history_filter: HistoryFilter = HistoryFilter()):
+    """Returns the query of a user's filtered history, newest first."""
+    query = History.query.filter(History.user_id == user_id)
+    return history_filter.apply(query).order_by(History.date_of_action.desc(), History.id.desc())
+
+
+def history_page(user_id: int, page_size: int, cursor: str = None,
+                 history_filter: HistoryFilter = HistoryFilter()) -> HistoryPage:
+    """Reads one page of a user's transaction history.
+
+    Args:
+        user_id (int): The ID of the user.
+        page_size (int): The number of records on the page.
+        cursor (str): The cursor returned with the previous page, None for the first page.
+        history_filter (HistoryFilter): The filters of the history.
+
+    Raises:
+        InvalidCursor: The cursor is malformed.
+
+    Returns:
+        HistoryPage: The records of the page and the cursor of the next one.
+    """
+    query = history_query(user_id, history_filter)
+    if cursor:
+        date_of_action, record_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            History.date_of_action < date_of_action,
+            and_(History.date_of_action == date_of_action, History.id < record_id)))
+
+    records = query.limit(page_size + 1).all()
+    if len(records) > page_size:
+        records = records[:page_size]
+        return HistoryPage(records, encode_cursor(records[-1]))
+    return HistoryPage(records)
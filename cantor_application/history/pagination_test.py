@@ -0,0 +1,61 @@
+import datetime
+
+import pytest
+
+from cantor_application import db
+from cantor_application.api.auth import issue_token
+from cantor_application.history.pagination import HistoryFilter, InvalidCursor, history_page
+from cantor_application.models.history import History
+from cantor_application.models.user import User
+
+MORNING = datetime.datetime(2024, 3, 5, 9, 0)
+
+
+@pytest.fixture
+def history_app(trading_app):
+    with trading_app.app_context():
+        # Three transactions share each minute, so ties are broken by id.
+        db.session.add_all(
+            History(currency_symbol='usd' if number % 2 else 'eur', currency_name='-', currency_amount=number,
+                    currency_price=4.0, date_of_action=MORNING + datetime.timedelta(days=number // 3),
+                    user_id=1)
+            for number in range(9))
+        db.session.commit()
+    return trading_app
+
+
+def traverse(page_size, history_filter=HistoryFilter()):
+    pages, cursor = [], None
+    while True:
+        page = history_page(1, page_size, cursor, history_filter)
+        pages.append([record.currency_amount for record in page.records])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_the_history_newest_first(history_app):
+    with history_app.app_context():
+        assert traverse(4) == [[8, 7, 6, 5], [4, 3, 2, 1], [0]]
+        assert traverse(3) == [[8, 7, 6], [5, 4, 3], [2, 1, 0]]
+        assert traverse(20) == [list(range(8, -1, -1))]
+
+def test_filters_restrict_every_page(history_app):
+    with history_app.app_context():
+        assert traverse(2, HistoryFilter(symbol='USD')) == [[7, 5], [3, 1]]
+        day = MORNING.date() + datetime.timedelta(days=1)
+        assert traverse(2, HistoryFilter(date_from=day, date_to=day)) == [[5, 4], [3]]
+        assert traverse(5, HistoryFilter(date_from=day, date_to=datetime.date.max)) == [[8, 7, 6, 5, 4], [3]]
+        assert traverse(5, HistoryFilter(date_to=MORNING.date() - datetime.timedelta(days=1))) == [[]]
+
+def test_malformed_cursors_and_dates_are_refused(history_app, client):
+    with history_app.app_context():
+        with pytest.raises(InvalidCursor):
+            history_page(1, 2, 'yesterday_1')
+        headers = {'Authorization': f'Bearer {issue_token(db.session.get(User, 1))}'}
+
+    assert client.get('/api/v1/history?after=garbage', headers=headers).status_code == 400
+    assert client.get('/api/v1/history?date_to=31.12.9999', headers=headers).status_code == 400
+    response = client.get('/api/v1/history?date_to=9999-12-31&page_size=2', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['next_cursor'] is not None
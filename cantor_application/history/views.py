@@ -1,6 +1,9 @@
-from flask import Blueprint, render_template,  session
-from flask_login import login_required
-from cantor_application.login.views import load_user
+from flask import (
+    Blueprint, render_template, request, abort, current_app, Response, stream_with_context
+)
+from flask_login import login_required, current_user
+from cantor_application.history.export import EXPORTS
+from cantor_application.history.pagination import HistoryFilter, InvalidCursor, history_page
 from cantor_application.models.history import History
 
 history_blueprint = Blueprint('history',__name__, template_folder='templates')
@@ -10,13 +13,68 @@ history_blueprint = Blueprint('history',__name__, template_folder='templates')
 @login_required
 def history():
     """
-    This route retrieves all transaction history records associated with the logged-in user
-    and renders the 'history.html' template, passing the retrieved history records to the template.
+    This route retrieves one page of the transaction history records associated with
+    the logged-in user, newest first, and renders the 'history.html' template.
+
+    Query Parameters:
+    - after: The cursor of the page, returned as 'next_cursor' with the previous page.
+    - page_size: The number of records on the page, limited by HISTORY_MAX_PAGE_SIZE.
+    - symbol: Only transactions of this currency.
+    - date_from, date_to: Only transactions made between these days (YYYY-MM-DD).
 
     Returns:
     str: Rendered HTML content of the 'history.html' template, displaying the transaction history.
     """
-    user = load_user(session.get('user_id'))
-    total_history = History.query.filter_by(user_id=user.id).all()
+    user = current_user
+
+    page_size = request.args.get('page_size', current_app.config['HISTORY_PAGE_SIZE'], type=int)
+    page_size = max(1, min(page_size, current_app.config['HISTORY_MAX_PAGE_SIZE']))
+    try:
+        history_filter = HistoryFilter.from_args(request.args)
+        page = history_page(user.id, page_size, request.args.get('after'), history_filter)
+    except InvalidCursor as error:
+        abort(400, str(error))
+
+    return render_template(
+        'history.html',
+        history=page.records,
+        next_cursor=page.next_cursor,
+        page_size=page_size,
+        history_filter=history_filter
+        )
+
+
+@history_blueprint.route('/history/export', methods = ['GET'])
+@login_required
+def export():
+    """
+    This route streams the whole transaction history of the logged-in user, oldest first,
+    as a CSV or NDJSON file. Rows are read in batches of HISTORY_EXPORT_BATCH_SIZE from
+    a server-side cursor and written out while they are read.
+
+    Query Parameters:
+    - format: 'csv' (default) or 'ndjson'.
+    - symbol: Only transactions of this currency.
+    - date_from, date_to: Only transactions made between these days (YYYY-MM-DD).
+
+    Returns:
+    Response: The streamed file, downloaded as 'history.csv' or 'history.ndjson'.
+    """
+    user = current_user
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORTS:
+        abort(400, f'Unknown export format: {export_format}')
+    try:
+        history_filter = HistoryFilter.from_args(request.args)
+    except InvalidCursor as error:
+        abort(400, str(error))
 
-    return render_template('history.html', history=total_history)
+    exporter, mimetype = EXPORTS[export_format]
+    query = history_filter.apply(History.query.filter(History.user_id == user.id))
+    rows = exporter(query, current_app.config['HISTORY_EXPORT_BATCH_SIZE'])
+    return Response(
+        stream_with_context(rows),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=history.{export_format}'}
+        )
@@ -0,0 +1,394 @@
+"""Module providing the write-behind writer of the transaction history.
+
+This module defines the HistoryWriter class. In write-behind mode the
+History rows of a trade are not inserted by the trade's transaction.
+Right before it commits they are appended to a local journal file under
+a new transaction identifier, the journal is fsynced, and the trade
+inserts a PendingHistory marker with that identifier. Once the trade
+commits its rows are put on a bounded in-process queue, and a background
+thread inserts them with one bulk INSERT per batch of whole trades, when
+the batch is full or the flush interval has passed, deleting the markers
+of the trades in the same transaction. Every process writes its own
+journal and holds a lock on it; on start, journals no live process holds
+a lock on, left behind by a crash, are replayed into the database. When
+the writer is not running, or its queue is full, rows are inserted with
+the trade as before.
+
+A marker exists exactly when its trade committed and its rows are not
+written yet, so replay writes the journaled rows of the trades which
+still have a marker, and only those: the rows of every committed trade
+are written once, and the rows of a trade which rolled back never.
+
+"""
+import datetime
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from cantor_application import db
+from cantor_application.models.history import History
+from cantor_application.models.pending_history import PendingHistory
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'pending_history'
+TRANSACTION_KEY = 'history_transaction'
+WRITER_KEY = 'history_writer'
+
+
+def _encode(row: dict) -> dict:
+    return {
+        key: value.isoformat() if isinstance(value, datetime.datetime)
+        else str(value) if isinstance(value, Decimal) else value
+        for key, value in row.items()
+    }
+
+
+def _decode(row: dict) -> dict:
+    row = dict(row)
+    row['date_of_action'] = datetime.datetime.fromisoformat(row['date_of_action'])
+    row['currency_price'] = Decimal(row['currency_price'])
+    return row
+
+
+def _try_lock(journal) -> bool:
+    """Takes an exclusive lock on the open journal, False if another process holds it."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class HistoryWriter:
+    """Class writing History rows in batches from a background thread.
+
+    Attributes:
+        journal_dir (str): The directory of the journal files.
+        batch_size (int): Maximal number of rows inserted by one statement.
+        flush_interval (float): Maximal number of seconds a row waits in the queue.
+        maxsize (int): Maximal number of rows waiting in the queue.
+        written (int): Number of rows inserted by the background thread.
+        batches (int): Number of batches inserted by the background thread.
+        overflowed (int): Number of rows inserted with the trade because the queue was full.
+
+    Methods:
+        write: Writes History rows with the current transaction or after it commits.
+        prepare: Journals the rows of a transaction about to commit.
+        confirm: Queues the rows of a committed transaction.
+        abort: Forgets the rows of a transaction which did not commit.
+        start: Replays abandoned journals and starts the background thread.
+        stop: Flushes the queue and stops the background thread.
+        flush: Waits until every queued row is inserted.
+        replay: Inserts the rows of journals left behind by crashed processes.
+    """
+
+    def __init__(self, journal_dir: str = None, batch_size: int = 500,
+                 flush_interval: float = 0.5, maxsize: int = 10000) -> None:
+        self.journal_dir = journal_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+        self.written = 0
+        self.batches = 0
+        self.overflowed = 0
+        self._app = None
+        self._queue = None
+        self._journal = None
+        self._in_flight = {}
+        self._abandoned = False
+        self._journal_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def write(self, rows):
+        """Writes History rows of the current trade.
+
+        In write-behind mode the rows are kept on the session, journaled with
+        a marker when the transaction commits and handed to the writer once it
+        has committed; a rollback discards them. Otherwise they are inserted in
+        the current transaction.
+
+        Args:
+            rows (list): Column values of the History rows.
+        """
+        if self.running:
+            # Begins the transaction the rows belong to, if it has not begun yet.
+            db.session.connection(bind_arguments={'mapper': History.__mapper__})
+            db.session.info[WRITER_KEY] = self
+            db.session.info.setdefault(PENDING_KEY, []).extend(rows)
+        else:
+            db.session.execute(insert(History), rows)
+
+    def start(self, app):
+        """Replays abandoned journals and starts the background thread.
+
+        Args:
+            app (Flask): The application whose database the rows are written to.
+        """
+        if self.running:
+            return
+        self._app = app
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.replay()
+
+        path = os.path.join(self.journal_dir, f'history-{os.getpid()}-{uuid.uuid4().hex[:8]}.journal')
+        self._journal = open(path, 'a+', encoding='utf-8')  # pylint: disable=consider-using-with
+        _try_lock(self._journal)
+        self._queue = queue.Queue()
+        self._abandoned = False
+        self._in_flight = {}
+        self._stopped.clear()
+        if not event.contains(Session, 'after_commit', _submit_pending):
+            event.listen(Session, 'before_commit', _journal_pending)
+            event.listen(Session, 'after_commit', _submit_pending)
+            event.listen(Session, 'after_transaction_end', _discard_pending)
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flushes the queued rows, stops the background thread and removes its journal.
+
+        Rows which could not be written, or whose transactions were still
+        committing, stay in the journal and are replayed on the next start.
+        """
+        if not self.running:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        path = self._journal.name
+        self._journal.close()
+        self._journal = None
+        if not self._abandoned and self._queue.empty() and not self._in_flight:
+            os.remove(path)
+
+    def flush(self, timeout: float = 10):
+        """Waits until every queued row is inserted.
+
+        Args:
+            timeout (float): Maximal number of seconds to wait.
+
+        Returns:
+            bool: True if the queue was drained in time.
+        """
+        deadline = time.monotonic() + timeout
+        while self.running and self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def prepare(self, rows):
+        """Journals the rows of a transaction about to commit and syncs the journal to disk.
+
+        Args:
+            rows (list): Column values of the History rows.
+
+        Returns:
+            str or None: The identifier of the transaction, for its PendingHistory
+            marker, None if the queue is full and the rows were not taken.
+        """
+        with self._journal_lock:
+            in_flight = sum(self._in_flight.values())
+            if self._queue.qsize() + in_flight + len(rows) > self.maxsize:
+                return None
+            transaction = uuid.uuid4().hex
+            self._journal.write(''.join(
+                json.dumps({'tx': transaction, 'row': _encode(row)}) + '\n' for row in rows))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._in_flight[transaction] = len(rows)
+            return transaction
+
+    def confirm(self, transaction: str, rows):
+        """Queues the rows of the prepared transaction, which has committed.
+
+        Args:
+            transaction (str): The identifier returned by prepare.
+            rows (list): The rows given to prepare.
+        """
+        with self._journal_lock:
+            del self._in_flight[transaction]
+            self._queue.put_nowait((transaction, rows))
+
+    def abort(self, transaction: str):
+        """Forgets the prepared transaction, which rolled back with its marker.
+
+        Args:
+            transaction (str): The identifier returned by prepare.
+        """
+        with self._journal_lock:
+            self._in_flight.pop(transaction, None)
+
+    def replay(self) -> int:
+        """Inserts the rows of journals no live process holds a lock on.
+
+        Only the rows of transactions whose PendingHistory marker exists are
+        inserted, that is of trades which committed and were not written yet.
+
+        Returns:
+            int: The number of replayed rows.
+        """
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'history-*.journal'))):
+            with open(path, 'r', encoding='utf-8') as journal:
+                if not _try_lock(journal):
+                    continue
+                transactions = {}
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line torn by the crash belongs to a transaction which never committed.
+                        continue
+                    transactions.setdefault(entry['tx'], []).append(_decode(entry['row']))
+                pending = self._pending(transactions)
+                if pending is None or not self._insert(pending):
+                    continue
+                if fcntl is not None:
+                    # Removed while locked, so no other process replays it again.
+                    os.remove(path)
+            if os.path.exists(path):
+                os.remove(path)
+            count = sum(len(rows) for rows in pending.values())
+            replayed += count
+            logger.info('Replayed %s history rows from %s', count, path)
+        return replayed
+
+    def _pending(self, transactions: dict):
+        """Returns the journaled transactions which still have a marker, None if it cannot be read."""
+        with self._app.app_context():
+            try:
+                marked = set()
+                identifiers = list(transactions)
+                for start in range(0, len(identifiers), self.batch_size):
+                    marked.update(db.session.scalars(
+                        select(PendingHistory.transaction_id)
+                        .where(PendingHistory.transaction_id.in_(identifiers[start:start + self.batch_size]))
+                        ))
+                db.session.rollback()
+            except SQLAlchemyError:
+                db.session.rollback()
+                logger.exception('History markers could not be read')
+                return None
+        return {transaction: transactions[transaction] for transaction in identifiers if transaction in marked}
+
+    def _insert(self, transactions: dict) -> bool:
+        """Inserts the rows of the transactions and deletes their markers in one transaction."""
+        rows = [row for transaction_rows in transactions.values() for row in transaction_rows]
+        identifiers = list(transactions)
+        with self._app.app_context():
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    db.session.execute(insert(History), rows[start:start + self.batch_size])
+                for start in range(0, len(identifiers), self.batch_size):
+                    db.session.execute(delete(PendingHistory).where(
+                        PendingHistory.transaction_id.in_(identifiers[start:start + self.batch_size])))
+                db.session.commit()
+                return True
+            except SQLAlchemyError:
+                db.session.rollback()
+                logger.exception('History rows could not be written')
+                return False
+
+    def _next_batch(self):
+        """Takes whole transactions of up to batch_size rows, waiting at most flush_interval for them."""
+        batch, size = {}, 0
+        deadline = time.monotonic() + self.flush_interval
+        while size < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                transaction, rows = (self._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                                     else self._queue.get_nowait())
+            except queue.Empty:
+                break
+            batch[transaction] = rows
+            size += len(rows)
+        return batch, size
+
+    def _run(self):
+        while True:
+            stopping = self._stopped.is_set()
+            batch, size = self._next_batch()
+            if batch:
+                while not self._insert(batch):
+                    if self._stopped.wait(self.flush_interval):
+                        # The rows stay in the journal and are replayed on the next start.
+                        self._abandoned = True
+                        return
+                self.written += size
+                self.batches += 1
+                self._checkpoint()
+                for _ in batch:
+                    self._queue.task_done()
+            elif stopping:
+                return
+
+    def _checkpoint(self):
+        """Empties the journal when no journaled row is waiting to be written."""
+        with self._journal_lock:
+            if self._queue.empty() and not self._in_flight:
+                self._journal.truncate(0)
+                self._journal.flush()
+
+
+def _journal_pending(session):
+    """Journals the History rows of a transaction about to commit."""
+    rows = session.info.get(PENDING_KEY)
+    if not rows:
+        return
+    writer = session.info[WRITER_KEY]
+    if writer.running:
+        transaction = writer.prepare(rows)
+        if transaction is not None:
+            session.info[TRANSACTION_KEY] = transaction
+            session.execute(insert(PendingHistory).values(transaction_id=transaction))
+            return
+    # The queue is full: write the rows with the trade instead of dropping them.
+    session.info.pop(PENDING_KEY)
+    writer.overflowed += len(rows)
+    session.execute(insert(History), rows)
+
+
+def _submit_pending(session):
+    """Hands the History rows of a committed transaction to the writer."""
+    rows = session.info.pop(PENDING_KEY, None)
+    transaction = session.info.pop(TRANSACTION_KEY, None)
+    if rows and transaction is not None:
+        session.info[WRITER_KEY].confirm(transaction, rows)
+
+
+def _discard_pending(session, transaction):
+    """Forgets the History rows of a transaction which ended without a commit.
+
+    Rolled back savepoints keep the rows, only the end of the outermost
+    transaction drops them.
+    """
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+        prepared = session.info.pop(TRANSACTION_KEY, None)
+        writer = session.info.pop(WRITER_KEY, None)
+        if prepared is not None:
+            writer.abort(prepared)
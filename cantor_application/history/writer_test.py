@@ -0,0 +1,94 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from cantor_application import db
+from cantor_application.history.writer import HistoryWriter
+from cantor_application.models.history import History
+from cantor_application.models.pending_history import PendingHistory
+from cantor_application.models.user import User
+from cantor_application.rates.quote import Quote
+from cantor_application.services import get_services
+
+USD = Quote('usd', 'dolar amerykański', 4.0)
+
+
+@pytest.fixture
+def writer(trading_app):
+    history_writer = get_services(trading_app).history_writer
+    history_writer.batch_size, history_writer.flush_interval = 3, 0.05
+    history_writer.start(trading_app)
+    yield history_writer
+    history_writer.stop()
+
+
+def history_amounts():
+    return [record.currency_amount for record in History.query.order_by(History.id)]
+
+
+def test_trades_are_written_in_batches_after_commit(trading_app, writer):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        for amount in range(1, 8):
+            assert user.purchase(USD.value_of(amount), user, 'usd', amount, USD)
+        assert writer.flush()
+        db.session.expire_all()
+        assert history_amounts() == list(range(1, 8))
+        assert writer.written == 7
+        assert writer.batches >= 3
+
+def test_rolled_back_rows_are_not_written(trading_app, writer):
+    with trading_app.app_context():
+        writer.write([{
+            'currency_symbol': 'usd', 'currency_name': USD.name, 'currency_amount': 1,
+            'currency_price': USD.price, 'date_of_action': datetime.datetime(2024, 3, 5), 'user_id': 1,
+        }])
+        db.session.rollback()
+        db.session.commit()
+        assert writer.flush()
+        assert history_amounts() == []
+
+def test_abandoned_journal_replays_only_marked_transactions(trading_app, tmp_path):
+    journal_dir = tmp_path / 'abandoned'
+    journal_dir.mkdir()
+    row = {
+        'currency_symbol': 'usd', 'currency_name': USD.name, 'currency_price': '4.1234',
+        'date_of_action': '2024-03-05T12:00:00', 'user_id': 1,
+    }
+    # 'a' committed and was not written yet, 'b' rolled back or was written already.
+    lines = [{'tx': tx, 'row': dict(row, currency_amount=amount)} for tx, amount in (('a', 1), ('b', 2), ('a', 3))]
+    (journal_dir / 'history-1-dead.journal').write_text(
+        ''.join(json.dumps(line) + '\n' for line in lines) + '{"tx": "c", "ro', encoding='utf-8')
+
+    with trading_app.app_context():
+        db.session.add(PendingHistory(transaction_id='a'))
+        db.session.commit()
+    writer = HistoryWriter(str(journal_dir))
+    writer._app = trading_app
+    assert writer.replay() == 2
+    assert list(journal_dir.iterdir()) == []
+    with trading_app.app_context():
+        assert history_amounts() == [1, 3]
+        assert History.query.first().currency_price == Decimal('4.1234')
+        assert PendingHistory.query.count() == 0
+
+def test_crashed_trades_are_replayed_once_and_rolled_back_ones_never(trading_app, writer, monkeypatch):
+    # The process dies right after every commit, before the rows are queued.
+    monkeypatch.setattr(writer, 'confirm', lambda transaction, rows: None)
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        # A trade of the same user whose commit failed after its rows were journaled.
+        writer.prepare([dict(
+            currency_symbol='usd', currency_name=USD.name, currency_amount=7, currency_price=USD.price,
+            date_of_action=datetime.datetime(2024, 3, 5), user_id=1)])
+        assert user.purchase(USD.value_of(3), user, 'usd', 3, USD)
+        assert len(open(writer._journal.name, encoding='utf-8').readlines()) == 2
+
+    monkeypatch.undo()
+    writer.stop()
+    writer.start(trading_app)
+    writer.stop()
+    writer.start(trading_app)
+    with trading_app.app_context():
+        assert history_amounts() == [3]
@@ -1,13 +1,12 @@
 from flask import Blueprint, render_template, flash, session
 from flask_login import login_user, LoginManager
-from werkzeug.security import check_password_hash
-from cantor_application.models.user import User
+from cantor_application.hashing import HasherBusy
+from cantor_application.models.user import authenticate, load_cached_user
 from cantor_application.forms.loginform import LoginForm
-from cantor_application import app
 
 login_blueprint = Blueprint('login',__name__, template_folder='templates')
 
-login_manager = LoginManager(app)
+login_manager = LoginManager()
 login_manager.login_view = 'login.login'
 
 @login_blueprint.route('/login', methods = ['GET', 'POST'])
@@ -21,10 +20,13 @@ def login():
     # add invalid user name or password
     form = LoginForm()
     if form.validate_on_submit():
-        # Query database for username
-        user = User.query.filter(User.name == form.name.data).first()
         # Ensure username exists and password is correct
-        if user is not None and check_password_hash(user.password, form.password.data):
+        try:
+            user = authenticate(form.name.data, form.password.data)
+        except HasherBusy:
+            flash('Too many people are logging in right now, please try again in a moment.')
+            return render_template('login.html', form=form)
+        if user is not None:
             session['user_id'] = user.id
             login_user(user)
             flash(f'Hi {user.name}, nice to see you!')
@@ -33,9 +35,12 @@ def login():
 
 @login_manager.user_loader
 def load_user(id):
-    """Load a user by their user ID.
+    """Load a user by their user ID, at most once per request.
 
     Returns:
     User or None: The User object if found, otherwise None.
     """
-    return User.query.filter(User.id == id).first()
+    try:
+        return load_cached_user(int(id))
+    except (TypeError, ValueError):
+        return None
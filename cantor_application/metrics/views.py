@@ -0,0 +1,23 @@
+from flask import Blueprint, Response
+from cantor_application.profiling import render_cache_stats
+from cantor_application.services import get_services
+
+metrics_blueprint = Blueprint('metrics',__name__)
+
+
+@metrics_blueprint.route('/metrics')
+def metrics_view():
+    """
+    This route returns the request metrics collected by the profiling hooks:
+    request durations, SQL statement counts and the time spent in the database,
+    in the NBP Web API and in rendering templates, grouped by endpoint, and the
+    hit, miss and eviction counters of the caches.
+
+    Returns:
+    Response: The metrics in the Prometheus text exposition format.
+    """
+    services = get_services()
+    return Response(
+        services.metrics.render() + render_cache_stats(services.caches),
+        mimetype='text/plain; version=0.0.4'
+        )
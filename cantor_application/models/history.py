@@ -8,6 +8,7 @@ of action, and the user ID associated with the transaction.
 
 """
 from cantor_application  import db
+from cantor_application.money import RATE_PLACES, ScaledDecimal
 
 class History(db.Model):
     """Class representing the transaction history of currency actions for a user.
@@ -17,17 +18,20 @@ class History(db.Model):
         currency_symbol (str): The symbol of the currency involved in the transaction.
         currency_name (str): The name of the currency involved in the transaction.
         currency_amount (int): The amount of currency involved in the transaction.
-        currency_price (int): The price of the currency at the time of the transaction.
+        currency_price (Decimal): The price of the currency at the time of the transaction,
+        stored in units of 1e-8 PLN.
         date_of_action (DateTime): The date and time of the transaction.
         user_id (int): The ID of the user associated with the transaction.
 
     """
+    __table_args__ = (
+        db.Index('ix_history_user_id_date_of_action', 'user_id', 'date_of_action'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     currency_symbol = db.Column(db.String(3))
     currency_name = db.Column(db.String(30))
     currency_amount = db.Column(db.Integer)
-    currency_price = db.Column(db.Integer)
+    currency_price = db.Column(ScaledDecimal(RATE_PLACES))
     date_of_action = db.Column(db.DateTime)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-
-   
\ No newline at end of file
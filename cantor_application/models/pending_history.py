@@ -0,0 +1,25 @@
+"""Module representing the PendingHistory class and related functionalities.
+
+This module defines the PendingHistory class, the marker of a trade whose
+History rows were journaled by the write-behind history writer and are
+not written to the history table yet. The marker is inserted by the
+trade's own transaction and deleted by the transaction which writes the
+rows, so it exists exactly when the trade committed and its rows still
+have to be written.
+
+"""
+from cantor_application import db
+
+class PendingHistory(db.Model):
+    """Class representing a committed trade whose History rows are not written yet.
+
+    Attributes:
+        transaction_id (str): The identifier of the trade in the journal of the history writer.
+    """
+    __tablename__ = 'pending_history'
+
+    transaction_id = db.Column(db.String(32), primary_key=True)
+
+    def __repr__(self) -> str:
+        """Returns a string representation of the PendingHistory object."""
+        return f'Pending history: {self.transaction_id}'
@@ -0,0 +1,41 @@
+"""Module representing the PnlPosition class and related functionalities.
+
+This module defines the PnlPosition class, a running profit and loss
+aggregate of one currency of one user. It utilizes SQLAlchemy for
+database operations. Every trade updates the position in place, so
+reports read one row per currency instead of the whole transaction
+history.
+
+"""
+from cantor_application import db
+from cantor_application.money import PLN_PLACES, ScaledDecimal
+
+class PnlPosition(db.Model):
+    """Class representing the running profit and loss of a user in one currency.
+
+    Positions are kept at average cost: a purchase adds its value to the cost
+    basis, a sale removes the average cost of the sold units from it and books
+    the difference to its value as realized profit.
+
+    Attributes:
+        id (int): The unique identifier for the position.
+        user_id (int): The ID of the user the position belongs to.
+        currency_symbol (str): The symbol of the currency.
+        quantity (int): The amount of the currency held.
+        cost_basis (Decimal): The purchase cost of the amount held in PLN.
+        realized_pnl (Decimal): The profit of all sales of the currency in PLN.
+    """
+    __table_args__ = (
+        db.Index('ix_pnl_position_user_id_currency_symbol', 'user_id', 'currency_symbol', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    currency_symbol = db.Column(db.String(3), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    cost_basis = db.Column(ScaledDecimal(PLN_PLACES), nullable=False, default=0)
+    realized_pnl = db.Column(ScaledDecimal(PLN_PLACES), nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """Returns a string representation of the PnlPosition object."""
+        return f'Symbol: {self.currency_symbol}, Quantity: {self.quantity}, Realized: {self.realized_pnl}'
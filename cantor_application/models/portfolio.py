@@ -17,6 +17,10 @@ class Portfolio(db.Model):
         currency_amount (int): The amount of the currency held in the portfolio.
         user_id (int): The ID of the user to whom the portfolio belongs.
     """
+    __table_args__ = (
+        db.Index('ix_portfolio_user_id_currency_symbol', 'user_id', 'currency_symbol', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     currency_symbol = db.Column(db.String(3))
     currency_amount = db.Column(db.Integer)
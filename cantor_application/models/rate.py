@@ -0,0 +1,38 @@
+"""Module representing the Rate class and related functionalities.
+
+This module defines the Rate class, which stores every exchange rate
+fetched from the NBP Web API by currency symbol and effective date. 
+It utilizes SQLAlchemy for database operations. Keeping the rates locally 
+lets the application start with rates already available without calling 
+the external API.
+
+"""
+from cantor_application import db
+
+class Rate(db.Model):
+    """Class representing the exchange rate of a currency on a given day.
+
+    Attributes:
+        id (int): The unique identifier for the rate.
+        currency_symbol (str): The uppercase ISO 4217 symbol of the currency.
+        currency_name (str): The name of the currency.
+        mid (float): The average exchange rate of the currency in PLN.
+        effective_date (Date): The day the rate was published for.
+        table_number (str): The number of the NBP table the rate was published in.
+        fetched_at (DateTime): The date and time the rate was fetched from the API.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('currency_symbol', 'effective_date', name='uq_rate_symbol_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    currency_symbol = db.Column(db.String(3), nullable=False)
+    currency_name = db.Column(db.String(50))
+    mid = db.Column(db.Float, nullable=False)
+    effective_date = db.Column(db.Date, nullable=False)
+    table_number = db.Column(db.String(20))
+    fetched_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        """Returns a string representation of the Rate object."""
+        return f'Symbol: {self.currency_symbol}, Mid: {self.mid}, Date: {self.effective_date}'
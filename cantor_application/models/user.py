@@ -2,20 +2,33 @@
 
 It defines the User class, which represents a user in the application 
 for managing currencies in an online cantor. It utilizes SQLAlchemy for 
-database operations. The User class provides methods for checking if 
-a user can afford a purchase, if they can sell a certain amount 
-of a currency, handling purchases, sales, and adding transaction records 
-to the user's transaction history.
+database operations. The User class provides methods for handling 
+purchases, sales, and adding transaction records to the user's 
+transaction history. Every purchase and sale is executed 
+as one atomic unit of work with conditional UPDATE statements, which also 
+updates the user's profit and loss position of the currency. Users are 
+loaded through a short-lived cache keyed by id, so an authenticated request 
+needs at most one user query, and a trade refills the cache with the values 
+returned by its UPDATE where the database supports it. Users log in through authenticate, which 
+replaces password hashes made with outdated parameters.
 
 """
 
 from flask_login import UserMixin
 import datetime
+from sqlalchemy import update, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 
 from cantor_application  import db
+from cantor_application.money import PLN_PLACES, ScaledDecimal
 from cantor_application.models.portfolio import Portfolio
-from cantor_application.models.history import History
-from cantor_application.helpers import lookup
+from cantor_application.pnl.positions import record_trade
+from cantor_application.services import get_services
+
+EMAIL_INDEX = 'ix_user_email_lower'
+
 
 class User(db.Model, UserMixin):
     """Class representing a user in the application.
@@ -23,130 +36,310 @@ class User(db.Model, UserMixin):
     Attributes:
         id (int): The unique identifier for the user.
         name (str): The username of the user.
-        password (str): The password of the user.
+        password (str): The password hash of the user.
         email (str): The email address of the user.
-        amount_of_pln (float): The amount of Polish Zloty (PLN) owned by the user.
+        amount_of_pln (Decimal): The amount of Polish Zloty (PLN) owned by the user,
+        stored in grosze.
+        portfolio_version (int): The number of trades of the user, compared by the
+        portfolio valuation caches of every process.
         portfolio (relationship): Relationship with the Portfolio class indicating 
         the user's portfolio. history (relationship): Relationship with the History 
         class indicating the user's transaction history.
 
     Methods:
         __repr__: Returns a string representation of the User object.
-        checking_if_can_purchase: Checks if the user can afford a purchase.
-        checking_if_can_sell: Checks if the user can sell a certain amount of a cryptocurrency.
         sell: Handles the selling of a cryptocurrency by the user.
         purchase: Handles the purchase of a cryptocurrency by the user.
+        adding_to_portfolio: Adds an amount of a currency to the user's portfolio.
         adding_history_record: Adds a transaction record to the user's transaction history.
 
     """
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True)
-    password = db.Column(db.String(50))
+    password = db.Column(db.String(255))
     email = db.Column(db.String(50))
-    amount_of_pln = db.Column(db.Float)
+    amount_of_pln = db.Column(ScaledDecimal(PLN_PLACES))
+    portfolio_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     portfolio = db.relationship('Portfolio', backref='user', lazy='dynamic')
     history = db.relationship('History', backref='user', lazy='dynamic')
 
+    # Names and emails are unique regardless of case; the indexes also serve lower() lookups.
+    __table_args__ = (
+        db.Index('ix_user_name_lower', func.lower(name), unique=True),
+        db.Index(EMAIL_INDEX, func.lower(email), unique=True),
+    )
+
     def __repr__(self) -> str:
         """Returns a string representation of the User object."""
         return f'User: {self.name}'
 
-    def checking_if_can_purchase(self, purchase_value: float, user: 'User'):
-        """Checks if the user can afford a purchase.
-
-        Args:
-            purchase_value (float): The value of the purchase.
-            user (User): The user making the purchase.
-
-        Returns:
-            bool: True if the user can afford the purchase, False otherwise.
-        """
-        return purchase_value <= user.amount_of_pln
-
-    def checking_if_can_sell(self, symbol: str, amount: int, user: 'User'):
-        """Checks if the user can sell a certain amount of a currency.
-
-        Args:
-            symbol (str): The symbol of the currency.
-            amount (float): The amount of currency to sell.
-            user (User): The user attempting to sell the currency.
-
-        Returns:
-            bool: True if the user can sell the specified amount of currency, False otherwise.
-        """
-        record = Portfolio.query.filter_by(user_id=user.id, currency_symbol=symbol).first()
-        return bool(record and record.currency_amount >= amount)
-
-    def sell(self, symbol: str, amount: int, purchase_value: float, user: 'User'):
+    def sell(self, symbol: str, amount: int, purchase_value: float, user: 'User', quote):
         """Handles the selling of a currency by the user.
 
+        The whole sale is one transaction with a single commit. The amount of
+        the currency is taken with a conditional UPDATE, so concurrent sales
+        can never take more than the user holds.
+
         Args:
             symbol (str): The symbol of the currency to sell.
             amount (int): The amount of currency to sell.
             purchase_value (float): The value of the sale.
             user (User): The user selling the currency.
+            quote (Quote): The quote the sale was priced with.
+
+        Returns:
+            bool: True if the sale was made, False if the user does not hold enough currency.
         """
-        user.amount_of_pln = user.amount_of_pln + purchase_value
-        record = Portfolio.query.filter_by(user_id=user.id, currency_symbol=symbol).first()
+        user_id = user.id
+        # Rows are always locked in the same order, user first, to avoid deadlocks.
+        _, values = update_user(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                amount_of_pln=User.amount_of_pln + purchase_value,
+                portfolio_version=User.portfolio_version + 1)
+            )
+        taken = db.session.execute(
+            update(Portfolio)
+            .where(
+                Portfolio.user_id == user.id,
+                Portfolio.currency_symbol == symbol,
+                Portfolio.currency_amount >= amount)
+            .values(currency_amount=Portfolio.currency_amount - amount)
+            .execution_options(synchronize_session=False)
+            ).rowcount
+        if not taken:
+            db.session.rollback()
+            return False
 
-        if record.currency_amount - amount == 0:
-            db.session.delete(record)
-        else:
-            record.currency_amount = record.currency_amount - amount
+        db.session.execute(
+            delete(Portfolio)
+            .where(
+                Portfolio.user_id == user.id,
+                Portfolio.currency_symbol == symbol,
+                Portfolio.currency_amount == 0)
+            .execution_options(synchronize_session=False)
+            )
         is_negative = -1
-        user.adding_history_record(symbol, amount, is_negative, user)
+        user.adding_history_record(symbol, amount, is_negative, user, quote)
+        record_trade(user.id, symbol, -amount, quote.price)
         db.session.commit()
+        trade_committed(user_id, values)
+        return True
 
-    def purchase(self, purchase_value: float, user: 'User', symbol: str, amount: int):
+    def purchase(self, purchase_value: float, user: 'User', symbol: str, amount: int, quote):
         """Handles the purchase of a currency by the user.
 
+        The whole purchase is one transaction with a single commit. The balance
+        is charged with a conditional UPDATE, so concurrent purchases can never
+        spend more than the user has.
+
         Args:
             purchase_value (float): The value of the purchase.
             user (User): The user making the purchase.
             symbol (str): The symbol of the currency to purchase.
             amount (int): The amount of currency to purchase.
-        """
-        user.amount_of_pln = user.amount_of_pln - purchase_value
+            quote (Quote): The quote the purchase was priced with.
 
-        existing_portfolio_record = Portfolio.query.filter_by(user_id=user.id,
-                                                              currency_symbol=symbol).first()
+        Returns:
+            bool: True if the purchase was made, False if the user cannot afford it.
+        """
+        user_id = user.id
+        charged, values = update_user(
+            update(User)
+            .where(User.id == user_id, User.amount_of_pln >= purchase_value)
+            .values(
+                amount_of_pln=User.amount_of_pln - purchase_value,
+                portfolio_version=User.portfolio_version + 1)
+            )
+        if not charged:
+            db.session.rollback()
+            return False
 
-        if existing_portfolio_record:
-            existing_portfolio_record.currency_amount += amount
-        else:
-            new_portfolio_record = Portfolio(
-                currency_symbol = symbol,
-                currency_amount = amount,
-                user_id = user.id
-                )
-            db.session.add(new_portfolio_record)
+        user.adding_to_portfolio(symbol, amount, user)
         is_negative = 1
-        user.adding_history_record(symbol, amount, is_negative, user)
-
+        user.adding_history_record(symbol, amount, is_negative, user, quote)
+        record_trade(user.id, symbol, amount, quote.price)
         db.session.commit()
+        trade_committed(user_id, values)
+        return True
+
+    def adding_to_portfolio(self, symbol: str, amount: int, user: 'User'):
+        """Adds the amount of a currency to the user's portfolio without committing.
+
+        The existing record is increased with an UPDATE. When there is none, a new
+        record is inserted in a savepoint; if a concurrent purchase inserted it
+        first, the unique (user_id, currency_symbol) index rejects the insert and
+        the record is increased instead.
 
-    def adding_history_record(self, symbol: str, amount: int, is_negative: int, user: 'User'):
+        Args:
+            symbol (str): The symbol of the currency.
+            amount (int): The amount of currency to add.
+            user (User): The owner of the portfolio.
+        """
+        increase = (
+            update(Portfolio)
+            .where(Portfolio.user_id == user.id, Portfolio.currency_symbol == symbol)
+            .values(currency_amount=Portfolio.currency_amount + amount)
+            .execution_options(synchronize_session=False)
+            )
+        if db.session.execute(increase).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(Portfolio(
+                    currency_symbol = symbol,
+                    currency_amount = amount,
+                    user_id = user.id
+                    ))
+        except IntegrityError:
+            db.session.execute(increase)
+
+    def adding_history_record(self, symbol: str, amount: int, is_negative: int, user: 'User',
+                              quote):
         """Adds a transaction record to the user's transaction history.
 
+        The record is committed together with the trade by the caller, or, in
+        write-behind mode, handed to the history writer once the trade commits.
+
         Args:
             symbol (str): The symbol of the currency involved in the transaction.
             amount (int): The amount of currency involved in the transaction.
             is_negative (int): Indicator of whether the transaction is negative 
             (sell) or positive (buy).
             user (User): The user involved in the transaction.
+            quote (Quote): The quote the transaction was priced with.
         """
-        currency_value, currency_name = lookup(symbol)
-
         date_of_action = datetime.datetime.now().replace(microsecond=0)
         
-        new_history_record = History(
+        new_history_record = dict(
                 currency_symbol = symbol,
-                currency_name = currency_name,
+                currency_name = quote.name,
                 currency_amount = amount * is_negative,
-                currency_price = currency_value,
+                currency_price = quote.price,
                 date_of_action = date_of_action,
                 user_id = user.id)
         
-        db.session.add(new_history_record)
+        get_services().history_writer.write([new_history_record])
+
+
+
+def conflicting_field(error: IntegrityError) -> str:
+    """Tells which unique field of a user an insert collided with.
+
+    The violated index is named by the driver: PostgreSQL reports it as the
+    constraint name of the error, SQLite and MySQL in the message, which on
+    PostgreSQL also carries the duplicate value and thus cannot be searched.
+
+    Args:
+        error (IntegrityError): The error raised by the insert of a user.
+
+    Returns:
+        str: 'email' if the email is taken, otherwise 'name'.
+    """
+    constraint = getattr(getattr(error.orig, 'diag', None), 'constraint_name', None)
+    return 'email' if EMAIL_INDEX in (constraint or str(error.orig)) else 'name'
+
+
+def authenticate(name: str, password: str):
+    """Returns the user with the name and password, None if they do not match.
+
+    When the stored hash was made with other parameters than the configured
+    ones, it is replaced by a new hash of the password.
+
+    Args:
+        name (str): The name of the user.
+        password (str): The password of the user.
+
+    Raises:
+        HasherBusy: Too many passwords are being verified.
+
+    Returns:
+        User or None: The user, None if the name or password is wrong.
+    """
+    services = get_services()
+    user = User.query.filter(User.name == name).first()
+    if user is None or not services.password_hasher.verify(user.password, password):
+        return None
+    if services.password_hasher.needs_rehash(user.password):
+        user.password = services.password_hasher.hash(password)
         db.session.commit()
+        services.user_cache.invalidate(user.id)
+    return user
+
+
+def load_user_values(user_id: int):
+    """Loads the column values of the user for the user cache.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        dict or None: The values by column name, None if there is no such user.
+    """
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def update_user(statement) -> tuple:
+    """Executes an UPDATE of one user and returns the column values it wrote.
+
+    Where the database supports UPDATE ... RETURNING, the new values come back
+    with the update, so the user cache can be refilled without a SELECT.
+
+    Args:
+        statement (Update): The UPDATE of the user row.
+
+    Returns:
+        tuple: True if the row was updated, and its new values by column name,
+        None if it was not updated or the database cannot return them.
+    """
+    statement = statement.execution_options(synchronize_session=False)
+    if not db.session.get_bind().dialect.update_returning:
+        return bool(db.session.execute(statement).rowcount), None
+    row = db.session.execute(statement.returning(*User.__table__.columns)).first()
+    if row is None:
+        return False, None
+    return True, row._asdict()
+
+
+def trade_committed(user_id: int, values: dict = None):
+    """Updates the cached values and drops the portfolio valuation of the user after a trade.
+
+    Args:
+        user_id (int): The ID of the user.
+        values (dict): The column values written by the trade, None to drop the cached ones.
+    """
+    services = get_services()
+    if values is None:
+        services.user_cache.invalidate(user_id)
+    else:
+        services.user_cache.put(user_id, values)
+    services.valuation_cache.invalidate(user_id)
+
+
+def load_cached_user(user_id: int):
+    """Returns the user with the given id, querying the database only on a cache miss.
+
+    On a hit the user is rebuilt from the cached column values and attached to
+    the session as a persistent object without emitting a SELECT.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        User or None: The user, None if there is no such user.
+    """
+    values = get_services().user_cache.get(user_id)
+    if values is None:
+        return None
+    user = db.session.identity_map.get(identity_key(User, user_id))
+    if user is not None:
+        return user
+    user = User(**values)
+    make_transient_to_detached(user)
+    db.session.add(user)
+    return user
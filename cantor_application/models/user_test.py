@@ -0,0 +1,94 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from cantor_application import db
+from cantor_application.models.history import History
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.models.user import User, conflicting_field
+from cantor_application.rates.quote import Quote
+
+QUOTE = Quote('usd', 'dolar amerykański', 10.0)
+THREADS = 8
+ATTEMPTS = 15
+
+
+def hammer(app, trade):
+    """Runs the trade ATTEMPTS times from THREADS threads at once."""
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def worker():
+        with app.app_context():
+            barrier.wait()
+            for _ in range(ATTEMPTS):
+                try:
+                    user = db.session.get(User, 1)
+                    trade(user)
+                except Exception as error:  # pylint: disable=broad-except
+                    errors.append(error)
+                    db.session.rollback()
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_purchases_never_overspend(trading_app):
+    # 120 attempts of 50 PLN against 1000 PLN: exactly 20 may succeed.
+    hammer(trading_app, lambda user: user.purchase(50.0, user, 'usd', 5, QUOTE))
+
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        assert user.amount_of_pln == 0
+        records = Portfolio.query.filter_by(user_id=1).all()
+        assert len(records) == 1
+        assert records[0].currency_amount == 100
+        assert History.query.filter_by(user_id=1).count() == 20
+
+def test_concurrent_sales_never_oversell(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        assert user.purchase(1000.0, user, 'usd', 100, QUOTE)
+
+    # 120 attempts of 3 units against 100 units: exactly 33 may succeed.
+    hammer(trading_app, lambda user: user.sell('usd', 3, 30.0, user, QUOTE))
+
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        assert user.amount_of_pln == 990
+        record = Portfolio.query.filter_by(user_id=1, currency_symbol='usd').one()
+        assert record.currency_amount == 1
+        assert History.query.filter(History.currency_amount < 0).count() == 33
+
+def test_selling_everything_removes_portfolio_record(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        assert user.purchase(100.0, user, 'usd', 10, QUOTE)
+        assert user.sell('usd', 10, 100.0, user, QUOTE)
+        assert not user.sell('usd', 1, 10.0, user, QUOTE)
+        assert Portfolio.query.filter_by(user_id=1).count() == 0
+        assert db.session.get(User, 1).amount_of_pln == 1000
+
+class PostgresError(Exception):
+    """Unique violation as raised by psycopg, whose message carries the duplicate value."""
+
+    def __init__(self, constraint, value):
+        super().__init__(f'duplicate key value violates unique constraint "{constraint}"\n'
+                         f'DETAIL:  Key (lower(name::text))=({value}) already exists.')
+        self.diag = SimpleNamespace(constraint_name=constraint)
+
+
+@pytest.mark.parametrize('orig, field', [
+    (PostgresError('ix_user_name_lower', 'emailfan'), 'name'),
+    (PostgresError('ix_user_email_lower', 'fan@cantor.pl'), 'email'),
+    (Exception("UNIQUE constraint failed: index 'ix_user_email_lower'"), 'email'),
+    (Exception('UNIQUE constraint failed: user.name'), 'name'),
+])
+def test_conflicting_field_is_told_by_the_index(orig, field):
+    assert conflicting_field(IntegrityError('INSERT INTO user', {}, orig)) == field
@@ -0,0 +1,84 @@
+"""Module providing the fixed-point representation of money.
+
+Amounts of PLN are kept in grosze and exchange rates in units of 1e-8 PLN,
+enough for the rates of small-unit currencies like IDR, which NBP publishes
+with up to eight decimal places. In Python they are exact
+`Decimal` values, in the database they are stored as scaled integers by
+the ScaledDecimal column type, so balance checks and sums are exact
+integer arithmetic and the columns stay compact to index and aggregate.
+JSON answers carry them as plain numbers.
+
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import BigInteger, Integer
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+PLN_PLACES = 2
+RATE_PLACES = 8
+
+GROSZ = Decimal(1).scaleb(-PLN_PLACES)
+RATE_UNIT = Decimal(1).scaleb(-RATE_PLACES)
+
+
+def to_pln(value) -> Decimal:
+    """Returns the amount of PLN rounded half up to whole grosze."""
+    return Decimal(str(value)).quantize(GROSZ, rounding=ROUND_HALF_UP)
+
+
+def to_rate(value) -> Decimal:
+    """Returns the exchange rate rounded half up to 1e-8 PLN."""
+    return Decimal(str(value)).quantize(RATE_UNIT, rounding=ROUND_HALF_UP)
+
+
+def value_of(amount: int, rate) -> Decimal:
+    """Returns the value of an amount of a currency in PLN, rounded to grosze."""
+    return to_pln(amount * to_rate(rate))
+
+
+class ScaledDecimal(TypeDecorator):
+    """Column type storing a Decimal with a fixed number of places as an integer.
+
+    The value is multiplied by 10 ** places before it is written and divided
+    back when it is read. Integers multiplying or dividing such a column in
+    SQL expressions, like the amount of a trade, are bound unscaled.
+
+    Attributes:
+        places (int): The number of decimal places kept.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    _SCALAR_OPERATORS = (operators.mul, operators.truediv, operators.floordiv, operators.mod)
+
+    def __init__(self, places: int) -> None:
+        super().__init__()
+        self.places = places
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(Decimal(str(value)).scaleb(self.places).to_integral_value(rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-self.places)
+
+    def coerce_compared_value(self, op, value):
+        if op in self._SCALAR_OPERATORS:
+            return Integer()
+        return self
+
+
+class MoneyJSONProvider(DefaultJSONProvider):
+    """JSON provider writing Decimal amounts as numbers instead of strings."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return DefaultJSONProvider.default(o)
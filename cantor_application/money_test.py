@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+
+from cantor_application.money import RATE_PLACES, ScaledDecimal, to_pln, to_rate, value_of
+from cantor_application.rates.quote import Quote
+
+
+def test_amounts_are_rounded_half_up():
+    assert to_pln(0.125) == Decimal('0.13')
+    assert to_rate(3.982150005) == Decimal('3.98215001')
+    assert value_of(3, 3.9821) == Decimal('11.95')
+
+def test_small_unit_rates_keep_their_precision():
+    # NBP table A publishes IDR and KRW rates with more than four decimal places.
+    assert to_rate(0.00024736) == Decimal('0.00024736')
+    assert value_of(1_000_000, 0.00024736) == Decimal('247.36')
+    assert value_of(1000, 0.002907) == Decimal('2.91')
+    assert Quote('idr', 'rupia (Indonezja)', 0.00024736).value_of(1_000_000) == Decimal('247.36')
+
+    rate = ScaledDecimal(RATE_PLACES)
+    assert rate.process_result_value(rate.process_bind_param(Decimal('0.00024736'), None), None) == \
+        Decimal('0.00024736')
+
+def test_scaled_decimal_is_stored_as_integer():
+    metadata = MetaData()
+    account = Table('account', metadata,
+                    Column('id', Integer, primary_key=True),
+                    Column('balance', ScaledDecimal(2)))
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(account.insert(), [{'balance': Decimal('1000.10')}, {'balance': 0.1}])
+        # Integers scaling a column are bound as they are, not converted to grosze.
+        connection.execute(account.update().values(balance=account.c.balance * 3 // 2))
+        assert connection.exec_driver_sql('SELECT balance FROM account').scalars().all() == [150015, 15]
+        assert connection.execute(select(account.c.balance)).scalars().all() == [
+            Decimal('1500.15'), Decimal('0.15')]
+        assert connection.execute(
+            select(account.c.id).where(account.c.balance >= Decimal('1500.15'))).scalar() == 1
@@ -0,0 +1,217 @@
+"""Module providing the execution of batch orders.
+
+This module defines the OrderLeg class and the parse_legs and
+execute_batch functions, which buy and sell several currencies in one
+transaction. Every leg is priced from the same exchange rate table, the
+balance of the user is checked and changed with one conditional UPDATE
+for the net value of the whole batch, new portfolio records and all
+History rows are written with bulk inserts, and the batch is committed
+once, or not at all.
+
+"""
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from cantor_application import db
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.models.user import User, trade_committed, update_user
+from cantor_application.pnl.positions import record_trade
+from cantor_application.rates.quote import Quote
+from cantor_application.services import get_services
+
+SIDES = {'buy': 1, 'sell': -1}
+
+
+class InvalidOrder(ValueError):
+    """Raised when a batch order cannot be parsed or priced."""
+
+
+class OrderRejected(Exception):
+    """Raised when the user cannot afford a batch order or does not hold the currencies sold."""
+
+
+@dataclass(frozen=True)
+class OrderLeg:
+    """Class representing one priced leg of a batch order.
+
+    Attributes:
+        side (str): 'buy' or 'sell'.
+        amount (int): The amount of the currency.
+        quote (Quote): The quote the leg is priced with.
+    """
+    side: str
+    amount: int
+    quote: Quote
+
+    @property
+    def sign(self) -> int:
+        """1 for a purchase, -1 for a sale."""
+        return SIDES[self.side]
+
+    @property
+    def value(self) -> float:
+        """The value of the leg in PLN."""
+        return self.quote.value_of(self.amount)
+
+    def as_dict(self) -> dict:
+        """Returns the leg as a JSON serializable dictionary."""
+        return {
+            'side': self.side,
+            'symbol': self.quote.symbol,
+            'amount': self.amount,
+            'price': self.quote.price,
+            'value': self.value,
+        }
+
+
+def parse_legs(data, table, max_legs: int) -> list:
+    """Parses and prices the legs of a batch order.
+
+    Args:
+        data: The decoded JSON body, {"legs": [{"side", "symbol", "amount"}, ...]}.
+        table (RateTable): The exchange rates every leg is priced with.
+        max_legs (int): The maximal number of legs of one order.
+
+    Raises:
+        InvalidOrder: The body is malformed, too long or names an unknown currency.
+
+    Returns:
+        list: The OrderLeg objects, in the order of the request.
+    """
+    legs = data.get('legs') if isinstance(data, dict) else None
+    if not isinstance(legs, list) or not legs:
+        raise InvalidOrder('The order needs a non-empty list of legs')
+    if len(legs) > max_legs:
+        raise InvalidOrder(f'The order may have at most {max_legs} legs')
+
+    parsed = []
+    for number, leg in enumerate(legs, start=1):
+        if not isinstance(leg, dict):
+            raise InvalidOrder(f'Leg {number} is not an object')
+        side, symbol, amount = leg.get('side'), leg.get('symbol'), leg.get('amount')
+        if side not in SIDES:
+            raise InvalidOrder(f'Leg {number}: side must be "buy" or "sell"')
+        if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+            raise InvalidOrder(f'Leg {number}: amount must be a positive integer')
+        entry = table.get(symbol) if isinstance(symbol, str) else None
+        if entry is None:
+            raise InvalidOrder(f'Leg {number}: unknown currency {symbol}')
+        parsed.append(OrderLeg(side, amount, Quote(entry.symbol.lower(), entry.name, entry.mid)))
+    return parsed
+
+
+def execute_batch(user: User, legs: list) -> float:
+    """Executes all legs of a batch order as one transaction.
+
+    Purchases are paid from the balance and from the sales of the same batch,
+    so the balance is checked once, against the net value of the order. Sales
+    are not paid from the purchases of the same batch: every currency is
+    changed by its net amount with a conditional UPDATE which requires the
+    total sold amount to be held before the batch; if it is not, nothing is
+    written.
+
+    Args:
+        user (User): The user placing the order.
+        legs (list): The priced OrderLeg objects.
+
+    Raises:
+        OrderRejected: The user cannot afford the order or does not hold a sold currency.
+
+    Returns:
+        float: The net cost of the order in PLN, negative when the user was credited.
+    """
+    cost = sum(leg.value * leg.sign for leg in legs)
+    changes, sold = defaultdict(int), defaultdict(int)
+    for leg in legs:
+        changes[leg.quote.symbol] += leg.amount * leg.sign
+        if leg.sign < 0:
+            sold[leg.quote.symbol] += leg.amount
+
+    user_id = user.id
+    # Rows are always locked in the same order, user first, to avoid deadlocks.
+    charged, values = update_user(
+        update(User)
+        .where(User.id == user_id, User.amount_of_pln >= cost)
+        .values(amount_of_pln=User.amount_of_pln - cost, portfolio_version=User.portfolio_version + 1)
+        )
+    if not charged:
+        db.session.rollback()
+        raise OrderRejected('Insufficient funds in the account')
+
+    held = {
+        record.currency_symbol
+        for record in Portfolio.query.filter(
+            Portfolio.user_id == user.id,
+            Portfolio.currency_symbol.in_(list(changes)))
+    }
+    for symbol, change in sorted(changes.items()):
+        if symbol in held and (change or sold[symbol]):
+            changed = db.session.execute(
+                update(Portfolio)
+                .where(
+                    Portfolio.user_id == user.id,
+                    Portfolio.currency_symbol == symbol,
+                    Portfolio.currency_amount >= sold[symbol])
+                .values(currency_amount=Portfolio.currency_amount + change)
+                .execution_options(synchronize_session=False)
+                ).rowcount
+            if not changed and not sold[symbol]:
+                # The record was emptied and deleted by a concurrent sale.
+                user.adding_to_portfolio(symbol, change, user)
+            elif not changed:
+                db.session.rollback()
+                raise OrderRejected(f'Insufficient amount of {symbol} in the portfolio')
+        elif sold[symbol]:
+            db.session.rollback()
+            raise OrderRejected(f'Insufficient amount of {symbol} in the portfolio')
+
+    _insert_portfolio_records(user, {
+        symbol: change for symbol, change in changes.items() if symbol not in held and change > 0
+    })
+    db.session.execute(
+        delete(Portfolio)
+        .where(Portfolio.user_id == user.id, Portfolio.currency_amount == 0)
+        .execution_options(synchronize_session=False)
+        )
+
+    date_of_action = datetime.datetime.now().replace(microsecond=0)
+    get_services().history_writer.write([
+        {
+            'currency_symbol': leg.quote.symbol,
+            'currency_name': leg.quote.name,
+            'currency_amount': leg.amount * leg.sign,
+            'currency_price': leg.quote.price,
+            'date_of_action': date_of_action,
+            'user_id': user.id,
+        }
+        for leg in legs
+    ])
+    for leg in legs:
+        record_trade(user.id, leg.quote.symbol, leg.amount * leg.sign, leg.quote.price)
+    db.session.commit()
+    trade_committed(user_id, values)
+    return cost
+
+
+def _insert_portfolio_records(user: User, amounts: dict):
+    """Inserts the new portfolio records with one statement.
+
+    When a concurrent purchase inserted one of them first, the unique
+    (user_id, currency_symbol) index rejects the insert and every record is
+    added one by one instead.
+    """
+    if not amounts:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(Portfolio), [
+                {'currency_symbol': symbol, 'currency_amount': amount, 'user_id': user.id}
+                for symbol, amount in amounts.items()
+            ])
+    except IntegrityError:
+        for symbol, amount in amounts.items():
+            user.adding_to_portfolio(symbol, amount, user)
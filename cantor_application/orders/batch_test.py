@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+from cantor_application import db
+from cantor_application.models.history import History
+from cantor_application.models.pnl_position import PnlPosition
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.models.user import User
+from cantor_application.orders.batch import (
+    InvalidOrder, OrderRejected, execute_batch, parse_legs
+)
+from cantor_application.rates.table import RateEntry, RateTable
+
+DAY = datetime.date(2024, 3, 5)
+TABLE = RateTable('045/A/NBP/2024', DAY, [
+    RateEntry('USD', 'dolar amerykański', 4.0, DAY),
+    RateEntry('EUR', 'euro', 5.0, DAY),
+])
+
+
+@pytest.fixture
+def trader_balance():
+    return 100
+
+
+def order(*legs):
+    return parse_legs({'legs': [
+        {'side': side, 'symbol': symbol, 'amount': amount} for side, symbol, amount in legs
+    ]}, TABLE, max_legs=10)
+
+
+def holdings():
+    return {
+        record.currency_symbol: record.currency_amount
+        for record in Portfolio.query.filter_by(user_id=1)
+    }
+
+
+def test_legs_are_priced_from_the_table():
+    legs = order(('buy', 'usd', 2), ('sell', 'EUR', 1))
+    assert [leg.as_dict() for leg in legs] == [
+        {'side': 'buy', 'symbol': 'usd', 'amount': 2, 'price': 4.0, 'value': 8.0},
+        {'side': 'sell', 'symbol': 'eur', 'amount': 1, 'price': 5.0, 'value': 5.0},
+    ]
+
+@pytest.mark.parametrize('data', [
+    None,
+    {'legs': []},
+    {'legs': [{'side': 'hold', 'symbol': 'usd', 'amount': 1}]},
+    {'legs': [{'side': 'buy', 'symbol': 'usd', 'amount': 0}]},
+    {'legs': [{'side': 'buy', 'symbol': 'usd', 'amount': 1.5}]},
+    {'legs': [{'side': 'buy', 'symbol': 'xyz', 'amount': 1}]},
+    {'legs': [{'side': 'buy', 'symbol': 'usd', 'amount': 1}] * 11},
+])
+def test_malformed_orders_are_refused(data):
+    with pytest.raises(InvalidOrder):
+        parse_legs(data, TABLE, max_legs=10)
+
+def test_rebalancing_is_one_transaction(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        assert execute_batch(user, order(('buy', 'usd', 10), ('buy', 'eur', 4))) == 60
+        # The sale of all dollars pays for the euros.
+        assert execute_batch(user, order(('sell', 'usd', 10), ('buy', 'eur', 12))) == 20
+
+        assert holdings() == {'eur': 16}
+        assert db.session.get(User, 1).amount_of_pln == 20
+        assert History.query.filter_by(user_id=1).count() == 4
+
+def test_rejected_order_writes_nothing(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        execute_batch(user, order(('buy', 'usd', 5)))
+
+        with pytest.raises(OrderRejected):
+            execute_batch(user, order(('buy', 'eur', 1), ('sell', 'usd', 6)))
+        with pytest.raises(OrderRejected):
+            execute_batch(user, order(('buy', 'eur', 17)))
+
+        assert holdings() == {'usd': 5}
+        assert db.session.get(User, 1).amount_of_pln == 80
+        assert History.query.filter_by(user_id=1).count() == 1
+
+@pytest.mark.parametrize('legs', [
+    (('sell', 'usd', 10), ('buy', 'usd', 10)),
+    (('sell', 'eur', 3), ('buy', 'eur', 5)),
+    (('buy', 'usd', 10), ('sell', 'usd', 10)),
+])
+def test_sales_are_not_paid_from_purchases_of_the_batch(trading_app, legs):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        with pytest.raises(OrderRejected):
+            execute_batch(user, order(*legs))
+
+        assert holdings() == {}
+        assert db.session.get(User, 1).amount_of_pln == 100
+        assert History.query.filter_by(user_id=1).count() == 0
+        assert PnlPosition.query.filter_by(user_id=1).count() == 0
+
+def test_sale_and_purchase_of_a_held_currency_are_netted(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        execute_batch(user, order(('buy', 'eur', 3)))
+        assert execute_batch(user, order(('sell', 'eur', 3), ('buy', 'eur', 5))) == 10
+
+        assert holdings() == {'eur': 5}
+        assert PnlPosition.query.filter_by(user_id=1, currency_symbol='eur').one().quantity == 5
+        assert [row.currency_amount for row in History.query.filter_by(user_id=1)] == [3, -3, 5]
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from cantor_application.helpers import rate_snapshot
+from cantor_application.orders.batch import InvalidOrder, OrderRejected, execute_batch, parse_legs
+
+orders_blueprint = Blueprint('orders',__name__)
+
+
+@orders_blueprint.route('/api/orders/batch', methods = ['POST'])
+@login_required
+def batch():
+    """
+    This route executes several buy and sell legs in one request. Every leg is priced
+    from the same exchange rate table and the whole order is committed at once, or
+    rejected as a whole.
+
+    JSON Body:
+    - legs: List of objects with 'side' ('buy' or 'sell'), 'symbol' and 'amount'.
+
+    Returns:
+    200: The executed legs with their prices and the net cost of the order in PLN.
+    400: The order is malformed or names an unknown currency.
+    409: The user cannot afford the order or does not hold a sold currency.
+    503: The exchange rates are not available.
+    """
+    table = rate_snapshot()
+    if table is None:
+        return jsonify(error='Exchange rates are not available'), 503
+
+    try:
+        legs = parse_legs(
+            request.get_json(silent=True), table, current_app.config['ORDERS_MAX_LEGS'])
+        cost = execute_batch(current_user, legs)
+    except InvalidOrder as error:
+        return jsonify(error=str(error)), 400
+    except OrderRejected as error:
+        return jsonify(error=str(error)), 409
+
+    return jsonify(
+        effective_date=table.effective_date.isoformat(),
+        legs=[leg.as_dict() for leg in legs],
+        cost=cost)
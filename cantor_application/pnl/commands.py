@@ -0,0 +1,23 @@
+"""Module providing the `flask pnl` commands.
+
+This module defines the command line group managing the profit and loss
+positions, for example `flask pnl rebuild` after the positions were
+added to an existing database.
+
+"""
+import click
+from flask.cli import AppGroup
+
+from cantor_application.pnl.positions import rebuild_positions
+
+pnl_cli = AppGroup('pnl', help='Manage the profit and loss positions.')
+
+
+@pnl_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Only rebuild the positions of this user.')
+@click.option('--batch-size', type=int, default=1000, show_default=True,
+              help='Number of History rows read from the database at once.')
+def rebuild(user_id, batch_size):
+    """Recomputes the positions from the transaction history in one pass."""
+    count = rebuild_positions(user_id, batch_size)
+    click.echo(f'Rebuilt {count} positions.')
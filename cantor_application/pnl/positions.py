@@ -0,0 +1,192 @@
+"""Module providing the incremental profit and loss of users' trades.
+
+This module keeps one PnlPosition row per user and currency up to date.
+record_trade changes the row of a traded currency with a single UPDATE
+inside the transaction of the trade, rebuild_positions recomputes every
+row from the History table in one streaming pass, and pnl_report values
+the positions of a user at a rate table. Reports therefore cost one row
+per currency held, however long the transaction history is.
+
+Positions are kept at average cost, see the PnlPosition class.
+
+"""
+from dataclasses import dataclass
+from decimal import ROUND_DOWN, Decimal
+
+from sqlalchemy import case, delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from cantor_application import db
+from cantor_application.models.history import History
+from cantor_application.models.pnl_position import PnlPosition
+from cantor_application.money import GROSZ, RATE_UNIT, to_rate, value_of
+
+
+@dataclass
+class RunningPosition:
+    """Class representing a position being recomputed from the transaction history.
+
+    Attributes:
+        quantity (int): The amount of the currency held.
+        cost_basis (Decimal): The purchase cost of the amount held in PLN.
+        realized_pnl (Decimal): The profit of all sales in PLN.
+    """
+    quantity: int = 0
+    cost_basis: Decimal = Decimal('0.00')
+    realized_pnl: Decimal = Decimal('0.00')
+
+    def apply(self, amount: int, price: Decimal):
+        """Applies one trade, the same way record_trade does in the database.
+
+        The cost of sold units is rounded down to grosze, like the integer
+        division of the UPDATE statement.
+
+        Args:
+            amount (int): The traded amount, negative for a sale.
+            price (Decimal): The price of one unit in PLN.
+        """
+        if amount >= 0:
+            self.quantity += amount
+            self.cost_basis += value_of(amount, price)
+        elif self.quantity > 0:
+            sold = -amount
+            sold_cost = (self.cost_basis * sold / self.quantity).quantize(GROSZ, rounding=ROUND_DOWN)
+            self.realized_pnl += value_of(sold, price) - sold_cost
+            if self.quantity <= sold:
+                self.quantity, self.cost_basis = 0, Decimal('0.00')
+            else:
+                self.quantity -= sold
+                self.cost_basis -= sold_cost
+
+
+def record_trade(user_id: int, symbol: str, amount: int, price: Decimal):
+    """Applies a trade to the position of the currency without committing.
+
+    Args:
+        user_id (int): The ID of the user.
+        symbol (str): The lowercase symbol of the currency.
+        amount (int): The traded amount, negative for a sale.
+        price (Decimal): The price of one unit in PLN.
+    """
+    position = (PnlPosition.user_id == user_id, PnlPosition.currency_symbol == symbol)
+    if amount < 0:
+        sold = -amount
+        # Integer division of the cost in grosze, rounding down.
+        sold_cost = PnlPosition.cost_basis * sold // PnlPosition.quantity
+        # Every SET expression reads the values from before the UPDATE.
+        db.session.execute(
+            update(PnlPosition)
+            .where(*position, PnlPosition.quantity > 0)
+            .values(
+                realized_pnl=PnlPosition.realized_pnl + value_of(sold, price) - sold_cost,
+                cost_basis=case((PnlPosition.quantity <= sold, 0), else_=PnlPosition.cost_basis - sold_cost),
+                quantity=case((PnlPosition.quantity <= sold, 0), else_=PnlPosition.quantity - sold))
+            .execution_options(synchronize_session=False)
+            )
+        return
+
+    increase = (
+        update(PnlPosition)
+        .where(*position)
+        .values(
+            quantity=PnlPosition.quantity + amount,
+            cost_basis=PnlPosition.cost_basis + value_of(amount, price))
+        .execution_options(synchronize_session=False)
+        )
+    if db.session.execute(increase).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(PnlPosition).values(
+                user_id=user_id, currency_symbol=symbol, quantity=amount,
+                cost_basis=value_of(amount, price), realized_pnl=0))
+    except IntegrityError:
+        db.session.execute(increase)
+
+
+def rebuild_positions(user_id: int = None, batch_size: int = 1000) -> int:
+    """Recomputes the positions from the transaction history and commits them.
+
+    The history is read once, in the order of the (user_id, date_of_action)
+    index, from a server-side cursor in batches of batch_size, so only the
+    positions, not the history, are kept in memory.
+
+    Args:
+        user_id (int): Only the positions of this user, None for every user.
+        batch_size (int): Number of History rows fetched from the database at once.
+
+    Returns:
+        int: The number of stored positions.
+    """
+    query = (
+        db.select(History.user_id, History.currency_symbol,
+                  History.currency_amount, History.currency_price)
+        .order_by(History.user_id, History.date_of_action, History.id)
+        .execution_options(yield_per=batch_size)
+        )
+    stale = delete(PnlPosition)
+    if user_id is not None:
+        query = query.where(History.user_id == user_id)
+        stale = stale.where(PnlPosition.user_id == user_id)
+
+    positions = {}
+    for owner, symbol, amount, price in db.session.execute(query):
+        positions.setdefault((owner, symbol), RunningPosition()).apply(amount, price)
+
+    db.session.execute(stale)
+    rows = [
+        {
+            'user_id': owner,
+            'currency_symbol': symbol,
+            'quantity': position.quantity,
+            'cost_basis': position.cost_basis,
+            'realized_pnl': position.realized_pnl,
+        }
+        for (owner, symbol), position in positions.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(PnlPosition), rows[start:start + batch_size])
+    db.session.commit()
+    return len(rows)
+
+
+def pnl_report(user_id: int, table) -> dict:
+    """Returns the realized and unrealized profit of the user per currency.
+
+    Args:
+        user_id (int): The ID of the user.
+        table (RateTable): The exchange rates the held amounts are valued at.
+
+    Returns:
+        dict: The positions ordered by symbol and the realized and unrealized totals in PLN.
+        The unrealized profit of a currency the table does not list is None.
+    """
+    records = (
+        PnlPosition.query
+        .filter(PnlPosition.user_id == user_id)
+        .order_by(PnlPosition.currency_symbol)
+        .all()
+        )
+    positions = []
+    for record in records:
+        entry = table.get(record.currency_symbol)
+        price = to_rate(entry.mid) if entry is not None else None
+        positions.append({
+            'symbol': record.currency_symbol,
+            'quantity': record.quantity,
+            'cost_basis': record.cost_basis,
+            'average_cost': (
+                (record.cost_basis / record.quantity).quantize(RATE_UNIT) if record.quantity else None),
+            'price': price,
+            'realized_pnl': record.realized_pnl,
+            'unrealized_pnl': (
+                value_of(record.quantity, price) - record.cost_basis if price is not None else None),
+        })
+    return {
+        'effective_date': table.effective_date.isoformat(),
+        'positions': positions,
+        'realized_pnl': sum((position['realized_pnl'] for position in positions), Decimal('0.00')),
+        'unrealized_pnl': sum((
+            position['unrealized_pnl'] for position in positions
+            if position['unrealized_pnl'] is not None), Decimal('0.00')),
+    }
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+
+from cantor_application import db
+from cantor_application.models.pnl_position import PnlPosition
+from cantor_application.models.user import User
+from cantor_application.pnl.positions import RunningPosition, pnl_report, rebuild_positions
+from cantor_application.rates.quote import Quote
+from cantor_application.rates.table import RateEntry, RateTable
+
+DAY = datetime.date(2024, 3, 5)
+
+
+def positions():
+    return {
+        record.currency_symbol: (record.quantity, record.cost_basis, record.realized_pnl)
+        for record in PnlPosition.query.filter_by(user_id=1)
+    }
+
+
+def test_running_position_uses_average_cost():
+    position = RunningPosition()
+    position.apply(10, 4.0)
+    position.apply(10, 5.0)
+    position.apply(-5, 6.0)
+    assert (position.quantity, position.cost_basis, position.realized_pnl) == (15, 67.5, 7.5)
+    position.apply(-15, 4.0)
+    assert (position.quantity, position.cost_basis, position.realized_pnl) == (0, 0.0, 0.0)
+
+def test_trades_update_positions_like_a_rebuild(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        for amount, price in ((10, 4.0), (10, 5.0), (-5, 6.0), (4, 3.0), (-19, 4.5)):
+            quote = Quote('usd', 'dolar amerykański', price)
+            if amount > 0:
+                assert user.purchase(amount * price, user, 'usd', amount, quote)
+            else:
+                assert user.sell('usd', -amount, -amount * price, user, quote)
+        assert user.purchase(8.0, user, 'eur', 2, Quote('eur', 'euro', 4.0))
+
+        incremental = positions()
+        assert incremental['usd'][:2] == (0, 0.0)
+        assert incremental['usd'][2] == pytest.approx(7.5 + 19 * 4.5 - 79.5)
+        assert rebuild_positions(batch_size=2) == 2
+        assert positions() == pytest.approx(incremental)
+
+def test_report_values_open_positions(trading_app):
+    with trading_app.app_context():
+        user = db.session.get(User, 1)
+        assert user.purchase(40.0, user, 'usd', 10, Quote('usd', 'dolar amerykański', 4.0))
+        assert user.sell('usd', 5, 25.0, user, Quote('usd', 'dolar amerykański', 5.0))
+
+        report = pnl_report(1, RateTable('045/A/NBP/2024', DAY, [
+            RateEntry('USD', 'dolar amerykański', 4.5, DAY)]))
+        assert report['realized_pnl'] == 5.0
+        assert report['unrealized_pnl'] == 2.5
+        assert report['positions'][0]['average_cost'] == 4.0
@@ -0,0 +1,237 @@
+"""Module providing the valuation of users' portfolios in PLN.
+
+This module defines the PriceVector, Holding and Valuation classes and
+the value_portfolio function. Every exchange rate table is turned once
+into a PriceVector, a symbol index over a flat `array('q')` of prices in
+1e-8 PLN units, so a portfolio is priced in one pass of index lookups and
+one element-wise integer multiplication instead of a `lookup` call per
+holding. Valuations are kept per user in the valuation cache of the
+application together with the portfolio version and the PLN balance of
+the user; every trade increases the version in the same transaction. A
+cached valuation is used only while the version read from the database
+is unchanged and the application holds no newer rate table, so a trade
+handled by any worker process outdates the valuations of every other
+one, at the cost of one primary key lookup per hit, which also reads the
+balance shown next to the valuation.
+
+"""
+import operator
+import threading
+from array import array
+from dataclasses import dataclass
+from decimal import Decimal
+
+from cantor_application import db
+from cantor_application.helpers import current_table, rate_snapshot
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.models.user import User
+from cantor_application.money import RATE_PLACES, to_pln, to_rate
+from cantor_application.services import get_services
+
+
+class PriceVector:
+    """Class representing the prices of one exchange rate table as a flat array.
+
+    Attributes:
+        table_number (str): The number of the table the prices come from.
+        effective_date (date): The day the table was published for.
+        index (dict): Lowercase symbols mapped to positions in the arrays.
+        prices (array): The mid rates in 1e-8 PLN units, in the order of the index.
+        names (list): The currency names, in the order of the index.
+
+    Methods:
+        price: Multiplies the amounts by the prices of their symbols.
+    """
+
+    def __init__(self, table) -> None:
+        entries = list(table)
+        self.table_number = table.number
+        self.effective_date = table.effective_date
+        self.index = {entry.symbol.lower(): position for position, entry in enumerate(entries)}
+        self.prices = array('q', (int(to_rate(entry.mid).scaleb(RATE_PLACES)) for entry in entries))
+        self.names = [entry.name for entry in entries]
+
+    def price(self, symbols, amounts):
+        """Prices the amounts of the symbols in one pass.
+
+        Args:
+            symbols (list): Lowercase currency symbols.
+            amounts (list): Amounts of the currencies, in the order of the symbols.
+
+        Returns:
+            tuple: Positions of the symbols in the index, None for unknown symbols,
+            and the prices and values of the amounts as arrays of 1e-8 PLN units,
+            0 for unknown symbols.
+        """
+        positions = list(map(self.index.get, symbols))
+        prices = array('q', (
+            self.prices[position] if position is not None else 0 for position in positions
+        ))
+        values = array('q', map(operator.mul, array('q', amounts), prices))
+        return positions, prices, values
+
+
+_vector_lock = threading.Lock()
+_vector = None
+
+
+def price_vector(table) -> PriceVector:
+    """Returns the PriceVector of the table, built once per published table."""
+    global _vector  # pylint: disable=global-statement
+    with _vector_lock:
+        if _vector is None or _vector.table_number != table.number:
+            _vector = PriceVector(table)
+        return _vector
+
+
+@dataclass(frozen=True)
+class Holding:
+    """Class representing one valued currency of a portfolio.
+
+    Attributes:
+        symbol (str): The lowercase symbol of the currency.
+        name (str): The name of the currency, None if the table does not list it.
+        amount (int): The amount held.
+        price (Decimal): The price of one unit in PLN, None if unknown.
+        value (Decimal): The value of the amount in PLN, None if unknown.
+    """
+    symbol: str
+    name: str
+    amount: int
+    price: Decimal
+    value: Decimal
+
+    def as_dict(self) -> dict:
+        """Returns the holding as a JSON serializable dictionary."""
+        return {
+            'symbol': self.symbol,
+            'name': self.name,
+            'amount': self.amount,
+            'price': self.price,
+            'value': self.value,
+        }
+
+
+@dataclass(frozen=True)
+class Valuation:
+    """Class representing the value of a user's portfolio at one exchange rate table.
+
+    Attributes:
+        table_number (str): The number of the table the portfolio was priced with.
+        effective_date (date): The day the table was published for.
+        holdings (tuple): The valued Holding objects, ordered by symbol.
+        total (Decimal): The value of all priced holdings in PLN.
+    """
+    table_number: str
+    effective_date: object
+    holdings: tuple
+    total: Decimal
+
+    def as_dict(self) -> dict:
+        """Returns the valuation as a JSON serializable dictionary."""
+        return {
+            'effective_date': self.effective_date.isoformat(),
+            'holdings': [holding.as_dict() for holding in self.holdings],
+            'total': self.total,
+        }
+
+
+def value_portfolio(user_id: int, table):
+    """Values every holding of the user with the prices of the table.
+
+    Args:
+        user_id (int): The ID of the user.
+        table (RateTable): The exchange rates to price the portfolio with.
+
+    Returns:
+        Valuation: The value of the portfolio.
+    """
+    rows = db.session.execute(
+        db.select(Portfolio.currency_symbol, Portfolio.currency_amount)
+        .where(Portfolio.user_id == user_id)
+        .order_by(Portfolio.currency_symbol)
+        ).all()
+    symbols = [symbol for symbol, _ in rows]
+    amounts = [amount for _, amount in rows]
+    vector = price_vector(table)
+    positions, prices, values = vector.price(symbols, amounts)
+
+    holdings = tuple(
+        Holding(symbol, vector.names[position], amount,
+                Decimal(price).scaleb(-RATE_PLACES), to_pln(Decimal(value).scaleb(-RATE_PLACES)))
+        if position is not None else Holding(symbol, None, amount, None, None)
+        for symbol, amount, position, price, value in zip(symbols, amounts, positions, prices, values)
+    )
+    total = sum((holding.value for holding in holdings if holding.value is not None), Decimal('0.00'))
+    return Valuation(table.number, table.effective_date, holdings, total)
+
+
+def _portfolio_state(user_id: int):
+    """Returns the portfolio version and the PLN balance of the user, None if there is no such user."""
+    return db.session.execute(
+        db.select(User.portfolio_version, User.amount_of_pln).where(User.id == user_id)
+        ).first()
+
+
+def load_valuation(user_id: int, state=None):
+    """Values the portfolio of the user for the valuation cache.
+
+    Args:
+        user_id (int): The ID of the user.
+        state (Row): The portfolio version and PLN balance of the user, read
+        before the valuation, None to read them here.
+
+    Returns:
+        tuple or None: The portfolio version and PLN balance of the user and the
+        Valuation, None if the exchange rates are not available.
+    """
+    table = rate_snapshot()
+    if table is None:
+        return None
+    # The version is read first: a trade committed meanwhile makes the entry outdated, never stale.
+    if state is None:
+        state = _portfolio_state(user_id)
+    return state, value_portfolio(user_id, table)
+
+
+def portfolio_summary(user_id: int) -> tuple:
+    """Returns the PLN balance of the user and the valuation of their portfolio.
+
+    A cached valuation is returned as long as the user has not traded, in any
+    process, and the application holds no newer rate table than the one it was
+    made with. Every call reads the portfolio version and the balance of the
+    user once, and a hit reads nothing else, so the balance is never older
+    than the valuation.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        tuple: The balance in PLN and the Valuation, None if the exchange rates are not available.
+    """
+    valuation_cache = get_services().valuation_cache
+    state = _portfolio_state(user_id)
+    balance = state.amount_of_pln if state is not None else None
+    entry = valuation_cache.peek(user_id)
+    if entry is not None:
+        table = current_table()
+        if entry[0] == state and (table is None or table.number == entry[1].table_number):
+            return balance, entry[1]
+    entry = load_valuation(user_id, state)
+    if entry is None:
+        valuation_cache.invalidate(user_id)
+        return balance, None
+    valuation_cache.put(user_id, entry)
+    return balance, entry[1]
+
+
+def portfolio_valuation(user_id: int):
+    """Returns the valuation of the user's portfolio at the current exchange rates.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        Valuation or None: The valuation, None if the exchange rates are not available.
+    """
+    return portfolio_summary(user_id)[1]
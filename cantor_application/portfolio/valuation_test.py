@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from cantor_application import db
+from cantor_application.models.portfolio import Portfolio
+from cantor_application.models.user import User
+from cantor_application.portfolio import valuation as valuation_module
+from cantor_application.portfolio.valuation import PriceVector, portfolio_summary, portfolio_valuation
+from cantor_application.rates.quote import Quote
+from cantor_application.rates.table import RateEntry, RateTable
+from cantor_application.services import get_services
+
+DAY = datetime.date(2024, 3, 5)
+
+
+def table(number, usd, eur):
+    return RateTable(number, DAY, [
+        RateEntry('USD', 'dolar amerykański', usd, DAY),
+        RateEntry('EUR', 'euro', eur, DAY),
+    ])
+
+
+@pytest.fixture
+def trading_app(trading_app, monkeypatch):
+    monkeypatch.setattr(get_services(trading_app).rate_refresher, 'snapshot', table('045/A/NBP/2024', 4.0, 5.0))
+    with trading_app.app_context():
+        db.session.add_all([
+            Portfolio(user_id=1, currency_symbol='usd', currency_amount=10),
+            Portfolio(user_id=1, currency_symbol='xau', currency_amount=1),
+        ])
+        db.session.commit()
+    return trading_app
+
+
+def test_price_vector_prices_all_symbols_in_one_pass():
+    vector = PriceVector(table('045/A/NBP/2024', 4.0123, 5.0))
+    positions, prices, values = vector.price(['eur', 'usd', 'xyz'], [2, 3, 1])
+    assert positions == [1, 0, None]
+    assert list(prices) == [500000000, 401230000, 0]
+    assert list(values) == [1000000000, 1203690000, 0]
+
+def test_valuation_is_cached_until_a_trade(trading_app):
+    with trading_app.app_context():
+        valuation = portfolio_valuation(1)
+        assert valuation.total == 40.0
+        assert [(holding.symbol, holding.value) for holding in valuation.holdings] == [
+            ('usd', 40.0), ('xau', None)]
+        assert portfolio_valuation(1) is valuation
+
+        user = db.session.get(User, 1)
+        assert user.purchase(10.0, user, 'eur', 2, Quote('eur', 'euro', 5.0))
+        assert portfolio_valuation(1).total == 50.0
+
+def test_valuation_follows_a_new_rate_table(trading_app, monkeypatch):
+    with trading_app.app_context():
+        assert portfolio_valuation(1).total == 40.0
+        monkeypatch.setattr(get_services().rate_refresher, 'snapshot', table('046/A/NBP/2024', 4.5, 5.0))
+        assert portfolio_valuation(1).total == 45.0
+
+def test_trade_of_another_process_outdates_the_valuation(trading_app, monkeypatch):
+    with trading_app.app_context():
+        assert portfolio_valuation(1).total == 40.0
+        user = db.session.get(User, 1)
+        with monkeypatch.context() as other_process:
+            # Another worker process does not drop the entries of this one.
+            other_process.setattr(get_services().valuation_cache, 'invalidate', lambda key=None: None)
+            assert user.purchase(10.0, user, 'eur', 2, Quote('eur', 'euro', 5.0))
+        amount_of_pln, valuation = portfolio_summary(1)
+        assert (amount_of_pln, valuation.total) == (990, 50.0)
+
+def test_cache_hit_loads_no_rate_table(trading_app, monkeypatch):
+    with trading_app.app_context():
+        valuation = portfolio_valuation(1)
+        monkeypatch.setattr(valuation_module, 'rate_snapshot', lambda: pytest.fail('rate table loaded'))
+        assert portfolio_valuation(1) is valuation
+
+def test_version_is_read_once_per_call(trading_app, monkeypatch):
+    reads = []
+    read_state = valuation_module._portfolio_state  # pylint: disable=protected-access
+    monkeypatch.setattr(valuation_module, '_portfolio_state', lambda user_id: reads.append(user_id) or read_state(user_id))
+    with trading_app.app_context():
+        valuation = portfolio_valuation(1)
+        assert portfolio_valuation(1) is valuation
+    assert reads == [1, 1]
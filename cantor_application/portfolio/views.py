@@ -0,0 +1,27 @@
+from flask import Blueprint, render_template, flash
+from flask_login import login_required, current_user
+from cantor_application.portfolio.valuation import portfolio_summary
+
+portfolio_blueprint = Blueprint('portfolio',__name__, template_folder='templates')
+
+
+@portfolio_blueprint.route('/portfolio', methods = ['GET'])
+@login_required
+def portfolio():
+    """
+    This route values every currency held by the logged-in user in PLN at the current
+    exchange rates and renders the 'portfolio.html' template. The valuation is cached
+    until the user trades or new exchange rates are published.
+
+    Returns:
+    str: Rendered HTML content of the 'portfolio.html' template.
+    """
+    # The balance is read with the portfolio version, not from the user cache, so the two always agree.
+    amount_of_pln, valuation = portfolio_summary(current_user.id)
+    if valuation is None:
+        flash("Exchange rates are not available right now.")
+    return render_template(
+        'portfolio.html',
+        valuation=valuation,
+        amount_of_pln=amount_of_pln
+        )
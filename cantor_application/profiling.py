@@ -0,0 +1,257 @@
+"""Module providing per-request profiling of the application.
+
+This module measures, for every request, the number of SQL statements
+and the time spent in the database, in calls to the NBP Web API and in
+rendering templates. The figures of a request are returned in the
+`X-Query-Count` and `Server-Timing` response headers, so a slow page can
+be traced in the browser's developer tools, and the totals of all
+requests are collected by the Metrics object of the application, which
+renders them in the Prometheus text format for the `/metrics` endpoint,
+together with the hit, miss and eviction counters of the caches.
+The headers of a streamed response, like the history export, are sent
+before its body runs, so they only count the work done up to then; its
+metrics are collected once the body has been sent.
+
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import before_render_template, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from cantor_application.services import get_services
+
+ENVIRON_KEY = 'cantor.profile'
+
+
+class RequestProfile:
+    """Class representing the measurements of one request.
+
+    The profile is kept in the WSGI environ of the request rather than on
+    `flask.g`, so statements run in a nested application context, like the
+    ones of the rate store, are counted as well.
+
+    Attributes:
+        started (float): The performance counter value when the request started.
+        queries (int): Number of executed SQL statements.
+        db_time (float): Seconds spent executing SQL statements.
+        external_time (float): Seconds spent waiting for the NBP Web API.
+        render_time (float): Seconds spent rendering templates.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.external_time = 0.0
+        self.render_time = 0.0
+        self._render_started = []
+
+    def start_render(self):
+        """Notes the start of rendering a template."""
+        self._render_started.append(time.perf_counter())
+
+    def finish_render(self):
+        """Adds the time spent rendering the last started template."""
+        if self._render_started:
+            self.render_time += time.perf_counter() - self._render_started.pop()
+
+    def elapsed(self) -> float:
+        """Returns the number of seconds since the request started."""
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Returns the value of the Server-Timing header of the request."""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'nbp;dur={self.external_time * 1000:.2f}',
+            f'render;dur={self.render_time * 1000:.2f}',
+            f'total;dur={self.elapsed() * 1000:.2f}',
+        ])
+
+
+def current_profile():
+    """Returns the profile of the current request, None outside of a profiled request."""
+    if not has_request_context():
+        return None
+    return request.environ.get(ENVIRON_KEY)
+
+
+@contextmanager
+def external_call():
+    """Adds the time spent inside the block to the external time of the request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = current_profile()
+        if profile is not None:
+            profile.external_time += time.perf_counter() - started
+
+
+class Metrics:
+    """Class collecting the profiles of all requests, grouped by endpoint.
+
+    Methods:
+        observe: Adds the profile of a finished request.
+        render: Returns the collected metrics in the Prometheus text format.
+        reset: Forgets everything collected so far.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, profile: RequestProfile, duration: float):
+        """Adds the profile of a finished request.
+
+        Args:
+            endpoint (str): The endpoint which handled the request.
+            profile (RequestProfile): The measurements of the request.
+            duration (float): Seconds the request took.
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'requests': 0, 'duration': 0.0, 'queries': 0, 'db_time': 0.0,
+                    'external_time': 0.0, 'render_time': 0.0,
+                    'buckets': [0] * len(self.BUCKETS),
+                }
+            stats['requests'] += 1
+            stats['duration'] += duration
+            stats['queries'] += profile.queries
+            stats['db_time'] += profile.db_time
+            stats['external_time'] += profile.external_time
+            stats['render_time'] += profile.render_time
+            for index, bound in enumerate(self.BUCKETS):
+                if duration <= bound:
+                    stats['buckets'][index] += 1
+
+    def render(self) -> str:
+        """Returns the collected metrics in the Prometheus text exposition format."""
+        with self._lock:
+            endpoints = {
+                endpoint: dict(stats, buckets=list(stats['buckets']))
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+
+        lines = [
+            '# HELP cantor_request_duration_seconds Time spent handling requests.',
+            '# TYPE cantor_request_duration_seconds histogram',
+        ]
+        for endpoint, stats in endpoints.items():
+            for bound, count in zip(self.BUCKETS, stats['buckets']):
+                lines.append(
+                    f'cantor_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            lines.append(
+                f'cantor_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} '
+                f'{stats["requests"]}')
+            lines.append(f'cantor_request_duration_seconds_sum{{endpoint="{endpoint}"}} {stats["duration"]}')
+            lines.append(f'cantor_request_duration_seconds_count{{endpoint="{endpoint}"}} {stats["requests"]}')
+
+        for name, key, description in (
+                ('cantor_db_queries_total', 'queries', 'Number of executed SQL statements.'),
+                ('cantor_db_seconds_total', 'db_time', 'Time spent executing SQL statements.'),
+                ('cantor_external_seconds_total', 'external_time', 'Time spent waiting for the NBP Web API.'),
+                ('cantor_render_seconds_total', 'render_time', 'Time spent rendering templates.'),
+                ):
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+            for endpoint, stats in endpoints.items():
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {stats[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Forgets everything collected so far."""
+        with self._lock:
+            self._endpoints.clear()
+
+
+def render_cache_stats(caches: dict) -> str:
+    """Returns the counters of the caches in the Prometheus text exposition format.
+
+    Args:
+        caches (dict): The TTLCache objects by name.
+
+    Returns:
+        str: The counters and the current size of every cache.
+    """
+    stats = {name: cache.stats() for name, cache in sorted(caches.items())}
+    lines = []
+    for name, key, kind, description in (
+            ('cantor_cache_hits_total', 'hits', 'counter', 'Lookups answered with a fresh entry.'),
+            ('cantor_cache_stale_hits_total', 'stale_hits', 'counter', 'Lookups answered with a stale entry.'),
+            ('cantor_cache_misses_total', 'misses', 'counter', 'Lookups which had to load the value.'),
+            ('cantor_cache_evictions_total', 'evictions', 'counter', 'Entries dropped because the cache was full.'),
+            ('cantor_cache_size', 'size', 'gauge', 'Number of cached entries.'),
+            ):
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for cache, counters in stats.items():
+            lines.append(f'{name}{{cache="{cache}"}} {counters[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    """Notes the start time of a statement executed inside a request."""
+    if current_profile() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    """Adds a finished statement to the profile of the request."""
+    profile = current_profile()
+    started = conn.info.get('query_started')
+    if profile is not None and started:
+        profile.queries += 1
+        profile.db_time += time.perf_counter() - started.pop()
+
+
+def _start_render(sender, template, context, **extra):
+    """Notes the start of rendering a template inside a request."""
+    profile = current_profile()
+    if profile is not None:
+        profile.start_render()
+
+
+def _finish_render(sender, template, context, **extra):
+    """Adds a rendered template to the profile of the request."""
+    profile = current_profile()
+    if profile is not None:
+        profile.finish_render()
+
+
+def init_profiling(app):
+    """Registers the profiling hooks, response headers and metrics on the application.
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _start_query):
+        event.listen(Engine, 'before_cursor_execute', _start_query)
+        event.listen(Engine, 'after_cursor_execute', _finish_query)
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_finish_render, app)
+
+    @app.before_request
+    def start_profiling():
+        request.environ[ENVIRON_KEY] = RequestProfile()
+
+    @app.after_request
+    def add_profiling_headers(response):
+        profile = current_profile()
+        if profile is not None:
+            response.headers['X-Query-Count'] = str(profile.queries)
+            response.headers['Server-Timing'] = profile.server_timing()
+            endpoint = request.endpoint or 'unknown'
+            metrics = get_services().metrics
+            if response.is_streamed:
+                response.call_on_close(lambda: metrics.observe(endpoint, profile, profile.elapsed()))
+            else:
+                metrics.observe(endpoint, profile, profile.elapsed())
+        return response
@@ -0,0 +1,58 @@
+import pytest
+from flask import render_template_string, request
+
+from cantor_application.profiling import ENVIRON_KEY, RequestProfile
+from cantor_application.services import get_services
+
+
+@pytest.fixture
+def trader_balance():
+    return 10000
+
+
+def test_authenticated_request_loads_user_once(client):
+    # One query loads the user, one the page of the history.
+    response = client.get('/history')
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '2'
+
+def test_warm_user_cache_needs_no_user_query(client):
+    client.get('/history')
+    response = client.get('/history?symbol=usd')
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '1'
+
+def test_server_timing_reports_every_component(client):
+    response = client.get('/history/export')
+    timing = dict(
+        (part.split(';')[0], part) for part in response.headers['Server-Timing'].split(', '))
+    assert set(timing) == {'db', 'nbp', 'render', 'total'}
+    assert f'desc="{response.headers["X-Query-Count"]} queries"' in timing['db']
+
+def test_rendering_time_is_measured(trading_app):
+    with trading_app.test_request_context():
+        profile = request.environ[ENVIRON_KEY] = RequestProfile()
+        render_template_string('{% for i in range(1000) %}{{ i }}{% endfor %}')
+    assert profile.render_time > 0
+
+def test_metrics_are_exposed_in_prometheus_format(client, trading_app):
+    get_services(trading_app).metrics.reset()
+    for _ in range(2):
+        # The metrics of a streamed response are collected when the server closes it.
+        with client.get('/history/export') as export:
+            export.get_data()
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'cantor_request_duration_seconds_count{endpoint="history.export"} 2' in body
+    assert '# TYPE cantor_db_queries_total counter' in body
+    # The user query of the first export and the history queries of both streamed bodies.
+    assert 'cantor_db_queries_total{endpoint="history.export"} 3' in body
+    assert 'cantor_external_seconds_total{endpoint="history.export"}' in body
+    # The first export loads the user, the second one finds it in the user cache.
+    assert '# TYPE cantor_cache_misses_total counter' in body
+    assert 'cantor_cache_misses_total{cache="user"} 1' in body
+    assert 'cantor_cache_hits_total{cache="user"} 1' in body
+    assert 'cantor_cache_size{cache="user"} 1' in body
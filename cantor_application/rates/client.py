@@ -0,0 +1,169 @@
+"""Module representing the HTTP client of the NBP Web API.
+
+This module defines the NbpClient class, which keeps one pooled
+`requests.Session` with keep-alive connections for all calls to the
+NBP Web API, and the SingleFlight class, which lets concurrent calls for
+the same resource share a single in-flight request instead of sending
+identical requests side by side.
+
+"""
+import threading
+
+from cantor_application.profiling import external_call
+
+NBP_API_URL = 'http://api.nbp.pl/api'
+
+
+class _Call:
+    """One in-flight call shared by every caller asking for the same key."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Class coalescing concurrent calls made with the same key.
+
+    The first caller of a key runs the function, the callers arriving while
+    it runs wait for it and get the same result or exception.
+
+    Attributes:
+        calls (int): Number of calls which ran the function.
+        coalesced (int): Number of calls which waited for another caller instead.
+
+    Methods:
+        do: Runs the function once for all concurrent callers of the key.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """Runs the function, or waits for the call already running for the key.
+
+        Args:
+            key: The key identifying the call.
+            function (callable): The function to call without arguments.
+
+        Returns:
+            The result of the function.
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[key] = call
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+
+class NbpClient:
+    """Class representing a pooled, coalescing client of the NBP Web API.
+
+    Attributes:
+        base_url (str): The address of the NBP Web API.
+        timeout (float): Timeout of a request in seconds.
+        pool_size (int): Number of keep-alive connections kept in the pool.
+        requests_sent (int): Number of requests actually sent to the API.
+
+    Methods:
+        get_json: Sends a GET request for the path and decodes the JSON answer.
+        stats: Returns the counters of the client.
+        close: Closes the pooled connections.
+    """
+
+    def __init__(self, base_url: str = NBP_API_URL, timeout: float = 10,
+                 pool_size: int = 10) -> None:
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.requests_sent = 0
+        self._single_flight = SingleFlight()
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled `requests.Session`, created on first use."""
+        with self._lock:
+            if self._session is None:
+                # requests is imported by the first call, not by the application start.
+                from requests import Session  # pylint: disable=import-outside-toplevel
+                from requests.adapters import HTTPAdapter  # pylint: disable=import-outside-toplevel
+
+                session = Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['Accept'] = 'application/json'
+                self._session = session
+            return self._session
+
+    def get_json(self, path: str):
+        """Sends a GET request and returns the decoded JSON answer.
+
+        Concurrent calls for the same url share one request. The time spent
+        waiting for the answer is added to the profile of the current request.
+
+        Args:
+            path (str): The path of the resource, relative to base_url.
+
+        Raises:
+            requests.exceptions.RequestException: The request failed.
+            ValueError: The answer is not valid JSON.
+
+        Returns:
+            The decoded JSON answer.
+        """
+        url = f'{self.base_url.rstrip("/")}/{path.lstrip("/")}'
+        with external_call():
+            return self._single_flight.do(url, lambda: self._get(url))
+
+    def stats(self) -> dict:
+        """Returns the number of sent and coalesced requests.
+
+        Returns:
+            dict: requests_sent and coalesced counters.
+        """
+        return {
+            'requests_sent': self.requests_sent,
+            'coalesced': self._single_flight.coalesced,
+        }
+
+    def close(self):
+        """Closes the pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _get(self, url: str):
+        with self._lock:
+            self.requests_sent += 1
+        with self.session.get(url, timeout=self.timeout) as content:
+            content.raise_for_status()
+            return content.json()
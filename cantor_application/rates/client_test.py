@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+import requests
+
+from cantor_application.rates.client import NbpClient, SingleFlight
+from cantor_application.rates.nbp_stub import StubNbpServer
+
+
+@pytest.fixture
+def slow_nbp():
+    with StubNbpServer(delay=0.2) as server:
+        yield server
+
+
+def run_concurrently(function, count):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        results[index] = function()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_requests_are_coalesced(slow_nbp):
+    client = NbpClient(slow_nbp.base_url)
+    results = run_concurrently(lambda: client.get_json('exchangerates/rates/A/usd/'), 20)
+    assert all(result['code'] == 'USD' for result in results)
+    assert slow_nbp.request_count == 1
+    assert client.stats() == {'requests_sent': 1, 'coalesced': 19}
+
+def test_different_requests_are_not_coalesced(slow_nbp):
+    client = NbpClient(slow_nbp.base_url)
+    client.get_json('exchangerates/rates/A/usd/')
+    client.get_json('exchangerates/rates/A/eur/')
+    assert slow_nbp.request_count == 2
+
+def test_error_is_shared_by_waiting_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait()
+        raise requests.exceptions.ConnectionError('down')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('usd', failing)
+        except requests.exceptions.ConnectionError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flight.coalesced == 0:
+        started.wait(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
@@ -0,0 +1,135 @@
+"""Module providing a local stand-in for the NBP Web API.
+
+This module defines the StubNbpServer class, a tiny HTTP server running in
+a background thread which answers the `exchangerates/tables/A` and
+`exchangerates/rates/A/{symbol}` endpoints from a given list of rates.
+It counts the requests it receives and can delay every answer, so tests
+and benchmarks can drive the rate loaders without the real API.
+
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RATES = {
+    'USD': ('dolar amerykański', 3.9821),
+    'EUR': ('euro', 4.3215),
+    'CHF': ('frank szwajcarski', 4.4987),
+    'GBP': ('funt szterling', 5.0562),
+}
+
+
+class _Server(ThreadingHTTPServer):
+    """Threading HTTP server accepting bursts of concurrent connections."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubNbpServer:
+    """Class representing a local stand-in server of the NBP Web API.
+
+    Attributes:
+        rates (dict): Mapping of uppercase symbols to (name, mid) tuples.
+        effective_date (str): The ISO date reported for every rate.
+        delay (float): Number of seconds every answer is delayed.
+        request_count (int): Number of requests received so far.
+        base_url (str): The address to use instead of the NBP Web API.
+
+    Methods:
+        start: Starts the server in a background thread.
+        stop: Stops the server.
+    """
+
+    def __init__(self, rates=None, effective_date: str = '2024-03-05', delay: float = 0) -> None:
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.effective_date = effective_date
+        self.delay = delay
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/api'
+
+    def start(self) -> 'StubNbpServer':
+        """Starts the server in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server and waits for its thread."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'StubNbpServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def table(self) -> list:
+        """Returns the answer of the `exchangerates/tables/A` endpoint."""
+        return [{
+            'table': 'A',
+            'no': '045/A/NBP/2024',
+            'effectiveDate': self.effective_date,
+            'rates': [
+                {'currency': name, 'code': symbol, 'mid': mid}
+                for symbol, (name, mid) in self.rates.items()
+            ],
+        }]
+
+    def rate(self, symbol: str):
+        """Returns the answer of the `exchangerates/rates/A/{symbol}` endpoint."""
+        if symbol.upper() not in self.rates:
+            return None
+        name, mid = self.rates[symbol.upper()]
+        return {
+            'table': 'A',
+            'currency': name,
+            'code': symbol.upper(),
+            'rates': [{'no': '045/A/NBP/2024', 'effectiveDate': self.effective_date, 'mid': mid}],
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers the NBP endpoints from the rates of the stub."""
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                parts = [part for part in self.path.split('?')[0].split('/') if part]
+                body = None
+                if parts[:4] == ['api', 'exchangerates', 'tables', 'A']:
+                    body = stub.table()
+                elif parts[:4] == ['api', 'exchangerates', 'rates', 'A'] and len(parts) > 4:
+                    body = stub.rate(parts[4])
+
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                """Keeps the test output quiet."""
+
+        return Handler
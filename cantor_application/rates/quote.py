@@ -0,0 +1,54 @@
+"""Module representing the Quote class and request-scoped quote resolution.
+
+This module defines the Quote class, an immutable price of a currency
+resolved once per request. The same Quote object is used to validate the
+form, to price the order and to write the transaction history, so a single
+trade asks for the exchange rate only once and records exactly the price
+the user paid.
+
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from flask import g
+
+from cantor_application import money
+from cantor_application.helpers import lookup
+
+
+@dataclass(frozen=True)
+class Quote:
+    """Class representing the exchange rate of a currency at the time of a request.
+
+    Attributes:
+        symbol (str): The lowercase symbol of the currency, as stored in the portfolio.
+        name (str): The name of the currency.
+        price (Decimal): The price of one unit of the currency in PLN, rounded to 1e-8.
+    """
+    symbol: str
+    name: str
+    price: Decimal
+
+    def __post_init__(self):
+        object.__setattr__(self, 'price', money.to_rate(self.price))
+
+    def value_of(self, amount: int) -> Decimal:
+        """Returns the value of the given amount of the currency in PLN, rounded to grosze."""
+        return money.value_of(amount, self.price)
+
+
+def get_quote(symbol: str):
+    """Resolves the quote for the symbol once per request.
+
+    Args:
+        symbol (str): The symbol of the currency.
+
+    Returns:
+        Quote or None: The quote of the currency, None if the symbol does not exist.
+    """
+    quotes = g.setdefault('quotes', {})
+    key = symbol.lower()
+    if key not in quotes:
+        price, name = lookup(key)
+        quotes[key] = Quote(key, name, price) if price is not None else None
+    return quotes[key]
@@ -0,0 +1,80 @@
+"""Module representing the background exchange rate refresher.
+
+This module defines the RateRefresher class, a daemon thread which reloads
+NBP table A on a fixed interval and publishes it as an immutable RateTable
+snapshot. The snapshot is replaced by a single attribute assignment, so
+request handlers read it without locks and never wait for the network.
+On start the latest stored table is published first, so a restarted
+application has rates before the first download finishes.
+
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RateRefresher:
+    """Class refreshing exchange rates in a background thread.
+
+    Attributes:
+        loader (RateTableLoader): The loader used to download the table.
+        interval (float): Number of seconds between two refreshes.
+        snapshot (RateTable): The last published table, None before the first refresh.
+
+    Methods:
+        start: Starts the background thread.
+        stop: Stops the background thread.
+        refresh: Loads the table once and publishes it.
+    """
+
+    def __init__(self, loader, interval: float = 3600) -> None:
+        self.loader = loader
+        self.interval = interval
+        self.snapshot = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts the background thread, refreshing the rates straight away."""
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='rate-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread and waits for it."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def refresh(self):
+        """Loads the table and swaps it in as the new snapshot.
+
+        When the API does not answer, the previous snapshot stays published.
+
+        Returns:
+            RateTable or None: The new snapshot, None if loading failed.
+        """
+        table = self.loader.load()
+        if table is None:
+            logger.warning('Exchange rates could not be refreshed, keeping %s', self.snapshot)
+            return None
+        self.snapshot = table
+        return table
+
+    def _run(self):
+        if self.snapshot is None and self.loader.store is not None:
+            self.snapshot = self.loader.store.latest_table()
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Exchange rate refresher failed')
+            self._stopped.wait(self.interval)
@@ -0,0 +1,44 @@
+import pytest
+
+from cantor_application.rates.client import NbpClient
+from cantor_application.rates.nbp_stub import StubNbpServer
+from cantor_application.rates.refresher import RateRefresher
+from cantor_application.rates.table import RateTableLoader
+
+
+@pytest.fixture
+def nbp():
+    with StubNbpServer() as server:
+        yield server
+
+
+def test_refresh_swaps_in_new_snapshot(nbp):
+    refresher = RateRefresher(RateTableLoader(NbpClient(nbp.base_url)))
+    first = refresher.refresh()
+    assert refresher.snapshot is first
+    nbp.rates['USD'] = ('dolar amerykański', 4.0)
+    second = refresher.refresh()
+    assert refresher.snapshot is second
+    assert first.get('USD').mid == 3.9821
+    assert second.get('USD').mid == 4.0
+
+def test_failed_refresh_keeps_previous_snapshot(nbp):
+    loader = RateTableLoader(NbpClient(nbp.base_url))
+    refresher = RateRefresher(loader)
+    table = refresher.refresh()
+    loader.client.base_url = nbp.base_url + '/missing'
+    assert refresher.refresh() is None
+    assert refresher.snapshot is table
+
+def test_background_thread_publishes_snapshot(nbp):
+    refresher = RateRefresher(RateTableLoader(NbpClient(nbp.base_url)), interval=60)
+    refresher.start()
+    try:
+        for _ in range(100):
+            if refresher.snapshot is not None:
+                break
+            refresher._stopped.wait(0.01)
+        assert refresher.snapshot.get('EUR').mid == 4.3215
+    finally:
+        refresher.stop()
+    assert not refresher.running
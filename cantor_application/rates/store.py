@@ -0,0 +1,107 @@
+"""Module representing the database store of exchange rates.
+
+This module defines the RateStore class, which saves every table
+downloaded from the NBP Web API into the `rate` table and reads the
+latest full table back, with its NBP number, so a restarted process has
+rates without calling the API and keeps the valuations made with them
+when the same table is downloaded again. Every call runs in its own
+context of the application passed to init_app, so it can be used from
+background threads and never commits the session of a request.
+
+"""
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from cantor_application import db
+from cantor_application.models.rate import Rate
+from cantor_application.rates.table import RateEntry, RateTable
+
+logger = logging.getLogger(__name__)
+
+
+class RateStore:
+    """Class saving exchange rate tables to the database and reading them back.
+
+    Attributes:
+        app (Flask): The application whose database the rates are stored in.
+
+    Methods:
+        init_app: Binds the store to an application.
+        save_table: Stores the rates of a table which are not stored yet.
+        latest_table: Returns the latest stored table.
+    """
+
+    def __init__(self, app=None) -> None:
+        self.app = app
+
+    def init_app(self, app):
+        """Binds the store to the application whose database it uses.
+
+        Args:
+            app (Flask): The application.
+        """
+        self.app = app
+
+    def save_table(self, table: RateTable):
+        """Stores the rates of the table which are not stored yet.
+
+        Args:
+            table (RateTable): The table downloaded from the NBP Web API.
+        """
+        with self.app.app_context():
+            try:
+                stored = {
+                    symbol for symbol, in db.session.query(Rate.currency_symbol)
+                    .filter(Rate.effective_date == table.effective_date)
+                }
+                db.session.add_all([
+                    Rate(
+                        currency_symbol=entry.symbol,
+                        currency_name=entry.name,
+                        mid=entry.mid,
+                        effective_date=entry.effective_date,
+                        table_number=table.number,
+                        fetched_at=table.fetched_at)
+                    for entry in table if entry.symbol not in stored
+                ])
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                logger.exception('Exchange rates of %s could not be saved', table.effective_date)
+
+    def latest_table(self, max_age: float = None):
+        """Returns the table of the latest stored effective date.
+
+        Args:
+            max_age (float): Maximal number of seconds since the table was fetched,
+            None to accept a table of any age.
+
+        Returns:
+            RateTable or None: The table, None if nothing young enough is stored.
+        """
+        with self.app.app_context():
+            try:
+                effective_date = db.session.query(db.func.max(Rate.effective_date)).scalar()
+                if effective_date is None:
+                    return None
+                rates = Rate.query.filter_by(effective_date=effective_date).all()
+            except SQLAlchemyError:
+                logger.exception('Exchange rates could not be read from the database')
+                return None
+
+        fetched_at = max(rate.fetched_at for rate in rates)
+        # Rates stored before the table number was kept are numbered by their day.
+        number = next((rate.table_number for rate in rates if rate.table_number), f'{effective_date}/A/NBP')
+        table = RateTable(
+            number,
+            effective_date,
+            [self._entry(rate) for rate in rates],
+            fetched_at=fetched_at)
+        if max_age is not None and table.age() >= max_age:
+            return None
+        return table
+
+    @staticmethod
+    def _entry(rate: Rate) -> RateEntry:
+        return RateEntry(rate.currency_symbol, rate.currency_name, rate.mid, rate.effective_date)
@@ -0,0 +1,73 @@
+import datetime
+
+import pytest
+from flask import Flask
+
+from cantor_application import db
+from cantor_application.models.rate import Rate
+from cantor_application.rates.store import RateStore
+from cantor_application.rates.table import RateEntry, RateTable, RateTableLoader
+
+MONDAY = datetime.date(2024, 3, 4)
+TUESDAY = datetime.date(2024, 3, 5)
+
+
+def table(day, fetched_at=None, **rates):
+    return RateTable(f'{day.day:03}/A/NBP/{day.year}', day, [
+        RateEntry(symbol, symbol.lower(), mid, day) for symbol, mid in rates.items()
+    ], fetched_at=fetched_at)
+
+
+class OfflineClient:
+    """NBP client of a restarted process which has no network."""
+
+    def get_json(self, path):
+        raise OSError('NBP Web API unreachable')
+
+
+@pytest.fixture
+def store(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "rates.db"}'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return RateStore(app)
+
+
+def stored_rates(store):
+    with store.app.app_context():
+        return sorted((rate.currency_symbol, rate.effective_date, rate.mid) for rate in Rate.query)
+
+
+def test_each_rate_is_saved_once_per_day(store):
+    store.save_table(table(MONDAY, USD=4.0, EUR=4.3))
+    # A later download of the same table, which meanwhile lists another currency.
+    store.save_table(table(MONDAY, USD=4.1, EUR=4.3, CHF=4.5))
+    store.save_table(table(TUESDAY, USD=3.9))
+    assert stored_rates(store) == [
+        ('CHF', MONDAY, 4.5), ('EUR', MONDAY, 4.3), ('USD', MONDAY, 4.0), ('USD', TUESDAY, 3.9)]
+
+def test_latest_table_respects_max_age(store):
+    assert store.latest_table() is None
+    fetched_at = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(hours=2)
+    store.save_table(table(MONDAY, fetched_at, USD=4.0))
+    store.save_table(table(TUESDAY, fetched_at, USD=3.9, EUR=4.2))
+
+    latest = store.latest_table()
+    assert (latest.number, latest.effective_date) == ('005/A/NBP/2024', TUESDAY)
+    assert sorted(entry.symbol for entry in latest) == ['EUR', 'USD']
+    assert latest.fetched_at == fetched_at
+    assert store.latest_table(max_age=3 * 3600) is not None
+    assert store.latest_table(max_age=3600) is None
+
+def test_restarted_loader_starts_from_the_stored_table(store):
+    store.save_table(table(TUESDAY, USD=3.9))
+    loader = RateTableLoader(OfflineClient(), store)
+    assert loader.load() is None
+
+    warm = loader.fresh_table(3600)
+    assert warm.get('usd').mid == 3.9
+    assert loader.table is warm
+    assert loader.fresh_table(3600) is warm
+    assert loader.fresh_table(0) is None
@@ -0,0 +1,161 @@
+"""Module representing the exchange rate table of the NBP Web API.
+
+This module defines the RateEntry and RateTable classes, an in-memory
+symbol -> (mid, name, effective date) index of NBP table A, and the
+RateTableLoader class which pulls the whole table in one request of the
+pooled NbpClient instead of asking for every currency separately.
+Downloaded tables are saved to an optional store, and a table fetched
+recently enough is taken from that store instead of the network.
+
+"""
+import datetime
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from cantor_application.rates.client import NbpClient
+
+
+@dataclass(frozen=True)
+class RateEntry:
+    """Class representing one currency of the exchange rate table.
+
+    Attributes:
+        symbol (str): The uppercase ISO 4217 symbol of the currency.
+        name (str): The name of the currency.
+        mid (float): The average exchange rate of the currency in PLN.
+        effective_date (date): The day the rate was published for.
+    """
+    symbol: str
+    name: str
+    mid: float
+    effective_date: datetime.date
+
+
+class RateTable:
+    """Class representing an immutable index of exchange rates by currency symbol.
+
+    Attributes:
+        number (str): The number of the table, e.g. '045/A/NBP/2024'.
+        effective_date (date): The day the table was published for.
+        fetched_at (datetime): The date and time the table was fetched from the API.
+        rates (Mapping): Read-only mapping of uppercase symbols to RateEntry objects.
+
+    Methods:
+        from_nbp: Builds the table from the JSON returned by the NBP Web API.
+        get: Returns the entry for a symbol.
+    """
+
+    def __init__(self, number: str, effective_date: datetime.date, entries,
+                 fetched_at: datetime.datetime = None) -> None:
+        self.number = number
+        self.effective_date = effective_date
+        self.fetched_at = fetched_at or datetime.datetime.now().replace(microsecond=0)
+        self.rates = MappingProxyType({entry.symbol: entry for entry in entries})
+
+    @classmethod
+    def from_nbp(cls, data) -> 'RateTable':
+        """Builds the table from the JSON of the `exchangerates/tables/A` endpoint.
+
+        Args:
+            data (list): Decoded JSON answer of the NBP Web API.
+
+        Raises:
+            KeyError, IndexError, ValueError: The answer has an unexpected shape.
+
+        Returns:
+            RateTable: The parsed table.
+        """
+        table = data[0]
+        effective_date = datetime.date.fromisoformat(table['effectiveDate'])
+        entries = [
+            RateEntry(rate['code'].upper(), rate['currency'], float(rate['mid']), effective_date)
+            for rate in table['rates']
+        ]
+        return cls(table['no'], effective_date, entries)
+
+    def get(self, symbol: str):
+        """Returns the entry for the symbol.
+
+        Args:
+            symbol (str): The symbol of the currency, in any case.
+
+        Returns:
+            RateEntry or None: The entry, None if the table does not list the currency.
+        """
+        return self.rates.get(symbol.upper())
+
+    def __contains__(self, symbol) -> bool:
+        return symbol.upper() in self.rates
+
+    def __iter__(self):
+        return iter(self.rates.values())
+
+    def __len__(self) -> int:
+        return len(self.rates)
+
+    def age(self) -> float:
+        """Returns the number of seconds since the table was fetched."""
+        return (datetime.datetime.now() - self.fetched_at).total_seconds()
+
+    def __repr__(self) -> str:
+        return f'RateTable: {self.number}, {self.effective_date}, {len(self)} rates'
+
+
+class RateTableLoader:
+    """Class loading NBP table A in one request and keeping the last loaded table.
+
+    Attributes:
+        client (NbpClient): The client used to call the NBP Web API.
+        store (RateStore): Optional store the downloaded tables are saved to.
+        table (RateTable): The last successfully loaded table, None before the first load.
+
+    Methods:
+        load: Downloads and parses the table.
+        fresh_table: Returns the last table if it is younger than the given age.
+    """
+
+    def __init__(self, client: NbpClient = None, store=None) -> None:
+        self.client = client or NbpClient()
+        self.store = store
+        self.table = None
+
+    def load(self):
+        """Downloads table A, saves it to the store and keeps it as the current table.
+
+        Returns:
+            RateTable or None: The loaded table, None if the API did not answer properly.
+        """
+        try:
+            table = RateTable.from_nbp(self.client.get_json('exchangerates/tables/A/?format=json'))
+        except (
+            ValueError, KeyError, IndexError, TypeError,
+            # requests.exceptions.RequestException is an OSError.
+            OSError
+            ):
+            return None
+
+        self.table = table
+        if self.store is not None:
+            self.store.save_table(table)
+        return table
+
+    def fresh_table(self, max_age: float):
+        """Returns the last table if it was fetched less than max_age seconds ago.
+
+        When the loader has no such table in memory, for example after a restart,
+        the latest table of the store is used if it is young enough.
+
+        Args:
+            max_age (float): Maximal age of the table in seconds.
+
+        Returns:
+            RateTable or None: The table, None if there is no table young enough.
+        """
+        if self.table is not None and self.table.age() < max_age:
+            return self.table
+        if self.store is None:
+            return None
+        table = self.store.latest_table(max_age)
+        if table is not None:
+            self.table = table
+        return table
@@ -0,0 +1,42 @@
+import datetime
+
+import pytest
+
+from cantor_application.rates.client import NbpClient
+from cantor_application.rates.nbp_stub import StubNbpServer
+from cantor_application.rates.table import RateTable, RateTableLoader
+
+
+@pytest.fixture
+def nbp():
+    with StubNbpServer() as server:
+        yield server
+
+
+def test_table_is_parsed_into_index(nbp):
+    table = RateTable.from_nbp(nbp.table())
+    entry = table.get('usd')
+    assert entry.mid == 3.9821
+    assert entry.name == 'dolar amerykański'
+    assert entry.effective_date == datetime.date(2024, 3, 5)
+    assert 'EUR' in table
+    assert len(table) == 4
+
+def test_whole_table_is_loaded_in_one_request(nbp):
+    loader = RateTableLoader(NbpClient(nbp.base_url))
+    table = loader.load()
+    assert table.get('CHF').mid == 4.4987
+    assert table.get('GBP').name == 'funt szterling'
+    assert nbp.request_count == 1
+
+def test_fresh_table_is_kept(nbp):
+    loader = RateTableLoader(NbpClient(nbp.base_url))
+    assert loader.fresh_table(60) is None
+    table = loader.load()
+    assert loader.fresh_table(60) is table
+    assert loader.fresh_table(0) is None
+
+def test_unreachable_api_returns_none(nbp):
+    loader = RateTableLoader(NbpClient(nbp.base_url + '/missing'))
+    assert loader.load() is None
+    assert loader.table is None
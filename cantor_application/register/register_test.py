@@ -0,0 +1,54 @@
+import pytest
+
+from cantor_application import create_app, db
+from cantor_application.models.user import User
+from cantor_application.services import get_services
+
+app = create_app('testing')
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+    yield app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+
+
+def register(client, name, email):
+    return client.post('/register', data={
+        'name': name, 'email': email, 'password': 'Secret1!x', 're_password': 'Secret1!x'})
+
+
+def test_names_and_emails_are_unique_regardless_of_case(client):
+    assert b'registered sucesfully' in register(client, 'client1', 'client@cantor.pl').data
+
+    assert b'already exists' in register(client, 'CLIENT1', 'other@cantor.pl').data
+    response = register(client, 'client2', 'Client@Cantor.pl')
+    assert b'Email &#39;Client@Cantor.pl&#39; already exists.' in response.data
+
+    assert b'registered sucesfully' in register(client, 'client2', 'other@cantor.pl').data
+    with app.app_context():
+        assert db.session.query(User).count() == 2
+
+def test_taken_name_is_refused_before_the_password_is_hashed(client, monkeypatch):
+    register(client, 'client1', 'client@cantor.pl')
+    monkeypatch.setattr(get_services(app).password_hasher, 'hash', lambda password: pytest.fail('password hashed'))
+    assert b'already exists' in register(client, 'Client1', 'client@cantor.pl').data
+
+def test_concurrent_registration_is_rejected_by_the_index(client, monkeypatch):
+    hasher = get_services(app).password_hasher
+    hash_password = hasher.hash
+
+    def register_meanwhile(password):
+        # Another request registers the same name between the lookup and the insert.
+        with app.app_context():
+            db.session.add(User(name='CLIENT3', password='-', email='third@cantor.pl', amount_of_pln=0))
+            db.session.commit()
+        return hash_password(password)
+
+    monkeypatch.setattr(hasher, 'hash', register_meanwhile)
+    response = register(client, 'client3', 'client3@cantor.pl')
+    assert b'User name &#39;client3&#39; already exists.' in response.data
@@ -1,14 +1,23 @@
 from flask import Blueprint, render_template, flash
-from werkzeug.security import generate_password_hash
-from sqlalchemy import func
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
 from cantor_application import db
 from cantor_application.forms.registrationfrom import RegistrationForm
-from cantor_application.models.user import User
+from cantor_application.models.user import User, conflicting_field
+from cantor_application.services import get_services
 
 
 registration_blueprint = Blueprint('register',__name__, template_folder='templates')
 
 
+def _already_exists(form, field: str):
+    if field == 'email':
+        flash(f"Email '{form.email.data}' already exists.")
+    else:
+        flash(f"User name '{form.name.data}' already exists.")
+    return render_template("register.html", form=form)
+
+
 @registration_blueprint.route("/register", methods=["GET", "POST"])
 def register():
     """Registering user and adding to database.
@@ -22,23 +31,16 @@ def register():
     form = RegistrationForm()
 
     if form.validate_on_submit():
-        if (
-            db.session.query(User.name)
-            .filter(func.lower(User.name) == func.lower(form.name.data))
-            .first()
-            is not None
-        ):
-            flash(f"User name '{form.name.data}' already exists.")
-            return render_template("register.html", form=form)
-
-        if (
-            db.session.query(User.email)
-            .filter(func.lower(User.email) == func.lower(form.email.data))
-            .first()
-            is not None
-        ):
-            flash(f"Email '{form.email.data}' already exists.")
-            return render_template("register.html", form=form)
+        # One lookup on the lower() indexes spares hashing the password of a taken name.
+        name_taken = db.session.scalar(
+            db.select(func.lower(User.name) == func.lower(form.name.data))
+            .where(or_(
+                func.lower(User.name) == func.lower(form.name.data),
+                func.lower(User.email) == func.lower(form.email.data)))
+            .limit(1)
+            )
+        if name_taken is not None:
+            return _already_exists(form, 'name' if name_taken else 'email')
 
         if not form.password.data == form.re_password.data:
             flash("Ensure you provide correct pasword twice")
@@ -46,15 +48,21 @@ def register():
 
         new_user = User(
             name=form.name.data,
-            password=generate_password_hash(form.password.data),
+            password=get_services().password_hasher.hash(form.password.data),
             email=form.email.data,
             # give the user 10000 pln.
             amount_of_pln = 10000
 
         )
 
+        # The unique lower(name) and lower(email) indexes still reject a user
+        # registered with the same name or email since the lookup above.
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as error:
+            db.session.rollback()
+            return _already_exists(form, conflicting_field(error))
 
         flash(
             f"Hello '{form.name.data}'! You have been registered sucesfully! Please log in."
@@ -0,0 +1,27 @@
+import datetime
+
+import pytest
+
+from cantor_application.rates import quote
+from cantor_application.rates.table import RateEntry, RateTable
+from cantor_application.services import get_services
+
+DAY = datetime.date(2024, 3, 5)
+
+
+@pytest.fixture(autouse=True)
+def unknown_rates(monkeypatch):
+    monkeypatch.setattr(quote, 'lookup', lambda symbol: (None, None))
+
+
+def test_unknown_symbol_is_rejected_by_the_form(client, trading_app):
+    get_services(trading_app).rate_table_loader.table = RateTable(
+        '045/A/NBP/2024', DAY, [RateEntry('USD', 'dolar amerykański', 4.0, DAY)])
+    response = client.post('/sell', data={'currency': 'XYZ', 'amount': 1})
+    assert b'Wrong currency index' in response.data
+    assert b'Exchange rate is not available' not in response.data
+
+def test_unavailable_rates_cancel_the_sale(client):
+    response = client.post('/sell', data={'currency': 'USD', 'amount': 1})
+    assert b'Exchange rate is not available right now' in response.data
+    assert b'Wrong currency index' not in response.data
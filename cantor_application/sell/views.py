@@ -1,8 +1,6 @@
-from flask import Blueprint, render_template,  flash, session
-from flask_login import login_required
+from flask import Blueprint, render_template,  flash
+from flask_login import login_required, current_user
 from cantor_application.forms.sellform import SellForm
-from cantor_application.helpers import lookup
-from cantor_application.login.views import load_user
 
 sell_blueprint = Blueprint('sell',__name__, template_folder='templates')
 
@@ -29,17 +27,19 @@ def sell():
     """
     form = SellForm()
 
-    user = load_user(session.get('user_id'))
+    user = current_user
 
     if form.validate_on_submit():
-
-        if user.checking_if_can_sell(form.currency.data.lower(), form.amount.data, user):
-
-            #NBP API
-            currency_value, currency_name = lookup(form.currency.data)
-            purchase_value = form.amount.data * currency_value
-            user.sell(form.currency.data.lower(), form.amount.data, purchase_value, user)
-            flash(f"You have successfully sold amount: {form.amount.data} of: {currency_name}")
+        # Quote resolved once by the form validator, None when the NBP Web API did not answer.
+        quote = form.quote
+        if quote is None:
+            flash("Exchange rate is not available right now - transaction canceled.")
+            return render_template('sell.html', form=form)
+        purchase_value = quote.value_of(form.amount.data)
+
+        # The sale is refused atomically when the user does not hold enough currency.
+        if user.sell(quote.symbol, form.amount.data, purchase_value, user, quote):
+            flash(f"You have successfully sold amount: {form.amount.data} of: {quote.name}")
             return render_template('index.html', form=form)
 
         flash("No sufficient amount of currency on your account.")
@@ -0,0 +1,146 @@
+"""Module providing the services of an application.
+
+This module defines the Services class, which holds the clients, caches
+and background threads one application works with, built from its
+config. create_app keeps them in `app.extensions['cantor']`, so every
+application of a process has its own rate cache, user cache, history
+journal and so on, and get_services resolves them through `current_app`.
+
+"""
+from flask import current_app
+
+EXTENSION_KEY = 'cantor'
+
+
+class Services:
+    """Class holding the clients, caches and background threads of one application.
+
+    Attributes:
+        app (Flask): The application the services belong to.
+        nbp_client (NbpClient): Pooled client of the NBP Web API.
+        rate_store (RateStore): Store of the downloaded tables in the database of the application.
+        rate_table_loader (RateTableLoader): Loader of NBP table A.
+        rate_refresher (RateRefresher): Optional background refresher of table A.
+        rate_cache (TTLCache): Exchange rates by currency symbol.
+        user_cache (TTLCache): Column values of recently loaded users.
+        valuation_cache (TTLCache): Portfolio versions, balances and valuations of recently polled portfolios.
+        history_writer (HistoryWriter): Optional write-behind writer of the transaction history.
+        pwned_passwords (PwnedPasswords): The breached password check.
+        password_policy (PasswordPolicy): The password policy of the registration form.
+        password_hasher (PasswordHasher): The password hashing policy.
+        metrics (Metrics): The profiles of the requests, grouped by endpoint.
+        started (bool): True when every enabled background thread is running.
+        caches (dict): The caches of the application by name, as exposed in the metrics.
+
+    Methods:
+        start: Starts the enabled background threads.
+    """
+
+    def __init__(self, app) -> None:
+        # pylint: disable=import-outside-toplevel
+        from cantor_application.cache import TTLCache
+        from cantor_application.forms.password_validators.policy import PasswordPolicy
+        from cantor_application.forms.password_validators.pwned import PwnedPasswords
+        from cantor_application.hashing import PasswordHasher
+        from cantor_application.helpers import load_rate
+        from cantor_application.history.writer import HistoryWriter
+        from cantor_application.models.user import load_user_values
+        from cantor_application.portfolio.valuation import load_valuation
+        from cantor_application.profiling import Metrics
+        from cantor_application.rates.client import NbpClient
+        from cantor_application.rates.refresher import RateRefresher
+        from cantor_application.rates.store import RateStore
+        from cantor_application.rates.table import RateTableLoader
+
+        config = app.config
+        self.app = app
+        self.nbp_client = NbpClient(config['NBP_API_URL'], pool_size=config['NBP_POOL_SIZE'])
+        # Every downloaded table is kept in the database for warm restarts and valuations.
+        self.rate_store = RateStore(app)
+        self.rate_table_loader = RateTableLoader(self.nbp_client, self.rate_store)
+        self.rate_refresher = RateRefresher(self.rate_table_loader, config['RATE_REFRESH_INTERVAL'])
+        # NBP publishes table A once a business day, so by default a rate is kept
+        # for a day and served stale for another day while it is being refreshed.
+        self.rate_cache = TTLCache(
+            lambda symbol: load_rate(self, symbol),
+            ttl=config['RATE_CACHE_TTL'],
+            max_stale=config['RATE_CACHE_MAX_STALE'],
+            maxsize=config['RATE_CACHE_MAXSIZE'],
+            is_cacheable=lambda rate: rate[0] is not None
+            )
+        # Dropped after every trade of the user handled by this process.
+        self.user_cache = TTLCache(load_user_values, ttl=config['USER_CACHE_TTL'], max_stale=0, maxsize=10000)
+        self.valuation_cache = TTLCache(
+            load_valuation, ttl=config['PORTFOLIO_CACHE_TTL'], max_stale=0, maxsize=10000)
+        self.history_writer = HistoryWriter(
+            config['HISTORY_JOURNAL_DIR'],
+            batch_size=config['HISTORY_WRITE_BATCH_SIZE'],
+            flush_interval=config['HISTORY_WRITE_INTERVAL'],
+            maxsize=config['HISTORY_WRITE_QUEUE_SIZE']
+            )
+        self.pwned_passwords = PwnedPasswords()
+        self.pwned_passwords.configure(
+            mode=config['PWNED_MODE'],
+            api_url=config['PWNED_API_URL'],
+            timeout=config['PWNED_TIMEOUT'],
+            dataset_path=config['PWNED_DATASET'],
+            ttl=config['PWNED_CACHE_TTL'],
+            maxsize=config['PWNED_CACHE_MAXSIZE']
+            )
+        self.password_policy = PasswordPolicy(pwned=self.pwned_passwords)
+        self.password_hasher = PasswordHasher(
+            config['PASSWORD_HASH_METHOD'],
+            salt_length=config['PASSWORD_SALT_LENGTH'],
+            workers=config['PASSWORD_VERIFY_WORKERS'],
+            queue_size=config['PASSWORD_VERIFY_QUEUE_SIZE']
+            )
+        self.metrics = Metrics()
+
+    @property
+    def started(self) -> bool:
+        config = self.app.config
+        return (
+            (not config['RATE_REFRESHER_ENABLED'] or self.rate_refresher.running)
+            and (not config['HISTORY_WRITE_BEHIND'] or self.history_writer.running)
+            )
+
+    @property
+    def caches(self) -> dict:
+        return {
+            'rate': self.rate_cache,
+            'user': self.user_cache,
+            'valuation': self.valuation_cache,
+            'pwned_range': self.pwned_passwords.ranges,
+        }
+
+    def start(self):
+        """Starts the rate refresher and the history writer if they are enabled and not running."""
+        if self.app.config['RATE_REFRESHER_ENABLED'] and not self.rate_refresher.running:
+            self.rate_refresher.start()
+        if self.app.config['HISTORY_WRITE_BEHIND'] and not self.history_writer.running:
+            self.history_writer.start(self.app)
+
+
+def init_services(app) -> Services:
+    """Builds the services of the application and keeps them in its extensions.
+
+    Args:
+        app (Flask): The configured application.
+
+    Returns:
+        Services: The services of the application.
+    """
+    services = app.extensions[EXTENSION_KEY] = Services(app)
+    return services
+
+
+def get_services(app=None) -> Services:
+    """Returns the services of the application, by default of the current one.
+
+    Args:
+        app (Flask): The application, None for `current_app`.
+
+    Returns:
+        Services: The services of the application.
+    """
+    return (app or current_app).extensions[EXTENSION_KEY]
@@ -0,0 +1,33 @@
+"""Module providing the `flask users` commands.
+
+This module defines the command line group managing user accounts, for
+example `flask users import` to provision a cohort of users at once.
+
+"""
+import click
+from flask.cli import AppGroup
+
+from cantor_application.users.importer import import_users, read_records
+
+users_cli = AppGroup('users', help='Manage user accounts.')
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'source_format', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Format of SOURCE, by default taken from its extension.')
+@click.option('--workers', type=int, default=None,
+              help='Number of processes validating and hashing, by default the number of CPUs.')
+@click.option('--batch-size', type=int, default=1000, show_default=True,
+              help='Number of users inserted at once.')
+@click.option('--balance', type=int, default=10000, show_default=True,
+              help='PLN given to every imported user.')
+def import_command(source, source_format, workers, batch_size, balance):
+    """Imports the users of SOURCE, a CSV or NDJSON file with name, email and password."""
+    if source_format is None:
+        source_format = 'ndjson' if source.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    report = import_users(read_records(source, source_format), workers, batch_size, balance)
+    for line, message in report.errors:
+        click.echo(f'line {line}: {message}', err=True)
+    click.echo(f'Imported {report.imported} users, skipped {report.duplicates} duplicates'
+               f' and {report.invalid} invalid records.')
@@ -0,0 +1,220 @@
+"""Module providing the bulk import of user accounts.
+
+This module reads users from CSV or NDJSON records with name, email and
+password fields and inserts them in batches. Names and emails are
+de-duplicated in memory, case-insensitively, against the accounts
+already stored and the records imported before. The remaining records
+are validated like the registration form and their passwords hashed in
+a pool of worker processes. The next batch is prepared by the pool while
+the previous one is inserted with a single INSERT statement. A name or
+email is taken only by a valid record, so an invalid record never hides
+a later valid one with the same name.
+
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from email_validator import EmailNotValidError, validate_email
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from cantor_application import db
+from cantor_application.forms.password_validators.policy import PasswordPolicy
+from cantor_application.forms.password_validators.pwned import PwnedPasswords
+from cantor_application.forms.registrationfrom import username_error
+from cantor_application.hashing import PasswordHasher
+from cantor_application.models.user import User, conflicting_field
+from cantor_application.services import get_services
+
+FIELDS = ('name', 'email', 'password')
+MAX_ERRORS = 100
+
+# The password policy and hasher of a worker process, set by _init_worker.
+_worker = {}
+
+
+@dataclass
+class ImportReport:
+    """Class representing the outcome of an import.
+
+    Attributes:
+        imported (int): Number of inserted users.
+        duplicates (int): Number of records whose name or email already exists.
+        invalid (int): Number of records rejected by the validation.
+        errors (list): (line, message) of the first rejected records.
+    """
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+
+    def reject(self, line: int, message: str, duplicate: bool = False):
+        """Counts a rejected record and keeps its message."""
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def read_records(source, source_format: str):
+    """Reads the user records of a CSV file with a header row or of an NDJSON file.
+
+    Args:
+        source (file): The open file.
+        source_format (str): 'csv' or 'ndjson'.
+
+    Yields:
+        tuple: The line number and the record, None for a line which is not a JSON object.
+    """
+    if source_format == 'csv':
+        reader = csv.DictReader(source)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def _init_worker(pwned_settings: dict, hash_settings: dict):
+    pwned = PwnedPasswords()
+    pwned.configure(**pwned_settings)
+    _worker['policy'] = PasswordPolicy(pwned=pwned)
+    _worker['hasher'] = PasswordHasher(**hash_settings)
+
+
+def prepare_user(user) -> tuple:
+    """Validates one user like the registration form and hashes the password.
+
+    Runs in the worker processes.
+
+    Args:
+        user (tuple): The line number, name, email and password.
+
+    Returns:
+        tuple: The line number, the row of the user or None, and the error or None.
+    """
+    line, name, email, password = user
+    error = username_error(name)
+    if error is None:
+        try:
+            validate_email(email, check_deliverability=False)
+        except EmailNotValidError:
+            error = 'Invalid email address.'
+    if error is None:
+        error = _worker['policy'].is_valid(password) or None
+    if error is not None:
+        return line, None, error
+    return line, {'name': name, 'email': email, 'password': _worker['hasher'].hash(password)}, None
+
+
+def _unique_users(records, names: set, emails: set, report: ImportReport):
+    """Yields the complete records whose name and email were not taken yet."""
+    for line, record in records:
+        if record is None or not all(isinstance(record.get(key), str) and record[key] for key in FIELDS):
+            report.reject(line, f'A record needs the fields {", ".join(FIELDS)}')
+            continue
+        name, email = record['name'].strip(), record['email'].strip()
+        if name.lower() in names:
+            report.reject(line, f"User name '{name}' already exists.", duplicate=True)
+        elif email.lower() in emails:
+            report.reject(line, f"Email '{email}' already exists.", duplicate=True)
+        else:
+            yield line, name, email, record['password']
+
+
+def _batches(users, batch_size: int):
+    batch = []
+    for user in users:
+        batch.append(user)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_users(results, names: set, emails: set, balance: int, report: ImportReport):
+    """Inserts the valid users of a prepared batch, takes their names and emails and commits them."""
+    rows = []
+    for line, row, error in results:
+        if error is not None:
+            report.reject(line, error)
+        # A valid record read before, in this batch or while it was prepared, took the name.
+        elif row['name'].lower() in names:
+            report.reject(line, f"User name '{row['name']}' already exists.", duplicate=True)
+        elif row['email'].lower() in emails:
+            report.reject(line, f"Email '{row['email']}' already exists.", duplicate=True)
+        else:
+            names.add(row['name'].lower())
+            emails.add(row['email'].lower())
+            rows.append((line, dict(row, amount_of_pln=balance)))
+    if not rows:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(User), [row for _, row in rows])
+        report.imported += len(rows)
+    except IntegrityError:
+        # Someone registered one of the names since they were read: insert one by one.
+        for line, row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(User), [row])
+                report.imported += 1
+            except IntegrityError as error:
+                if conflicting_field(error) == 'email':
+                    report.reject(line, f"Email '{row['email']}' already exists.", duplicate=True)
+                else:
+                    report.reject(line, f"User name '{row['name']}' already exists.", duplicate=True)
+    db.session.commit()
+
+
+def import_users(records, workers: int = None, batch_size: int = 1000, balance: int = 10000) -> ImportReport:
+    """Validates, hashes and inserts users in batches.
+
+    Args:
+        records (iterable): (line, record) pairs, as yielded by read_records.
+        workers (int): Number of worker processes, the number of CPUs by default.
+        batch_size (int): Number of users inserted by one statement.
+        balance (int): The PLN given to every imported user.
+
+    Returns:
+        ImportReport: The numbers of imported and rejected records.
+    """
+    report = ImportReport()
+    names = set(db.session.scalars(select(func.lower(User.name))))
+    emails = {email for email in db.session.scalars(select(func.lower(User.email))) if email}
+    workers = workers or os.cpu_count() or 1
+    services = get_services()
+    pwned_passwords, password_hasher = services.pwned_passwords, services.password_hasher
+    pwned_settings = {
+        'mode': pwned_passwords.mode,
+        'api_url': pwned_passwords.api_url,
+        'timeout': pwned_passwords.timeout,
+        'dataset_path': pwned_passwords.dataset.path if pwned_passwords.dataset else None,
+    }
+    hash_settings = {'method': password_hasher.method, 'salt_length': password_hasher.salt_length}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(pwned_settings, hash_settings)) as executor:
+        previous = None
+        for batch in _batches(_unique_users(records, names, emails, report), batch_size):
+            # The pool hashes this batch while the previous one is inserted.
+            results = executor.map(prepare_user, batch, chunksize=max(1, len(batch) // (workers * 4)))
+            if previous is not None:
+                _insert_users(previous, names, emails, balance, report)
+            previous = results
+        if previous is not None:
+            _insert_users(previous, names, emails, balance, report)
+    return report
@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from cantor_application import create_app, db
+from cantor_application.models.user import User
+from cantor_application.users.importer import import_users, read_records
+
+
+@pytest.fixture
+def users_app(trading_app):
+    return trading_app
+
+
+def ndjson(*records):
+    return io.StringIO(''.join((json.dumps(record) if isinstance(record, dict) else record) + '\n'
+                               for record in records))
+
+
+def test_users_are_validated_deduplicated_and_inserted_in_batches(users_app):
+    source = ndjson(
+        {'name': 'importer1', 'email': 'one@cantor.pl', 'password': 'Secret1!x'},
+        {'name': 'TRADER1', 'email': 'other@cantor.pl', 'password': 'Secret1!x'},
+        {'name': 'importer2', 'email': 'ONE@cantor.pl', 'password': 'Secret1!x'},
+        {'name': 'importer3', 'email': 'three@cantor.pl', 'password': 'short'},
+        {'name': 'importer4', 'email': 'not-an-email', 'password': 'Secret1!x'},
+        'not json',
+        {'name': 'importer5', 'email': 'five@cantor.pl', 'password': 'Secret5!x'},
+        {'name': 'importer6', 'email': 'six@cantor.pl', 'password': 'Secret6!x'},
+    )
+    with users_app.app_context():
+        report = import_users(read_records(source, 'ndjson'), workers=2, batch_size=2, balance=500)
+        assert (report.imported, report.duplicates, report.invalid) == (3, 2, 3)
+        assert sorted(line for line, _ in report.errors) == [2, 3, 4, 5, 6]
+        users = {user.name: user for user in User.query.filter(User.name.like('importer%'))}
+        assert sorted(users) == ['importer1', 'importer5', 'importer6']
+        assert check_password_hash(users['importer5'].password, 'Secret5!x')
+        assert users['importer6'].amount_of_pln == 500
+
+def test_invalid_record_does_not_take_the_name_of_a_later_valid_one(users_app):
+    source = ndjson(
+        {'name': 'importer7', 'email': 'seven@cantor.pl', 'password': 'short'},
+        {'name': 'importer7', 'email': 'seven@cantor.pl', 'password': 'Secret7!x'},
+        {'name': 'IMPORTER7', 'email': 'other@cantor.pl', 'password': 'Secret7!x'},
+    )
+    with users_app.app_context():
+        report = import_users(read_records(source, 'ndjson'), workers=1, batch_size=2)
+        assert (report.imported, report.duplicates, report.invalid) == (1, 1, 1)
+        assert check_password_hash(User.query.filter_by(name='importer7').one().password, 'Secret7!x')
+
+
+def test_import_command_reads_csv(tmp_path):
+    source = tmp_path / 'users.csv'
+    source.write_text('name,email,password\ncsvuser1,csv1@cantor.pl,Secret1!x\ncsvuser1,csv2@cantor.pl,Secret1!x\n')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    result = app.test_cli_runner().invoke(args=['users', 'import', str(source), '--workers', '1'])
+    assert 'Imported 1 users, skipped 1 duplicates and 0 invalid records.' in result.output
+    with app.app_context():
+        assert User.query.filter_by(name='csvuser1').one().email == 'csv1@cantor.pl'
+        db.drop_all()
@@ -0,0 +1,38 @@
+"""adding the portfolio version of users
+
+Revision ID: 5feef560fbf5
+Revises: a369ee02bbb4
+Create Date: 2026-10-18 12:45:00.925094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5feef560fbf5'
+down_revision = 'a369ee02bbb4'
+branch_labels = None
+depends_on = None
+
+
+# SQLite drops a column by copying the table, which loses the expression
+# indexes, so they are dropped before and created again after the change.
+LOWER_INDEXES = (
+    ('ix_user_name_lower', 'name'),
+    ('ix_user_email_lower', 'email'),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('portfolio_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    for index_name, _ in LOWER_INDEXES:
+        op.drop_index(index_name, table_name='user')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('portfolio_version')
+    for index_name, column_name in LOWER_INDEXES:
+        op.create_index(index_name, 'user', [sa.text(f'lower({column_name})')], unique=True)
@@ -0,0 +1,42 @@
+"""adding case-insensitive user indexes
+
+Revision ID: 6ff0efef6c28
+Revises: a4c470ed6a27
+Create Date: 2026-10-18 12:32:18.072223
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6ff0efef6c28'
+down_revision = 'a4c470ed6a27'
+branch_labels = None
+depends_on = None
+
+
+# (index, column) of the unique indexes on lower(column).
+LOWER_INDEXES = (
+    ('ix_user_name_lower', 'name'),
+    ('ix_user_email_lower', 'email'),
+)
+
+
+def upgrade():
+    connection = op.get_bind()
+    for index_name, column_name in LOWER_INDEXES:
+        duplicates = connection.execute(sa.text(
+            f'SELECT lower({column_name}) FROM "user" WHERE {column_name} IS NOT NULL '
+            f'GROUP BY lower({column_name}) HAVING count(*) > 1'
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f'Users share a {column_name} differing only in case, merge them before upgrading: '
+                + ', '.join(duplicates))
+        op.create_index(index_name, 'user', [sa.text(f'lower({column_name})')], unique=True)
+
+
+def downgrade():
+    for index_name, _ in LOWER_INDEXES:
+        op.drop_index(index_name, table_name='user')
@@ -0,0 +1,46 @@
+"""widening the password column
+
+Revision ID: a369ee02bbb4
+Revises: 6ff0efef6c28
+Create Date: 2026-10-18 12:34:29.785198
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a369ee02bbb4'
+down_revision = '6ff0efef6c28'
+branch_labels = None
+depends_on = None
+
+
+# SQLite alters a column by copying the table, which loses the expression
+# indexes, so they are dropped before and created again after the change.
+LOWER_INDEXES = (
+    ('ix_user_name_lower', 'name'),
+    ('ix_user_email_lower', 'email'),
+)
+
+
+def _alter_password(existing_type, type_):
+    for index_name, _ in LOWER_INDEXES:
+        op.drop_index(index_name, table_name='user')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=existing_type,
+               type_=type_,
+               existing_nullable=True)
+    for index_name, column_name in LOWER_INDEXES:
+        op.create_index(index_name, 'user', [sa.text(f'lower({column_name})')], unique=True)
+
+
+def upgrade():
+    _alter_password(sa.VARCHAR(length=50), sa.String(length=255))
+
+
+def downgrade():
+    # Hashes longer than 50 characters, like the default scrypt ones, do not
+    # fit any more on databases which enforce the length.
+    _alter_password(sa.String(length=255), sa.VARCHAR(length=50))
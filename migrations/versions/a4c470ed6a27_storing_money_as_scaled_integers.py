@@ -0,0 +1,62 @@
+"""storing money as scaled integers
+
+Revision ID: a4c470ed6a27
+Revises: 12dc75106a7d
+Create Date: 2026-10-18 12:11:55.715363
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c470ed6a27'
+down_revision = '12dc75106a7d'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, old type, number of decimal places kept as an integer)
+MONEY_COLUMNS = (
+    ('user', 'amount_of_pln', sa.Float(), 2),
+    ('history', 'currency_price', sa.Integer(), 8),
+    ('pnl_position', 'cost_basis', sa.Float(), 2),
+    ('pnl_position', 'realized_pnl', sa.Float(), 2),
+)
+
+
+def upgrade():
+    for table_name, column_name, old_type, places in MONEY_COLUMNS:
+        column = sa.column(column_name)
+        op.execute(
+            sa.table(table_name, column).update()
+            .values({column_name: sa.func.round(column * 10 ** places)})
+        )
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column(
+                column_name,
+                existing_type=old_type,
+                type_=sa.BigInteger(),
+                postgresql_using=f'{column_name}::bigint')
+
+
+def downgrade():
+    for table_name, column_name, old_type, places in MONEY_COLUMNS:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column(
+                column_name,
+                existing_type=sa.BigInteger(),
+                type_=sa.Float(),
+                postgresql_using=f'{column_name}::double precision')
+        column = sa.column(column_name)
+        op.execute(
+            sa.table(table_name, column).update()
+            .values({column_name: column / float(10 ** places)})
+        )
+        if not isinstance(old_type, sa.Float):
+            with op.batch_alter_table(table_name, schema=None) as batch_op:
+                batch_op.alter_column(
+                    column_name,
+                    existing_type=sa.Float(),
+                    type_=old_type,
+                    postgresql_using=f'{column_name}::integer')